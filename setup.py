@@ -106,6 +106,8 @@ setup(
         "rackspace": dns_provider_deps_map["rackspace"],
         "dnspod": dns_provider_deps_map["dnspod"],
         "alldns": all_deps_of_all_dns_provider,
+        "propagation": ["dnspython"],
+        "async": ["aiohttp"],
     },
     # If there are data files included in your packages that need to be
     # installed, specify them here.  If using Python 2.6 or less, then these
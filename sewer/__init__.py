@@ -1,4 +1,12 @@
 from .client import Client  # noqa: F401
+from .async_client import AsyncClient  # noqa: F401
+from .account import AcmeAccount  # noqa: F401
+from .bulk import issue_many, IssueResult  # noqa: F401
+from .propagation import PropagationChecker  # noqa: F401
+from .authorizations import AuthorizationCache  # noqa: F401
+from .state import StateSnapshot  # noqa: F401
+from .keys import KeyPool  # noqa: F401
+from .csr import CsrCache  # noqa: F401
 
 from .dns_providers import BaseDns  # noqa: F401
 from .dns_providers import AuroraDns  # noqa: F401
@@ -7,4 +15,5 @@ from .dns_providers import AcmeDnsDns  # noqa: F401
 from .dns_providers import AliyunDns  # noqa:F401
 from .dns_providers import HurricaneDns  # noqa:F401
 from .dns_providers import RackspaceDns  # noqa:F401
+from .dns_providers import RackspaceTokenCache  # noqa:F401
 from .dns_providers import DNSPodDns
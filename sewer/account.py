@@ -0,0 +1,666 @@
+import weakref
+import logging
+import platform
+import threading
+import collections
+
+import requests
+
+from . import jws
+from . import keys
+from . import transport
+from .authorizations import AuthorizationCache
+from .state import get_account_key_fingerprint
+from . import __version__ as sewer_version
+from .config import ACME_DIRECTORY_URL_PRODUCTION
+
+# the AcmeAccount attributes that are read from the acme directory -> their path in the directory.
+DIRECTORY_ATTRIBUTES = {
+    "ACME_GET_NONCE_URL": ["newNonce"],
+    "ACME_TOS_URL": ["meta", "termsOfService"],
+    "ACME_KEY_CHANGE_URL": ["keyChange"],
+    "ACME_NEW_ACCOUNT_URL": ["newAccount"],
+    "ACME_NEW_ORDER_URL": ["newOrder"],
+    "ACME_REVOKE_CERT_URL": ["revokeCert"],
+}
+
+
+def _directory_attribute(name):
+    """
+    an AcmeAccount property for the attribute `name` of DIRECTORY_ATTRIBUTES.
+    the directory is loaded the first time that any of them is used.
+    """
+
+    def getter(self):
+        return self.load_directory()[name]
+
+    def setter(self, value):
+        self.load_directory()[name] = value
+
+    return property(getter, setter)
+
+
+class NoncePool(object):
+    """
+    https://tools.ietf.org/html/draft-ietf-acme-acme#section-6.5
+    The server MUST include a Replay-Nonce header field in every successful response to a
+    POST request and SHOULD provide it in error responses as well.
+
+    NoncePool keeps those nonces around so that a signed request only needs a round trip
+    to the newNonce endpoint when no harvested nonce is available.
+
+    usage:
+        pool = NoncePool(new_nonce=account.get_nonce)
+        nonce = pool.get()
+        response = requests.post(...)
+        pool.harvest(response)
+    """
+
+    def __init__(self, new_nonce, max_size=32, low_water_mark=1):
+        """
+        :param new_nonce:      (required) [callable]
+            called with no arguments to fetch a fresh nonce from the acme server's newNonce endpoint.
+        :param max_size:       (optional) [integer]
+            the max number of nonces kept in the pool. older nonces are discarded first.
+        :param low_water_mark: (optional) [integer]
+            when fewer than this many nonces are left after a get, one more is prefetched in the background.
+        """
+        self.new_nonce = new_nonce
+        self.max_size = max_size
+        self.low_water_mark = low_water_mark
+        self.logger = logging.getLogger()
+
+        self._nonces = collections.deque(maxlen=max_size)
+        self._lock = threading.Lock()
+        self._prefetching = False
+
+    def __len__(self):
+        with self._lock:
+            return len(self._nonces)
+
+    def add(self, nonce):
+        if not nonce:
+            return
+        with self._lock:
+            self._nonces.append(nonce)
+
+    def harvest(self, response):
+        """
+        stores the Replay-Nonce header(if any) of a response from the acme server.
+        """
+        self.add(response.headers.get("Replay-Nonce"))
+
+    def take(self):
+        """
+        returns an unused nonce from the pool, or None if it is empty. never makes a request.
+        the newest nonce is returned first; the oldest ones are the most likely to have expired.
+        """
+        with self._lock:
+            return self._nonces.pop() if self._nonces else None
+
+    def claim(self, nonce):
+        """
+        removes nonce from the pool and returns it, so that no other request uses it.
+        returns None if it is not in the pool, eg because another request has taken it already.
+        """
+        with self._lock:
+            try:
+                self._nonces.remove(nonce)
+            except ValueError:
+                return None
+        return nonce
+
+    def get(self):
+        """
+        returns an unused nonce; from the pool if possible, else from the newNonce endpoint.
+        """
+        with self._lock:
+            nonce = self._nonces.pop() if self._nonces else None
+            remaining = len(self._nonces)
+
+        if nonce is None:
+            self.logger.debug("nonce_pool_empty")
+            return self.new_nonce()
+        if remaining < self.low_water_mark:
+            self.prefetch()
+        return nonce
+
+    def prefetch(self):
+        """
+        fetches one nonce in a background thread. At most one prefetch is in flight at a time.
+        """
+        with self._lock:
+            if self._prefetching:
+                return
+            self._prefetching = True
+        thread = threading.Thread(target=self._prefetch, name="sewer-nonce-prefetch")
+        thread.daemon = True
+        thread.start()
+
+    def _prefetch(self):
+        try:
+            self.add(self.new_nonce())
+        except Exception as e:
+            # the next get() will simply fall back to the newNonce endpoint.
+            self.logger.debug("nonce_prefetch_error. error={0}".format(str(e)))
+        finally:
+            with self._lock:
+                self._prefetching = False
+
+    def clear(self):
+        with self._lock:
+            self._nonces.clear()
+
+
+class AcmeAccount(object):
+    """
+    The account-level state of an acme client: the directory, the account key and its signer,
+    the account url(kid), the nonce pool, the http session and the authorization cache.
+
+    One AcmeAccount can be shared by many sewer.Client instances(orders). The directory is
+    fetched once and the account is registered once, no matter how many certificates are issued.
+    It is safe to use from multiple threads.
+
+    usage:
+        import sewer
+        account = sewer.AcmeAccount(account_key=account_key)
+        for domain_name in ['example.com', 'example.org']:
+            client = sewer.Client(domain_name=domain_name, dns_class=dns_class, account=account)
+            certificate = client.cert()
+
+    Creating an AcmeAccount makes no network calls and generates no key. The directory is
+    fetched, and the account key is created, the first time that they are used.
+    """
+
+    ACME_GET_NONCE_URL = _directory_attribute("ACME_GET_NONCE_URL")
+    ACME_TOS_URL = _directory_attribute("ACME_TOS_URL")
+    ACME_KEY_CHANGE_URL = _directory_attribute("ACME_KEY_CHANGE_URL")
+    ACME_NEW_ACCOUNT_URL = _directory_attribute("ACME_NEW_ACCOUNT_URL")
+    ACME_NEW_ORDER_URL = _directory_attribute("ACME_NEW_ORDER_URL")
+    ACME_REVOKE_CERT_URL = _directory_attribute("ACME_REVOKE_CERT_URL")
+
+    def __init__(
+        self,
+        account_key=None,
+        account_key_type=keys.KEY_TYPE_RSA,
+        bits=2048,
+        contact_email=None,
+        ACME_REQUEST_TIMEOUT=7,
+        ACME_DIRECTORY_URL=ACME_DIRECTORY_URL_PRODUCTION,
+        LOG_LEVEL="INFO",
+        http_session=None,
+        authorization_cache=None,
+        state=None,
+        key_pool=None,
+    ):
+        """
+        :param account_key:          (optional) [string]
+            a string whose contents is an ssl certificate that identifies your account on the acme server.
+            if you do not provide one, a new account key is created and registered.
+        :param account_key_type:     (optional) [string]
+            the type of account key to create if you do not provide one. one of; 'rsa', 'ec256' or 'ec384'.
+        :param bits:                 (optional) [integer]
+            number of bits of the account key to create if you do not provide one. only used for rsa keys.
+        :param contact_email:        (optional) [string]
+            a contact email address
+        :param ACME_REQUEST_TIMEOUT: (optional) [integer]
+            the max time that the account will wait for a network call to complete.
+        :param ACME_DIRECTORY_URL:   (optional) [string]
+            the url of the acme servers' directory endpoint
+        :param LOG_LEVEL:            (optional) [string]
+            the level to output log messages at. one of; 'DEBUG', 'INFO', 'WARNING', 'ERROR' or 'CRITICAL'
+        :param http_session:         (optional) [requests.Session]
+            the session used for all http calls to the acme server.
+            if you do not provide one, sewer.transport.create_session() is used.
+        :param authorization_cache:  (optional) [sewer.AuthorizationCache]
+            remembers the authorizations that the account has validated. give one with a path to
+            keep them across runs. if you do not provide one, an in-memory cache is used.
+        :param state:                (optional) [sewer.StateSnapshot]
+            remembers the directory and the account url(kid) across runs, so that a warm start
+            neither fetches the directory nor registers the account.
+        :param key_pool:             (optional) [sewer.KeyPool]
+            when given, a missing account key is taken from the pool instead of being created
+            in the calling thread.
+        """
+        if not isinstance(account_key, (type(None), str)):
+            raise ValueError(
+                """account_key should be of type:: None or str. You entered {0}.
+                More specifically, account_key should be the result of reading an ssl account certificate""".format(
+                    type(account_key)
+                )
+            )
+        elif account_key_type not in keys.KEY_TYPES:
+            raise ValueError(
+                """account_key_type should be one of; {0}. not {1}""".format(
+                    ", ".join(keys.KEY_TYPES), account_key_type
+                )
+            )
+
+        self.account_key_type = account_key_type
+        self.bits = bits
+        self.contact_email = contact_email
+        self.ACME_REQUEST_TIMEOUT = ACME_REQUEST_TIMEOUT
+        self.ACME_DIRECTORY_URL = ACME_DIRECTORY_URL
+        self.LOG_LEVEL = LOG_LEVEL.upper()
+        self.http_session = http_session or transport.create_session()
+        self.authorization_cache = authorization_cache or AuthorizationCache()
+        self.state = state
+        self.key_pool = key_pool
+
+        self.logger = logging.getLogger()
+        handler = logging.StreamHandler()
+        formatter = logging.Formatter("%(message)s")
+        handler.setFormatter(formatter)
+        if not self.logger.handlers:
+            self.logger.addHandler(handler)
+        self.logger.setLevel(self.LOG_LEVEL)
+
+        self.User_Agent = self.get_user_agent()
+        # the DIRECTORY_ATTRIBUTES; see load_directory
+        self._directory = None
+        self._directory_lock = threading.Lock()
+        # the asyncio.Lock of the sewer.AsyncClient instances that share the account, per event loop;
+        # see sewer.AsyncClient.get_account_lock
+        self.async_locks = weakref.WeakKeyDictionary()
+
+        # unique account identifier
+        # https://tools.ietf.org/html/draft-ietf-acme-acme#section-6.2
+        self.kid = None
+        self.registration_response = None
+        self._register_lock = threading.Lock()
+        self.nonce_pool = NoncePool(new_nonce=self.get_nonce)
+        # parsed account key; see get_signer
+        self._signer = None
+        # the account from the state snapshot; see load_account
+        self._warm_account = None
+
+        # a missing account key is created on first use; see account_key
+        self._account_key = account_key or None
+        self._account_key_lock = threading.Lock()
+        if not account_key:
+            self.PRIOR_REGISTERED = False
+        else:
+            self.PRIOR_REGISTERED = True
+            self.load_account()
+
+    @property
+    def account_key(self):
+        """
+        the PEM encoded account key. if none was given, a new one is created the first time it is used.
+        """
+        if self._account_key is None:
+            with self._account_key_lock:
+                if self._account_key is None:
+                    self._account_key = self.create_account_key()
+        return self._account_key
+
+    @account_key.setter
+    def account_key(self, value):
+        self._account_key = value
+
+    def load_directory(self):
+        """
+        returns the DIRECTORY_ATTRIBUTES; the directory is fetched(or read from the state snapshot)
+        the first time that this is called, by exactly one thread.
+        """
+        if self._directory is None:
+            with self._directory_lock:
+                if self._directory is None:
+                    self.set_directory(self.load_acme_endpoints())
+        return self._directory
+
+    def has_directory(self):
+        return self._directory is not None
+
+    def set_directory(self, acme_endpoints):
+        """
+        takes the DIRECTORY_ATTRIBUTES from the directory document acme_endpoints.
+        """
+        directory = {}
+        for name, path in DIRECTORY_ATTRIBUTES.items():
+            value = acme_endpoints
+            for i in path:
+                value = value[i]
+            directory[name] = value
+        self._directory = directory
+
+    @staticmethod
+    def log_response(response):
+        """
+        renders response as json or as a string
+        """
+        try:
+            log_body = response.json()
+        except ValueError:
+            log_body = response.content[:30]
+        return log_body
+
+    @staticmethod
+    def get_user_agent():
+        return "python-requests/{requests_version} ({system}: {machine}) sewer {sewer_version} ({sewer_url})".format(
+            requests_version=requests.__version__,
+            system=platform.system(),
+            machine=platform.machine(),
+            sewer_version=sewer_version.__version__,
+            sewer_url=sewer_version.__url__,
+        )
+
+    @staticmethod
+    def stringfy_items(payload):
+        """
+        method that takes a dictionary and then converts any keys or values
+        in that are of type bytes into unicode strings.
+        This is necessary esp if you want to then turn that dict into a json string.
+        """
+        if isinstance(payload, str):
+            return payload
+
+        for k, v in payload.items():
+            if isinstance(k, bytes):
+                k = k.decode("utf-8")
+            if isinstance(v, bytes):
+                v = v.decode("utf-8")
+            payload[k] = v
+        return payload
+
+    def get_acme_endpoints(self):
+        self.logger.debug("get_acme_endpoints")
+        headers = {"User-Agent": self.User_Agent}
+        get_acme_endpoints = self.http_session.get(
+            self.ACME_DIRECTORY_URL, timeout=self.ACME_REQUEST_TIMEOUT, headers=headers
+        )
+        self.check_acme_endpoints_response(get_acme_endpoints)
+        return get_acme_endpoints
+
+    def check_acme_endpoints_response(self, response):
+        self.logger.debug(
+            "get_acme_endpoints_response. status_code={0}".format(response.status_code)
+        )
+        if response.status_code not in [200, 201]:
+            raise ValueError(
+                "Error while getting Acme endpoints: status_code={status_code} response={response}".format(
+                    status_code=response.status_code, response=self.log_response(response)
+                )
+            )
+
+    def get_acme_endpoints_from_state(self):
+        """
+        returns the directory document from the state snapshot, or None.
+        """
+        if self.state is None:
+            return None
+        acme_endpoints = self.state.get_directory(self.ACME_DIRECTORY_URL)
+        if acme_endpoints is not None:
+            self.logger.debug("get_acme_endpoints_from_state")
+        return acme_endpoints
+
+    def save_acme_endpoints(self, acme_endpoints):
+        if self.state is not None:
+            self.state.set_directory(self.ACME_DIRECTORY_URL, acme_endpoints)
+
+    def load_acme_endpoints(self):
+        """
+        returns the directory document; from the state snapshot if possible, else from the acme server.
+        """
+        acme_endpoints = self.get_acme_endpoints_from_state()
+        if acme_endpoints is not None:
+            return acme_endpoints
+
+        acme_endpoints = self.get_acme_endpoints().json()
+        self.save_acme_endpoints(acme_endpoints)
+        return acme_endpoints
+
+    def load_account(self):
+        """
+        takes the kid, jwk and thumbprint of the account key from the state snapshot, if it has them.
+        The account is then not registered again.
+        """
+        if self.state is None:
+            return
+        warm_account = self.state.get_account(self.ACME_DIRECTORY_URL, self.account_key)
+        if warm_account is None:
+            return
+        self.logger.debug("acme_register_from_state")
+        self.kid = warm_account["kid"]
+        self._warm_account = dict(
+            warm_account, fingerprint=get_account_key_fingerprint(self.account_key)
+        )
+
+    def get_warm_account(self):
+        """
+        returns the account from the state snapshot, if it still belongs to account_key.
+        """
+        warm_account = self._warm_account
+        if warm_account is None:
+            return None
+        if warm_account["fingerprint"] != get_account_key_fingerprint(self.account_key):
+            return None
+        return warm_account
+
+    def forget_registration(self):
+        """
+        forgets the account url(kid), eg because the acme server no longer knows the account that
+        the state snapshot remembers. The next call to register registers the account again.
+        """
+        with self._register_lock:
+            self.kid = None
+            self.registration_response = None
+            self._warm_account = None
+            if self.state is not None:
+                self.state.delete_account(self.ACME_DIRECTORY_URL, self.account_key)
+
+    def create_account_key(self):
+        self.logger.debug("create_account_key")
+        if self.key_pool is not None:
+            return self.key_pool.get(key_type=self.account_key_type, bits=self.bits).decode()
+        return keys.create_key(key_type=self.account_key_type, bits=self.bits).decode()
+
+    def register(self):
+        """
+        https://tools.ietf.org/html/draft-ietf-acme-acme#section-7.3
+        The server creates an account and stores the public key used to
+        verify the JWS (i.e., the "jwk" element of the JWS header) to
+        authenticate future requests from the account.
+        The server returns this account object in a 201 (Created) response, with the account URL
+        in a Location header field.
+        This account URL will be used in subsequest requests to ACME, as the "kid" value in the acme header.
+        If the server already has an account registered with the provided
+        account key, then it MUST return a response with a 200 (OK) status
+        code and provide the URL of that account in the Location header field.
+        If there is an existing account with the new key
+        provided, then the server SHOULD use status code 409 (Conflict) and
+        provide the URL of that account in the Location header field
+
+        The account is only registered once; later calls return the first registration response.
+        """
+        with self._register_lock:
+            if self.kid is not None:
+                return self.registration_response
+
+            self.logger.info("acme_register")
+            url = self.ACME_NEW_ACCOUNT_URL
+            acme_register_response = self.make_signed_acme_request(
+                url=url, payload=self.get_registration_payload()
+            )
+            self.set_registration(acme_register_response)
+            return acme_register_response
+
+    def get_registration_payload(self):
+        if self.PRIOR_REGISTERED:
+            return {"onlyReturnExisting": True}
+        elif self.contact_email:
+            return {
+                "termsOfServiceAgreed": True,
+                "contact": ["mailto:{0}".format(self.contact_email)],
+            }
+        return {"termsOfServiceAgreed": True}
+
+    def set_registration(self, acme_register_response):
+        """
+        takes the account url(kid) from the response to a newAccount request, and saves it in the
+        state snapshot. raises ValueError if the registration failed.
+        """
+        self.logger.debug(
+            "acme_register_response. status_code={0}. response={1}".format(
+                acme_register_response.status_code, self.log_response(acme_register_response)
+            )
+        )
+
+        if acme_register_response.status_code not in [201, 200, 409]:
+            raise ValueError(
+                "Error while registering: status_code={status_code} response={response}".format(
+                    status_code=acme_register_response.status_code,
+                    response=self.log_response(acme_register_response),
+                )
+            )
+
+        self.kid = acme_register_response.headers["Location"]
+        self.registration_response = acme_register_response
+        if self.state is not None:
+            self.state.set_account(
+                self.ACME_DIRECTORY_URL,
+                self.account_key,
+                kid=self.kid,
+                jwk=self.get_jwk(),
+                thumbprint=self.get_jwk_thumbprint(),
+            )
+
+        self.logger.info("acme_register_success")
+
+    def get_signer(self):
+        """
+        returns the jws.AccountSigner for the account key.
+        The account key is parsed once and the signer is reused until account_key changes.
+        """
+        signer = self._signer
+        if signer is None or signer.account_key != self.account_key:
+            self.logger.debug("get_signer")
+            signer = jws.AccountSigner(self.account_key)
+            self._signer = signer
+        return signer
+
+    def sign_message(self, message):
+        self.logger.debug("sign_message")
+        return self.get_signer().sign(message)
+
+    def get_jwk(self):
+        """
+        https://tools.ietf.org/html/rfc7517
+        returns the JSON Web Key of the account key's public key.
+        """
+        warm_account = self.get_warm_account()
+        if self._signer is None and warm_account is not None:
+            return warm_account["jwk"]
+        return self.get_signer().jwk
+
+    def get_jwk_thumbprint(self):
+        warm_account = self.get_warm_account()
+        if self._signer is None and warm_account is not None:
+            return warm_account["thumbprint"]
+        return self.get_signer().thumbprint
+
+    def get_account_id(self):
+        """
+        returns a string that identifies the account offline; the directory url and the JWK thumbprint.
+        used to key the authorization cache, since the kid is only known after registration.
+        """
+        return "{0} {1}".format(self.ACME_DIRECTORY_URL, self.get_jwk_thumbprint())
+
+    def get_nonce(self):
+        """
+        https://tools.ietf.org/html/draft-ietf-acme-acme#section-6.4
+        Each request to an ACME server must include a fresh unused nonce
+        in order to protect against replay attacks.
+        """
+        self.logger.debug("get_nonce")
+        headers = {"User-Agent": self.User_Agent}
+        response = self.http_session.get(
+            self.ACME_GET_NONCE_URL, timeout=self.ACME_REQUEST_TIMEOUT, headers=headers
+        )
+        nonce = response.headers["Replay-Nonce"]
+        return nonce
+
+    def get_acme_header(self, url, nonce=None):
+        """
+        https://tools.ietf.org/html/draft-ietf-acme-acme#section-6.2
+        The JWS Protected Header MUST include the following fields:
+        - "alg" (Algorithm)
+        - "jwk" (JSON Web Key, only for requests to new-account and revoke-cert resources)
+        - "kid" (Key ID, for all other requests). gotten from self.ACME_NEW_ACCOUNT_URL
+        - "nonce". gotten from self.ACME_GET_NONCE_URL
+        - "url"
+
+        nonce is taken from the nonce pool unless it is given.
+        """
+        self.logger.debug("get_acme_header")
+        if url in [self.ACME_NEW_ACCOUNT_URL, self.ACME_REVOKE_CERT_URL]:
+            kid = None
+        else:
+            kid = self.kid
+        if nonce is None:
+            nonce = self.nonce_pool.get()
+        return self.get_signer().protected_header(url, nonce=nonce, kid=kid)
+
+    @staticmethod
+    def is_bad_nonce(response):
+        """
+        https://tools.ietf.org/html/draft-ietf-acme-acme#section-6.5
+        When a server rejects a request because its nonce value was unacceptable, it MUST
+        provide HTTP status code 400 (Bad Request) and indicate the ACME error type
+        "urn:ietf:params:acme:error:badNonce".
+        """
+        if response.status_code != 400:
+            return False
+        try:
+            return response.json().get("type") == "urn:ietf:params:acme:error:badNonce"
+        except (ValueError, AttributeError):
+            return False
+
+    @staticmethod
+    def is_unknown_account(response):
+        """
+        https://tools.ietf.org/html/draft-ietf-acme-acme#section-6.7
+        The server rejects requests whose kid it does not know, eg of a deactivated account,
+        with "urn:ietf:params:acme:error:accountDoesNotExist" or "urn:ietf:params:acme:error:unauthorized".
+        """
+        if response.status_code not in [400, 401, 403]:
+            return False
+        try:
+            return response.json().get("type") in [
+                "urn:ietf:params:acme:error:accountDoesNotExist",
+                "urn:ietf:params:acme:error:unauthorized",
+            ]
+        except (ValueError, AttributeError):
+            return False
+
+    def make_signed_acme_request(self, url, payload):
+        self.logger.debug("make_signed_acme_request")
+        headers = {"User-Agent": self.User_Agent}
+        payload = self.stringfy_items(payload)
+
+        if payload in ["GET_Z_CHALLENGE", "DOWNLOAD_Z_CERTIFICATE"]:
+            response = self.http_session.get(
+                url, timeout=self.ACME_REQUEST_TIMEOUT, headers=headers
+            )
+            self.nonce_pool.harvest(response)
+        else:
+            response = self.post_signed_acme_request(url, payload)
+            if self.is_bad_nonce(response):
+                # the badNonce error response carries a fresh nonce; retry exactly once, with it.
+                self.logger.debug("make_signed_acme_request_bad_nonce. retrying")
+                nonce = self.nonce_pool.claim(response.headers.get("Replay-Nonce"))
+                response = self.post_signed_acme_request(url, payload, nonce=nonce)
+        return response
+
+    def post_signed_acme_request(self, url, payload, nonce=None):
+        """
+        signs payload with nonce, or with a nonce from the nonce pool if it is None, and posts it to url.
+        """
+        headers = {"User-Agent": self.User_Agent, "Content-Type": "application/jose+json"}
+        protected = self.get_acme_header(url, nonce=nonce)
+        data = self.get_signer().sign_request(protected, payload)
+        response = self.http_session.post(
+            url, data=data.encode("utf8"), timeout=self.ACME_REQUEST_TIMEOUT, headers=headers
+        )
+        self.nonce_pool.harvest(response)
+        return response
@@ -0,0 +1,381 @@
+import asyncio
+import inspect
+
+from . import transport
+from .client import Client
+from .transport import AsyncResponse  # noqa: F401
+
+
+class AsyncClient(Client):
+    """
+    An asyncio version of sewer.Client. It follows the same acme flow; acme_register,
+    apply_for_cert_issuance, get_identifier_authorization, respond_to_challenge, send_csr,
+    download_certificate and cert are coroutines, and polling waits with asyncio.sleep.
+    It needs aiohttp; pip3 install sewer[async]
+
+    The dns records are created and deleted with the dns_class' async_create_dns_records and
+    async_delete_dns_records coroutines; see sewer.BaseDns. Key and csr creation run on the
+    event loop's default executor, so that a single event loop can run many issuances at the same time.
+
+    usage:
+        import sewer
+        account = sewer.AcmeAccount(account_key=account_key)
+        async with aiohttp.ClientSession() as session:
+            clients = [sewer.AsyncClient(domain_name=domain_name,
+                                         dns_class=dns_class,
+                                         account=account,
+                                         async_http_session=session)
+                       for domain_name in ['example.com', 'example.org']]
+            certificates = await asyncio.gather(*[client.cert() for client in clients])
+
+    An AsyncClient takes all the arguments of sewer.Client; http_session is not used, since all the
+    calls to the acme server are made with async_http_session.
+    """
+
+    def __init__(self, domain_name, dns_class, *args, async_http_session=None, **kwargs):
+        """
+        :param domain_name:        (required) [string]
+            the name that you want to acquire/renew certificate for. wildcards are allowed.
+        :param dns_class:          (required) [class]
+            a subclass of sewer.BaseDns which will be called to create/delete DNS TXT records.
+        :param async_http_session: (optional) [aiohttp.ClientSession]
+            the session used for all http calls to the acme server. share one session between
+            clients to reuse its connections. if you do not provide one, one is created on first
+            use and closed by close().
+        :param args, kwargs:       (optional)
+            any other sewer.Client arguments.
+        """
+        if not transport.async_dependencies:
+            raise ImportError(
+                """You need to install AsyncClient dependencies. run; pip3 install sewer[async]"""
+            )
+        super(AsyncClient, self).__init__(domain_name, dns_class, *args, **kwargs)
+        self.async_http_session = async_http_session
+        self._own_async_http_session = False
+        # dns calls, authorization fetches and polls that run at the same time; see run_concurrently
+        self._semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        """
+        closes the async_http_session, if the client created it, and the one of the dns_class.
+        """
+        if self._own_async_http_session and self.async_http_session is not None:
+            await self.async_http_session.close()
+            self.async_http_session = None
+            self._own_async_http_session = False
+        async_close = getattr(self.dns_class, "async_close", None)
+        if async_close is not None and inspect.iscoroutinefunction(async_close):
+            await async_close()
+
+    def get_async_http_session(self):
+        if self.async_http_session is None:
+            self.async_http_session = transport.create_async_session()
+            self._own_async_http_session = True
+        return self.async_http_session
+
+    def get_account_lock(self):
+        """
+        returns the asyncio.Lock that makes the clients of an account fetch the directory and register once.
+        An asyncio.Lock can only be used on one event loop, so every running loop gets its own;
+        the account can be used by one asyncio.run after another.
+        """
+        loop = asyncio.get_running_loop()
+        lock = self.account.async_locks.get(loop)
+        if lock is None:
+            lock = self.account.async_locks.setdefault(loop, asyncio.Lock())
+        return lock
+
+    async def request(self, method, url, data=None, headers=None):
+        """
+        makes an http request to the acme server and returns an AsyncResponse.
+        The Replay-Nonce of the response is kept in the nonce pool.
+        """
+        headers = dict({"User-Agent": self.User_Agent}, **(headers or {}))
+        response = await transport.async_request(
+            self.get_async_http_session(),
+            method,
+            url,
+            data=data,
+            headers=headers,
+            timeout=self.ACME_REQUEST_TIMEOUT,
+        )
+        self.nonce_pool.harvest(response)
+        return response
+
+    async def run_in_executor(self, function, *args):
+        """
+        calls function(*args) on the default executor of the running loop; for the work that blocks,
+        eg creating keys or writing the authorization cache and the state snapshot to disk.
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+    async def run_concurrently(self, function, items):
+        """
+        awaits function(item) for every item, at most self.max_workers at a time, and waits for all
+        of them to finish, whether they succeed or not.
+        returns the result of each call, or the exception it raised, in the same order as items.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def call(item):
+            async with self._semaphore:
+                return await function(item)
+
+        return await asyncio.gather(*[call(i) for i in items], return_exceptions=True)
+
+    @staticmethod
+    def raise_first_exception(results):
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    async def load_directory(self):
+        """
+        fetches the directory(or reads it from the state snapshot) unless the account already has it.
+        """
+        if self.account.has_directory():
+            return self.account.load_directory()
+        async with self.get_account_lock():
+            if not self.account.has_directory():
+                acme_endpoints = self.account.get_acme_endpoints_from_state()
+                if acme_endpoints is None:
+                    self.logger.debug("get_acme_endpoints")
+                    response = await self.request("GET", self.ACME_DIRECTORY_URL)
+                    self.account.check_acme_endpoints_response(response)
+                    acme_endpoints = response.json()
+                    await self.run_in_executor(self.account.save_acme_endpoints, acme_endpoints)
+                self.account.set_directory(acme_endpoints)
+        return self.account.load_directory()
+
+    async def prepare(self):
+        """
+        fetches the directory while the account key, certificate key and csr are created on the
+        executor. returns the client.
+        """
+        self.logger.debug("prepare")
+        await asyncio.gather(
+            self.load_directory(),
+            self.run_in_executor(lambda: self.account.account_key),
+            self.run_in_executor(lambda: self.csr),
+        )
+        return self
+
+    async def get_nonce(self):
+        self.logger.debug("get_nonce")
+        response = await self.request("HEAD", self.ACME_GET_NONCE_URL)
+        return response.headers["Replay-Nonce"]
+
+    async def post_signed_acme_request(self, url, payload, nonce=None):
+        if nonce is None:
+            nonce = self.nonce_pool.take()
+        if nonce is None:
+            nonce = await self.get_nonce()
+        protected = self.account.get_acme_header(url, nonce=nonce)
+        data = self.get_signer().sign_request(protected, payload)
+        return await self.request(
+            "POST",
+            url,
+            data=data.encode("utf8"),
+            headers={"Content-Type": "application/jose+json"},
+        )
+
+    async def make_signed_acme_request(self, url, payload):
+        self.logger.debug("make_signed_acme_request")
+        payload = self.stringfy_items(payload)
+        if payload in ["GET_Z_CHALLENGE", "DOWNLOAD_Z_CERTIFICATE"]:
+            return await self.request("GET", url)
+        response = await self.post_signed_acme_request(url, payload)
+        if self.is_bad_nonce(response):
+            # the badNonce error response carries a fresh nonce; retry exactly once, with it.
+            self.logger.debug("make_signed_acme_request_bad_nonce. retrying")
+            nonce = self.nonce_pool.claim(response.headers.get("Replay-Nonce"))
+            response = await self.post_signed_acme_request(url, payload, nonce=nonce)
+        return response
+
+    async def acme_register(self):
+        """
+        registers the client's account; see sewer.AcmeAccount.register.
+        An account that is already registered is not registered again.
+        The registration runs on the executor, under the lock of the account that sewer.Client uses
+        too, so that the sync and async clients of an account do not both register it.
+        """
+        if self.kid is not None:
+            return self.account.registration_response
+        async with self.get_account_lock():
+            return await self.run_in_executor(self.account.register)
+
+    async def apply_for_cert_issuance(self):
+        """
+        see sewer.Client.apply_for_cert_issuance
+        """
+        self.logger.info("apply_for_cert_issuance")
+        payload = self.get_order_payload()
+        url = self.ACME_NEW_ORDER_URL
+        response = await self.make_signed_acme_request(url, payload)
+        if self.account.get_warm_account() is not None and self.account.is_unknown_account(
+            response
+        ):
+            # the account url(kid) from the state snapshot is stale; register and retry exactly once.
+            self.logger.info("apply_for_cert_issuance_unknown_account. registering again")
+            await self.run_in_executor(self.account.forget_registration)
+            await self.acme_register()
+            response = await self.make_signed_acme_request(url, payload)
+        return self.parse_order_response(response)
+
+    async def get_identifier_authorization(self, url):
+        """
+        see sewer.Client.get_identifier_authorization
+        """
+        self.logger.info("get_identifier_authorization")
+        response = await self.request("GET", url)
+        return self.parse_identifier_authorization(url, response)
+
+    async def get_acme_resource(self, url):
+        return await self.request("GET", url)
+
+    async def poll_acme_resource(self, url, final_statuses, description):
+        """
+        see sewer.Client.poll_acme_resource
+        """
+        return await self.create_poller().poll_async(
+            lambda: self.get_acme_resource(url),
+            lambda response: self.is_acme_resource_valid(response, final_statuses, description),
+            description=description,
+        )
+
+    async def check_authorization_status(self, authorization_url):
+        self.logger.info("check_authorization_status")
+        response = await self.poll_acme_resource(
+            authorization_url,
+            final_statuses=["invalid", "deactivated", "expired", "revoked"],
+            description="check_authorization_status",
+        )
+        self.logger.info("check_authorization_status_success")
+        return response
+
+    async def check_order_status(self, order_url):
+        self.logger.info("check_order_status")
+        response = await self.poll_acme_resource(
+            order_url, final_statuses=["invalid"], description="check_order_status"
+        )
+        self.logger.info("check_order_status_success")
+        return response
+
+    async def respond_to_challenge(self, acme_keyauthorization, dns_challenge_url):
+        """
+        see sewer.Client.respond_to_challenge
+        """
+        self.logger.info("respond_to_challenge")
+        payload = {"keyAuthorization": "{0}".format(acme_keyauthorization)}
+        response = await self.make_signed_acme_request(dns_challenge_url, payload)
+        self.logger.debug(
+            "respond_to_challenge_response. status_code={0}. response={1}".format(
+                response.status_code, self.log_response(response)
+            )
+        )
+        self.logger.info("respond_to_challenge_success")
+        return response
+
+    async def send_csr(self, finalize_url):
+        """
+        see sewer.Client.send_csr
+        """
+        self.logger.info("send_csr")
+        payload = {"csr": self.calculate_safe_base64(self.csr)}
+        response = await self.make_signed_acme_request(finalize_url, payload)
+        certificate_url = self.parse_send_csr_response(response)
+        if certificate_url is None:
+            certificate_url = (await self.check_order_status(self.order_url)).json()["certificate"]
+        self.logger.info("send_csr_success")
+        return certificate_url
+
+    async def download_certificate(self, certificate_url):
+        self.logger.info("download_certificate")
+        response = await self.make_signed_acme_request(certificate_url, "DOWNLOAD_Z_CERTIFICATE")
+        return self.parse_certificate(response)
+
+    async def create_dns_records(self, dns_names):
+        await self.dns_class.async_create_dns_records(
+            self.get_dns_record_pairs(dns_names), max_workers=self.max_workers
+        )
+
+    async def delete_dns_records(self, dns_names):
+        await self.dns_class.async_delete_dns_records(
+            self.get_dns_record_pairs(dns_names), max_workers=self.max_workers
+        )
+
+    async def wait_for_dns_propagation(self, dns_names):
+        """
+        see sewer.Client.wait_for_dns_propagation. a propagation_checker runs on the executor.
+        """
+        self.logger.info("wait_for_dns_propagation. dns_names={0}".format(len(dns_names)))
+        if self.propagation_checker is not None:
+            await self.run_in_executor(self.propagation_checker.wait, dns_names)
+        else:
+            await asyncio.sleep(self.ACME_AUTH_STATUS_WAIT_PERIOD)
+
+    async def get_certificate(self):
+        self.logger.debug("get_certificate")
+        dns_names_to_delete = []
+        authorizations = []
+        try:
+            await self.prepare()
+            await self.acme_register()
+            authorizations, finalize_url = await self.apply_for_cert_issuance()
+
+            pending_authorizations = self.get_pending_authorizations(authorizations)
+            results = await self.run_concurrently(
+                self.get_identifier_authorization, pending_authorizations
+            )
+            self.raise_first_exception(results)
+            dns_names_to_create, responders = self.get_challenges(results)
+
+            if dns_names_to_create:
+                await self.create_dns_records(dns_names_to_create)
+                dns_names_to_delete = dns_names_to_create
+                await self.wait_for_dns_propagation(dns_names_to_create)
+
+            for i in responders:
+                await self.respond_to_challenge(i["acme_keyauthorization"], i["dns_challenge_url"])
+            results = await self.run_concurrently(
+                self.check_authorization_status, [i["authorization_url"] for i in responders]
+            )
+            self.raise_first_exception(results)
+            for responder, result in zip(responders, results):
+                await self.run_in_executor(
+                    self.remember_authorization, responder["authorization_url"], result.json()
+                )
+
+            certificate_url = await self.send_csr(finalize_url)
+            certificate = await self.download_certificate(certificate_url)
+        except Exception as e:
+            self.logger.error("Error: Unable to issue certificate. error={0}".format(str(e)))
+            for url in authorizations:
+                await self.run_in_executor(
+                    self.authorization_cache.remove, self.get_account_id(), url
+                )
+            raise e
+        finally:
+            if dns_names_to_delete:
+                await self.delete_dns_records(dns_names_to_delete)
+
+        return certificate
+
+    async def cert(self):
+        """
+        convenience method to get a certificate without much hassle
+        """
+        return await self.get_certificate()
+
+    async def renew(self):
+        """
+        renews a certificate. see sewer.Client.renew
+        """
+        return await self.cert()
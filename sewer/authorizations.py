@@ -0,0 +1,114 @@
+import logging
+import datetime
+import threading
+
+from . import state
+
+
+def parse_expires(expires):
+    """
+    https://tools.ietf.org/html/draft-ietf-acme-acme#section-7.1.4
+    The "expires" field of an authorization is an RFC 3339 timestamp, eg 2019-01-08T13:35:07Z.
+    Let's Encrypt sends UTC timestamps, sometimes with fractional seconds; those are dropped.
+    returns a naive datetime in UTC, or None if expires can not be parsed.
+    """
+    if not expires:
+        return None
+    try:
+        return datetime.datetime.strptime(expires[:19], "%Y-%m-%dT%H:%M:%S")
+    except (TypeError, ValueError):
+        return None
+
+
+class AuthorizationCache(object):
+    """
+    Remembers the authorizations that an acme account has validated, and until when they stay valid.
+
+    https://tools.ietf.org/html/draft-ietf-acme-acme#section-7.1.4
+    An authorization stays `valid` until it expires, which is usually weeks later. An acme server
+    returns the same valid authorization in later orders for the same identifier, so a renewal
+    does not need to create any dns records or respond to any challenge for it.
+    With a cache, the client does not even have to fetch such an authorization.
+
+    Entries are kept per account(the directory url and the account key's JWK thumbprint) and per
+    identifier. When path is given, the cache is stored in that json file so that it outlives
+    the process. It is safe to use from multiple threads.
+
+    usage:
+        cache = sewer.AuthorizationCache(path='/var/lib/sewer/authorizations.json')
+        client = sewer.Client(domain_name='example.com',
+                              dns_class=dns_class,
+                              account_key=account_key,
+                              authorization_cache=cache)
+    """
+
+    def __init__(self, path=None, min_validity=3600):
+        """
+        :param path:         (optional) [string]
+            the json file that the cache is loaded from and saved to. None keeps it in memory only.
+        :param min_validity: (optional) [integer]
+            the least number of seconds that an authorization should still be valid for to be used.
+        """
+        self.path = path
+        self.min_validity = min_validity
+        self.logger = logging.getLogger()
+        self._lock = threading.Lock()
+        self._entries = self.load()
+
+    def load(self):
+        return state.load_json_file(self.path, "authorization cache")
+
+    def save(self):
+        """
+        writes the cache to path. should be called with self._lock held.
+        """
+        if self.path is None:
+            return
+        state.save_json_file(self.path, self._entries, prefix=".sewer-authz-")
+
+    def get(self, account_id, url, now=None):
+        """
+        returns the identifier of the authorization at url if the account validated it, and it is
+        still valid for at least min_validity seconds. returns None otherwise.
+        """
+        now = now or datetime.datetime.utcnow()
+        with self._lock:
+            for identifier, entry in self._entries.get(account_id, {}).items():
+                if entry["url"] != url:
+                    continue
+                expires = parse_expires(entry["expires"])
+                if expires is None:
+                    return None
+                if (expires - now).total_seconds() < self.min_validity:
+                    return None
+                return identifier
+        return None
+
+    def add(self, account_id, identifier, url, expires):
+        """
+        records that the authorization at url, for identifier(eg example.com or *.example.com),
+        is valid until expires(an RFC 3339 timestamp). expired entries of the account are dropped.
+        """
+        if parse_expires(expires) is None:
+            return
+        now = datetime.datetime.utcnow()
+        with self._lock:
+            entries = self._entries.setdefault(account_id, {})
+            entries[identifier] = {"url": url, "expires": expires}
+            for i in list(entries):
+                i_expires = parse_expires(entries[i]["expires"])
+                if i_expires is None or i_expires <= now:
+                    del entries[i]
+            self.save()
+
+    def remove(self, account_id, url):
+        """
+        forgets the authorization at url, eg because the acme server no longer considers it valid.
+        """
+        with self._lock:
+            entries = self._entries.get(account_id, {})
+            identifiers = [i for i in entries if entries[i]["url"] == url]
+            for i in identifiers:
+                del entries[i]
+            if identifiers:
+                self.save()
@@ -0,0 +1,163 @@
+import logging
+import collections
+import concurrent.futures
+
+from . import keys
+from . import transport
+from .client import Client
+from .account import AcmeAccount
+
+# the outcome of issuing the certificate described by one spec.
+# exactly one of certificate and error is None.
+IssueResult = collections.namedtuple(
+    "IssueResult", ["spec", "certificate", "certificate_key", "account_key", "error"]
+)
+
+# the sewer.Client arguments that configure the shared sewer.AcmeAccount
+ACCOUNT_KWARGS = [
+    "ACME_REQUEST_TIMEOUT",
+    "ACME_DIRECTORY_URL",
+    "LOG_LEVEL",
+    "bits",
+    "state",
+    "authorization_cache",
+]
+# the ones of them that sewer.Client does not accept together with an account
+ACCOUNT_ONLY_KWARGS = ["state", "authorization_cache"]
+
+
+def issue_many(
+    specs,
+    dns_class=None,
+    account_key=None,
+    account_key_type=keys.KEY_TYPE_RSA,
+    contact_email=None,
+    max_workers=4,
+    http_session=None,
+    key_pool=None,
+    **client_kwargs
+):
+    """
+    issues many certificates concurrently, all of them under the same acme account.
+    The acme directory is fetched once and the account is registered once.
+
+    usage:
+        import sewer
+        dns_class = sewer.CloudFlareDns(CLOUDFLARE_EMAIL='example@example.com',
+                                        CLOUDFLARE_API_KEY='nsa-grade-api-key')
+        results = sewer.issue_many(
+            [
+                {"domain_name": "example.com", "domain_alt_names": ["www.example.com"]},
+                {"domain_name": "example.org", "certificate_key_type": "ec256"},
+            ],
+            dns_class=dns_class,
+            account_key=account_key,
+            max_workers=8,
+        )
+        for result in results:
+            if result.error:
+                print(result.spec["domain_name"], "failed:", result.error)
+            else:
+                print(result.spec["domain_name"], result.certificate, result.certificate_key)
+
+    :param specs:            (required) [list]
+        list of dicts, one per certificate. Each dict holds the sewer.Client arguments that are
+        specific to that certificate; domain_name(required), domain_alt_names, dns_class,
+        certificate_key, certificate_key_type, bits and digest.
+    :param dns_class:        (optional) [class]
+        the dns provider used for specs that do not have their own dns_class.
+    :param account_key:      (optional) [string]
+        the account key to issue all the certificates with. if you do not provide one, a new
+        account key of type account_key_type is created and returned in each result.
+    :param account_key_type: (optional) [string]
+        the type of account key to create if account_key is not provided.
+    :param contact_email:    (optional) [string]
+        a contact email address for the account.
+    :param max_workers:      (optional) [integer]
+        the max number of certificates that are issued at the same time.
+    :param http_session:     (optional) [requests.Session]
+        the session shared by all the issuances. if you do not provide one, a session with a
+        connection pool large enough for max_workers is created.
+    :param key_pool:         (optional) [sewer.KeyPool]
+        the pool that the missing account and certificate keys are taken from. its stock is
+        filled for every key type in specs before the issuances start, so that the keys are
+        created in parallel with the account registration.
+    :param client_kwargs:    (optional)
+        any other sewer.Client arguments, applied to all specs. eg ACME_DIRECTORY_URL.
+        ACME_REQUEST_TIMEOUT, ACME_DIRECTORY_URL, LOG_LEVEL, bits, state and authorization_cache
+        also configure the shared account.
+
+    returns a list of IssueResult, in the same order as specs.
+    A failure to issue one certificate is recorded in its result and does not affect the others.
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers should be at least 1. not {0}".format(max_workers))
+
+    logger = logging.getLogger()
+    if http_session is None:
+        http_session = transport.create_session(pool_maxsize=max_workers)
+    if key_pool is not None:
+        for spec in specs:
+            if not spec.get("certificate_key"):
+                key_pool.fill(
+                    key_type=spec.get(
+                        "certificate_key_type",
+                        client_kwargs.get("certificate_key_type", keys.KEY_TYPE_RSA),
+                    ),
+                    bits=spec.get("bits", client_kwargs.get("bits", 2048)),
+                )
+    # one directory fetch and one registration for all the certificates.
+    account = AcmeAccount(
+        account_key=account_key,
+        account_key_type=account_key_type,
+        contact_email=contact_email,
+        http_session=http_session,
+        key_pool=key_pool,
+        **dict((k, v) for k, v in client_kwargs.items() if k in ACCOUNT_KWARGS)
+    )
+    account_key = account.account_key
+
+    def issue(spec):
+        kwargs = dict((k, v) for k, v in client_kwargs.items() if k not in ACCOUNT_ONLY_KWARGS)
+        kwargs.update(spec)
+        kwargs.setdefault("dns_class", dns_class)
+        client = Client(account=account, key_pool=key_pool, **kwargs)
+        certificate = client.cert()
+        return IssueResult(
+            spec=spec,
+            certificate=certificate,
+            certificate_key=client.certificate_key,
+            account_key=account_key,
+            error=None,
+        )
+
+    logger.info("issue_many. certificates={0} max_workers={1}".format(len(specs), max_workers))
+    results = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(issue, spec) for spec in specs]
+        for spec, future in zip(specs, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.error(
+                    "issue_many_error. domain_name={0} error={1}".format(
+                        spec.get("domain_name"), str(e)
+                    )
+                )
+                results.append(
+                    IssueResult(
+                        spec=spec,
+                        certificate=None,
+                        certificate_key=None,
+                        account_key=account_key,
+                        error=e,
+                    )
+                )
+
+    logger.info(
+        "issue_many_success. issued={0} failed={1}".format(
+            len([i for i in results if i.error is None]),
+            len([i for i in results if i.error is not None]),
+        )
+    )
+    return results
@@ -2,9 +2,10 @@ import os
 import logging
 import argparse
 
-from . import Client
+from . import Client, AuthorizationCache, StateSnapshot, CsrCache
 from . import __version__ as sewer_version
 from .config import ACME_DIRECTORY_URL_STAGING, ACME_DIRECTORY_URL_PRODUCTION
+from .keys import KEY_TYPES
 
 
 def main():
@@ -58,6 +59,25 @@ def main():
         help="The path to your certificate key. \
         eg: --certificate_key /home/mycertificate.key",
     )
+    parser.add_argument(
+        "--account_key_type",
+        type=str,
+        required=False,
+        default="rsa",
+        choices=KEY_TYPES,
+        help="The type of account key to create when --account_key is not given. \
+        ec256 and ec384 are ECDSA keys on the P-256 and P-384 curves. \
+        eg: --account_key_type ec256",
+    )
+    parser.add_argument(
+        "--certificate_key_type",
+        type=str,
+        required=False,
+        default="rsa",
+        choices=KEY_TYPES,
+        help="The type of certificate key to create when --certificate_key is not given. \
+        eg: --certificate_key_type ec256",
+    )
     parser.add_argument(
         "--dns",
         type=str,
@@ -136,6 +156,45 @@ def main():
         help="The log level to output log messages at. \
         eg: --loglevel DEBUG",
     )
+    parser.add_argument(
+        "--poll_timeout",
+        type=int,
+        required=False,
+        default=120,
+        help="The max number of seconds to wait for the acme server to validate the domains \
+        and to issue the certificate. eg: --poll_timeout 300",
+    )
+    parser.add_argument(
+        "--propagation_check",
+        action="store_true",
+        help="Wait until the dns records are visible on the domains' authoritative nameservers \
+        before asking the acme server to validate them, instead of waiting a fixed time. \
+        Needs dnspython; pip3 install sewer[propagation]",
+    )
+    parser.add_argument(
+        "--authorization_cache",
+        type=str,
+        required=False,
+        help="The json file in which to remember the domains that the account has validated. \
+        Renewals of recently validated domains then skip the dns challenges. \
+        eg: --authorization_cache /data/ssl/authorizations.json",
+    )
+    parser.add_argument(
+        "--state_file",
+        type=str,
+        required=False,
+        help="The json file in which to remember the acme directory and the account url. \
+        Later runs with the same account key then skip the directory fetch and the account registration. \
+        eg: --state_file /data/ssl/state.json",
+    )
+    parser.add_argument(
+        "--csr_cache",
+        type=str,
+        required=False,
+        help="The json file in which to remember the certificate signing requests that have been created. \
+        Renewals with the same certificate key and domains then reuse the csr instead of signing a new one. \
+        eg: --csr_cache /data/ssl/csrs.json",
+    )
 
     args = parser.parse_args()
 
@@ -145,11 +204,18 @@ def main():
     action = args.action
     account_key = args.account_key
     certificate_key = args.certificate_key
+    account_key_type = args.account_key_type
+    certificate_key_type = args.certificate_key_type
     bundle_name = args.bundle_name
     endpoint = args.endpoint
     email = args.email
     loglevel = args.loglevel
     out_dir = args.out_dir
+    poll_timeout = args.poll_timeout
+    propagation_check = args.propagation_check
+    authorization_cache = args.authorization_cache
+    state_file = args.state_file
+    csr_cache = args.csr_cache
 
     # Make sure the output dir user specified is writable
     if not os.access(out_dir, os.W_OK):
@@ -271,6 +337,19 @@ def main():
     else:
         raise ValueError("The dns provider {0} is not recognised.".format(dns_provider))
 
+    propagation_checker = None
+    if propagation_check:
+        from . import PropagationChecker
+
+        propagation_checker = PropagationChecker(timeout=poll_timeout)
+    if authorization_cache:
+        authorization_cache = AuthorizationCache(path=authorization_cache)
+    state = None
+    if state_file:
+        state = StateSnapshot(path=state_file)
+    if csr_cache:
+        csr_cache = CsrCache(path=csr_cache)
+
     client = Client(
         domain_name=domain,
         dns_class=dns_class,
@@ -278,8 +357,15 @@ def main():
         contact_email=email,
         account_key=account_key,
         certificate_key=certificate_key,
+        account_key_type=account_key_type,
+        certificate_key_type=certificate_key_type,
         ACME_DIRECTORY_URL=ACME_DIRECTORY_URL,
         LOG_LEVEL=loglevel,
+        ACME_POLL_TIMEOUT=poll_timeout,
+        propagation_checker=propagation_checker,
+        authorization_cache=authorization_cache,
+        state=state,
+        csr_cache=csr_cache,
     )
     certificate_key = client.certificate_key
     account_key = client.account_key
@@ -1,20 +1,31 @@
 import time
 import copy
-import json
-import base64
 import hashlib
 import logging
-import binascii
-import platform
+import threading
+import concurrent.futures
 
-import requests
 import OpenSSL
-import cryptography
 
+from . import jws
+from . import keys
+from . import polling
 from . import __version__ as sewer_version
+from .csr import DEFAULT_CSR_CACHE
+from .account import AcmeAccount, NoncePool  # noqa: F401
 from .config import ACME_DIRECTORY_URL_PRODUCTION
 
 
+def _account_attribute(name):
+    """
+    a Client property that reads and writes the attribute `name` of the client's AcmeAccount.
+    """
+    return property(
+        lambda self: getattr(self.account, name),
+        lambda self, value: setattr(self.account, name, value),
+    )
+
+
 class Client(object):
     """
     todo: improve documentation.
@@ -48,10 +59,44 @@ class Client(object):
         certificate = client.renew()
         certificate_key = client.certificate_key
 
+        3. to issue many certificates under one account:
+        account = sewer.AcmeAccount(account_key=account_key)
+        for domain_name in ['example.com', 'example.org']:
+            client = sewer.Client(domain_name=domain_name,
+                                  dns_class=dns_class,
+                                  account=account)
+            certificate = client.cert()
+
+    Everything that belongs to the acme account(the directory, account key, kid, signer,
+    nonce pool and http session) lives in client.account, a sewer.AcmeAccount.
+    A Client is one order; clients that share an account share one directory fetch and one registration.
+
+    Creating a Client makes no network calls and generates no keys. The directory is fetched, and
+    the keys and csr are created, when they are first used; client.prepare() does all of them at
+    the same time.
+
     todo:
         - handle more exceptions
     """
 
+    account_key = _account_attribute("account_key")
+    account_key_type = _account_attribute("account_key_type")
+    contact_email = _account_attribute("contact_email")
+    PRIOR_REGISTERED = _account_attribute("PRIOR_REGISTERED")
+    kid = _account_attribute("kid")
+    nonce_pool = _account_attribute("nonce_pool")
+    http_session = _account_attribute("http_session")
+    authorization_cache = _account_attribute("authorization_cache")
+    User_Agent = _account_attribute("User_Agent")
+    ACME_REQUEST_TIMEOUT = _account_attribute("ACME_REQUEST_TIMEOUT")
+    ACME_DIRECTORY_URL = _account_attribute("ACME_DIRECTORY_URL")
+    ACME_GET_NONCE_URL = _account_attribute("ACME_GET_NONCE_URL")
+    ACME_TOS_URL = _account_attribute("ACME_TOS_URL")
+    ACME_KEY_CHANGE_URL = _account_attribute("ACME_KEY_CHANGE_URL")
+    ACME_NEW_ACCOUNT_URL = _account_attribute("ACME_NEW_ACCOUNT_URL")
+    ACME_NEW_ORDER_URL = _account_attribute("ACME_NEW_ORDER_URL")
+    ACME_REVOKE_CERT_URL = _account_attribute("ACME_REVOKE_CERT_URL")
+
     def __init__(
         self,
         domain_name,
@@ -62,11 +107,22 @@ class Client(object):
         certificate_key=None,
         bits=2048,
         digest="sha256",
+        account_key_type=keys.KEY_TYPE_RSA,
+        certificate_key_type=keys.KEY_TYPE_RSA,
         ACME_REQUEST_TIMEOUT=7,
         ACME_AUTH_STATUS_WAIT_PERIOD=8,
-        ACME_AUTH_STATUS_MAX_CHECKS=3,
+        ACME_AUTH_STATUS_MAX_CHECKS=None,
+        ACME_POLL_TIMEOUT=120,
         ACME_DIRECTORY_URL=ACME_DIRECTORY_URL_PRODUCTION,
         LOG_LEVEL="INFO",
+        http_session=None,
+        account=None,
+        max_workers=1,
+        propagation_checker=None,
+        authorization_cache=None,
+        state=None,
+        key_pool=None,
+        csr_cache=None,
     ):
         """
         :param domain_name:                  (required) [string]
@@ -85,18 +141,57 @@ class Client(object):
             if you do not provide one, this client will issue a new certificate else will renew.
         :param bits:                         (optional) [integer]
             number of bits that will be used to create your certificates' private key.
+            only used for rsa keys.
         :param digest:                       (optional) [string]
             the ssl digest type to be used in signing the certificate signing request(csr)
+        :param account_key_type:             (optional) [string]
+            the type of account key to create if you do not provide one. one of; 'rsa', 'ec256' or 'ec384'.
+            ec keys sign acme requests with ES256/ES384 instead of RS256.
+        :param certificate_key_type:         (optional) [string]
+            the type of certificate key to create if you do not provide one. one of; 'rsa', 'ec256' or 'ec384'.
         :param ACME_REQUEST_TIMEOUT:         (optional) [integer]
             the max time that the client will wait for a network call to complete.
         :param ACME_AUTH_STATUS_WAIT_PERIOD: (optional) [integer]
-            the interval between two consecutive client polls on the acme server to check on authorization status
+            the time to wait for dns records to propagate, and the max interval between two consecutive
+            client polls on the acme server to check on authorization/order status.
+            polls start one second apart and back off exponentially, unless the server sends Retry-After.
         :param ACME_AUTH_STATUS_MAX_CHECKS:  (optional) [integer]
-            the max number of times the client will poll the acme server to check on authorization status
+            the max number of times the client will poll the acme server to check on an authorization/order status.
+            None means that polling is only bounded by ACME_POLL_TIMEOUT.
+        :param ACME_POLL_TIMEOUT:            (optional) [integer]
+            the max time that the client will poll the acme server to check on an authorization/order status.
         :param ACME_DIRECTORY_URL:           (optional) [string]
             the url of the acme servers' directory endpoint
         :param LOG_LEVEL:                    (optional) [string]
             the level to output log messages at. one of; 'DEBUG', 'INFO', 'WARNING', 'ERROR' or 'CRITICAL'
+        :param http_session:                 (optional) [requests.Session]
+            the session used for all http calls to the acme server. share one session between
+            clients to reuse its connections. if you do not provide one, sewer.transport.create_session() is used.
+        :param account:                      (optional) [sewer.AcmeAccount]
+            the acme account to issue the certificate under. share one account between clients to
+            fetch the directory and register only once. When given, contact_email, account_key_type,
+            ACME_REQUEST_TIMEOUT, ACME_DIRECTORY_URL, http_session, authorization_cache and state
+            are taken from the account.
+        :param max_workers:                  (optional) [integer]
+            the max number of authorizations fetched, and dns records created/deleted, at the same time.
+            the default of 1 calls dns_class from one thread at a time; only raise it if your dns_class
+            is safe to call from multiple threads.
+        :param propagation_checker:          (optional) [sewer.PropagationChecker]
+            when given, the challenges are only responded to once their dns records are visible on
+            all the authoritative nameservers, instead of after a fixed ACME_AUTH_STATUS_WAIT_PERIOD.
+        :param authorization_cache:          (optional) [sewer.AuthorizationCache]
+            remembers the authorizations that the account has validated, so that they are not fetched
+            or validated again. give one with a path to keep them across runs, eg between renewals.
+        :param state:                        (optional) [sewer.StateSnapshot]
+            remembers the acme directory and the account url(kid) across runs, so that a renewal
+            with the same account_key goes straight to newOrder.
+        :param key_pool:                     (optional) [sewer.KeyPool]
+            when given, missing certificate and account keys are taken from the pool instead of
+            being created in the calling thread. share one pool between clients that issue many certificates.
+        :param csr_cache:                    (optional) [sewer.CsrCache]
+            remembers the csrs that have been created, so that a renewal with the same certificate_key
+            and names does not sign a new one. give one with a path to keep them across runs.
+            if you do not provide one, a cache shared by all the clients in the process is used.
         """
 
         if not isinstance(domain_alt_names, (type(None), list)):
@@ -125,6 +220,40 @@ class Client(object):
                     type(certificate_key)
                 )
             )
+        elif account_key_type not in keys.KEY_TYPES:
+            raise ValueError(
+                """account_key_type should be one of; {0}. not {1}""".format(
+                    ", ".join(keys.KEY_TYPES), account_key_type
+                )
+            )
+        elif certificate_key_type not in keys.KEY_TYPES:
+            raise ValueError(
+                """certificate_key_type should be one of; {0}. not {1}""".format(
+                    ", ".join(keys.KEY_TYPES), certificate_key_type
+                )
+            )
+        elif not isinstance(account, (type(None), AcmeAccount)):
+            raise ValueError(
+                """account should be of type:: None or sewer.AcmeAccount. You entered {0}""".format(
+                    type(account)
+                )
+            )
+        elif account is not None and account_key is not None:
+            raise ValueError(
+                """account_key should not be given together with account. The account key is account.account_key"""
+            )
+        elif account is not None and any(
+            i is not None for i in [contact_email, http_session, authorization_cache, state]
+        ):
+            raise ValueError(
+                """contact_email, http_session, authorization_cache and state should not be given together with account. They are taken from the account"""
+            )
+        elif not isinstance(max_workers, int) or max_workers < 1:
+            raise ValueError(
+                """max_workers should be an integer of at least 1. You entered {0}""".format(
+                    max_workers
+                )
+            )
         elif LOG_LEVEL.upper() not in ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]:
             raise ValueError(
                 """LOG_LEVEL should be one of; 'DEBUG', 'INFO', 'WARNING', 'ERROR' or 'CRITICAL'. not {0}""".format(
@@ -138,13 +267,18 @@ class Client(object):
             domain_alt_names = []
         self.domain_alt_names = domain_alt_names
         self.domain_alt_names = list(set(self.domain_alt_names))
-        self.contact_email = contact_email
         self.bits = bits
         self.digest = digest
-        self.ACME_REQUEST_TIMEOUT = ACME_REQUEST_TIMEOUT
+        self.certificate_key_type = certificate_key_type
         self.ACME_AUTH_STATUS_WAIT_PERIOD = ACME_AUTH_STATUS_WAIT_PERIOD
         self.ACME_AUTH_STATUS_MAX_CHECKS = ACME_AUTH_STATUS_MAX_CHECKS
-        self.ACME_DIRECTORY_URL = ACME_DIRECTORY_URL
+        self.ACME_POLL_TIMEOUT = ACME_POLL_TIMEOUT
+        # the url of the current order; see apply_for_cert_issuance
+        self.order_url = None
+        self.max_workers = max_workers
+        self.propagation_checker = propagation_checker
+        self.key_pool = key_pool
+        self.csr_cache = csr_cache or DEFAULT_CSR_CACHE
         self.LOG_LEVEL = LOG_LEVEL.upper()
 
         self.logger = logging.getLogger()
@@ -160,28 +294,26 @@ class Client(object):
             self.all_domain_names.insert(0, self.domain_name)
             self.domain_alt_names = list(set(self.domain_alt_names))
 
-            self.User_Agent = self.get_user_agent()
-            acme_endpoints = self.get_acme_endpoints().json()
-            self.ACME_GET_NONCE_URL = acme_endpoints["newNonce"]
-            self.ACME_TOS_URL = acme_endpoints["meta"]["termsOfService"]
-            self.ACME_KEY_CHANGE_URL = acme_endpoints["keyChange"]
-            self.ACME_NEW_ACCOUNT_URL = acme_endpoints["newAccount"]
-            self.ACME_NEW_ORDER_URL = acme_endpoints["newOrder"]
-            self.ACME_REVOKE_CERT_URL = acme_endpoints["revokeCert"]
-
-            # unique account identifier
-            # https://tools.ietf.org/html/draft-ietf-acme-acme#section-6.2
-            self.kid = None
-
-            self.certificate_key = certificate_key or self.create_certificate_key()
-            self.csr = self.create_csr()
-
-            if not account_key:
-                self.account_key = self.create_account_key()
-                self.PRIOR_REGISTERED = False
-            else:
-                self.account_key = account_key
-                self.PRIOR_REGISTERED = True
+            if account is None:
+                account = AcmeAccount(
+                    account_key=account_key,
+                    account_key_type=account_key_type,
+                    bits=bits,
+                    contact_email=contact_email,
+                    ACME_REQUEST_TIMEOUT=ACME_REQUEST_TIMEOUT,
+                    ACME_DIRECTORY_URL=ACME_DIRECTORY_URL,
+                    LOG_LEVEL=LOG_LEVEL,
+                    http_session=http_session,
+                    authorization_cache=authorization_cache,
+                    state=state,
+                    key_pool=key_pool,
+                )
+            self.account = account
+
+            # created on first use; see certificate_key and csr
+            self._certificate_key = certificate_key or None
+            self._csr = None
+            self._lazy_lock = threading.RLock()
 
             self.logger.info(
                 "intialise_success, sewer_version={0}, domain_names={1}, acme_server={2}".format(
@@ -194,59 +326,80 @@ class Client(object):
             self.logger.error("Unable to intialise client. error={0}".format(str(e)))
             raise e
 
-    @staticmethod
-    def log_response(response):
+    @property
+    def certificate_key(self):
         """
-        renders response as json or as a string
+        the PEM encoded certificate key. if none was given, a new one is created the first time it is used.
         """
-        # TODO: use this to handle all response logs.
-        try:
-            log_body = response.json()
-        except ValueError:
-            log_body = response.content[:30]
-        return log_body
+        if self._certificate_key is None:
+            with self._lazy_lock:
+                if self._certificate_key is None:
+                    self._certificate_key = self.create_certificate_key()
+        return self._certificate_key
+
+    @certificate_key.setter
+    def certificate_key(self, value):
+        with self._lazy_lock:
+            self._certificate_key = value
+            self._csr = None
+
+    @property
+    def csr(self):
+        """
+        the DER encoded certificate signing request for all_domain_names, created on first use.
+        """
+        if self._csr is None:
+            with self._lazy_lock:
+                if self._csr is None:
+                    self._csr = self.create_csr()
+        return self._csr
 
-    @staticmethod
-    def get_user_agent():
-        return "python-requests/{requests_version} ({system}: {machine}) sewer {sewer_version} ({sewer_url})".format(
-            requests_version=requests.__version__,
-            system=platform.system(),
-            machine=platform.machine(),
-            sewer_version=sewer_version.__version__,
-            sewer_url=sewer_version.__url__,
-        )
+    @csr.setter
+    def csr(self, value):
+        self._csr = value
+
+    def prepare(self):
+        """
+        fetches the directory and creates the account key, certificate key and csr at the same time,
+        instead of one after another when they are first used. returns the client.
+        Everything that is already there is not done again.
+        """
+        self.logger.debug("prepare")
+        with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [
+                executor.submit(self.account.load_directory),
+                executor.submit(lambda: self.account_key),
+                executor.submit(lambda: self.csr),
+            ]
+        for future in futures:
+            future.result()
+        return self
+
+    log_response = staticmethod(AcmeAccount.log_response)
+    get_user_agent = staticmethod(AcmeAccount.get_user_agent)
+    stringfy_items = staticmethod(AcmeAccount.stringfy_items)
+    is_bad_nonce = staticmethod(AcmeAccount.is_bad_nonce)
 
     def get_acme_endpoints(self):
-        self.logger.debug("get_acme_endpoints")
-        headers = {"User-Agent": self.User_Agent}
-        get_acme_endpoints = requests.get(
-            self.ACME_DIRECTORY_URL, timeout=self.ACME_REQUEST_TIMEOUT, headers=headers
-        )
-        self.logger.debug(
-            "get_acme_endpoints_response. status_code={0}".format(get_acme_endpoints.status_code)
-        )
-        if get_acme_endpoints.status_code not in [200, 201]:
-            raise ValueError(
-                "Error while getting Acme endpoints: status_code={status_code} response={response}".format(
-                    status_code=get_acme_endpoints.status_code,
-                    response=self.log_response(get_acme_endpoints),
-                )
-            )
-        return get_acme_endpoints
+        return self.account.get_acme_endpoints()
 
     def create_certificate_key(self):
         self.logger.debug("create_certificate_key")
-        return self.create_key().decode()
+        return self.create_key(self.certificate_key_type).decode()
 
     def create_account_key(self):
-        self.logger.debug("create_account_key")
-        return self.create_key().decode()
+        return self.account.create_account_key()
 
-    def create_key(self, key_type=OpenSSL.crypto.TYPE_RSA):
-        key = OpenSSL.crypto.PKey()
-        key.generate_key(key_type, self.bits)
-        private_key = OpenSSL.crypto.dump_privatekey(OpenSSL.crypto.FILETYPE_PEM, key)
-        return private_key
+    def create_key(self, key_type=keys.KEY_TYPE_RSA):
+        """
+        returns a new PEM encoded private key(bytes) of type key_type; one of sewer.keys.KEY_TYPES.
+        """
+        if key_type == OpenSSL.crypto.TYPE_RSA:
+            # backward compatibility with the OpenSSL key types that create_key used to take.
+            key_type = keys.KEY_TYPE_RSA
+        if self.key_pool is not None:
+            return self.key_pool.get(key_type=key_type, bits=self.bits)
+        return keys.create_key(key_type=key_type, bits=self.bits)
 
     def create_csr(self):
         """
@@ -255,79 +408,16 @@ class Client(object):
         field uses base64url, and does not include headers, it is different from PEM.)
         """
         self.logger.debug("create_csr")
-        X509Req = OpenSSL.crypto.X509Req()
-        X509Req.get_subject().CN = self.domain_name
-
-        if self.domain_alt_names:
-            SAN = "DNS:{0}, ".format(self.domain_name).encode("utf8") + ", ".join(
-                "DNS:" + i for i in self.domain_alt_names
-            ).encode("utf8")
-        else:
-            SAN = "DNS:{0}".format(self.domain_name).encode("utf8")
-
-        X509Req.add_extensions(
-            [
-                OpenSSL.crypto.X509Extension(
-                    "subjectAltName".encode("utf8"), critical=False, value=SAN
-                )
-            ]
-        )
-        pk = OpenSSL.crypto.load_privatekey(
-            OpenSSL.crypto.FILETYPE_PEM, self.certificate_key.encode()
+        return self.csr_cache.get_or_create(
+            self.certificate_key, self.all_domain_names, digest=self.digest
         )
-        X509Req.set_pubkey(pk)
-        X509Req.set_version(2)
-        X509Req.sign(pk, self.digest)
-        return OpenSSL.crypto.dump_certificate_request(OpenSSL.crypto.FILETYPE_ASN1, X509Req)
 
     def acme_register(self):
         """
-        https://tools.ietf.org/html/draft-ietf-acme-acme#section-7.3
-        The server creates an account and stores the public key used to
-        verify the JWS (i.e., the "jwk" element of the JWS header) to
-        authenticate future requests from the account.
-        The server returns this account object in a 201 (Created) response, with the account URL
-        in a Location header field.
-        This account URL will be used in subsequest requests to ACME, as the "kid" value in the acme header.
-        If the server already has an account registered with the provided
-        account key, then it MUST return a response with a 200 (OK) status
-        code and provide the URL of that account in the Location header field.
-        If there is an existing account with the new key
-        provided, then the server SHOULD use status code 409 (Conflict) and
-        provide the URL of that account in the Location header field
-        """
-        self.logger.info("acme_register")
-        if self.PRIOR_REGISTERED:
-            payload = {"onlyReturnExisting": True}
-        elif self.contact_email:
-            payload = {
-                "termsOfServiceAgreed": True,
-                "contact": ["mailto:{0}".format(self.contact_email)],
-            }
-        else:
-            payload = {"termsOfServiceAgreed": True}
-
-        url = self.ACME_NEW_ACCOUNT_URL
-        acme_register_response = self.make_signed_acme_request(url=url, payload=payload)
-        self.logger.debug(
-            "acme_register_response. status_code={0}. response={1}".format(
-                acme_register_response.status_code, self.log_response(acme_register_response)
-            )
-        )
-
-        if acme_register_response.status_code not in [201, 200, 409]:
-            raise ValueError(
-                "Error while registering: status_code={status_code} response={response}".format(
-                    status_code=acme_register_response.status_code,
-                    response=self.log_response(acme_register_response),
-                )
-            )
-
-        kid = acme_register_response.headers["Location"]
-        setattr(self, "kid", kid)
-
-        self.logger.info("acme_register_success")
-        return acme_register_response
+        registers the client's account; see sewer.AcmeAccount.register.
+        An account that is already registered is not registered again.
+        """
+        return self.account.register()
 
     def apply_for_cert_issuance(self):
         """
@@ -348,13 +438,32 @@ class Client(object):
         in the ACME draft spec; https://tools.ietf.org/html/draft-ietf-acme-acme#section-7.4
         """
         self.logger.info("apply_for_cert_issuance")
+        payload = self.get_order_payload()
+        url = self.ACME_NEW_ORDER_URL
+        apply_for_cert_issuance_response = self.make_signed_acme_request(url=url, payload=payload)
+        if self.account.get_warm_account() is not None and self.account.is_unknown_account(
+            apply_for_cert_issuance_response
+        ):
+            # the account url(kid) from the state snapshot is stale; register and retry exactly once.
+            self.logger.info("apply_for_cert_issuance_unknown_account. registering again")
+            self.account.forget_registration()
+            self.acme_register()
+            apply_for_cert_issuance_response = self.make_signed_acme_request(
+                url=url, payload=payload
+            )
+        return self.parse_order_response(apply_for_cert_issuance_response)
+
+    def get_order_payload(self):
         identifiers = []
         for domain_name in self.all_domain_names:
             identifiers.append({"type": "dns", "value": domain_name})
+        return {"identifiers": identifiers}
 
-        payload = {"identifiers": identifiers}
-        url = self.ACME_NEW_ORDER_URL
-        apply_for_cert_issuance_response = self.make_signed_acme_request(url=url, payload=payload)
+    def parse_order_response(self, apply_for_cert_issuance_response):
+        """
+        returns the authorization urls and the finalize url of a new order, and remembers the
+        order url. raises ValueError if the order was not created.
+        """
         self.logger.debug(
             "apply_for_cert_issuance_response. status_code={0}. response={1}".format(
                 apply_for_cert_issuance_response.status_code,
@@ -370,6 +479,9 @@ class Client(object):
                 )
             )
 
+        # https://tools.ietf.org/html/draft-ietf-acme-acme#section-7.4
+        # the server returns the order url in the Location header; it is polled in check_order_status
+        self.order_url = apply_for_cert_issuance_response.headers.get("Location")
         apply_for_cert_issuance_response_json = apply_for_cert_issuance_response.json()
         finalize_url = apply_for_cert_issuance_response_json["finalize"]
         authorizations = apply_for_cert_issuance_response_json["authorizations"]
@@ -390,9 +502,17 @@ class Client(object):
         """
         self.logger.info("get_identifier_authorization")
         headers = {"User-Agent": self.User_Agent}
-        get_identifier_authorization_response = requests.get(
+        get_identifier_authorization_response = self.http_session.get(
             url, timeout=self.ACME_REQUEST_TIMEOUT, headers=headers
         )
+        self.nonce_pool.harvest(get_identifier_authorization_response)
+        return self.parse_identifier_authorization(url, get_identifier_authorization_response)
+
+    def parse_identifier_authorization(self, url, get_identifier_authorization_response):
+        """
+        returns the domain, status and dns-01 challenge of the authorization at url.
+        raises ValueError if the authorization could not be fetched.
+        """
         self.logger.debug(
             "get_identifier_authorization_response. status_code={0}. response={1}".format(
                 get_identifier_authorization_response.status_code,
@@ -420,6 +540,8 @@ class Client(object):
         identifier_auth = {
             "domain": domain,
             "url": url,
+            "status": res.get("status"),
+            "expires": res.get("expires"),
             "wildcard": wildcard,
             "dns_token": dns_token,
             "dns_challenge_url": dns_challenge_url,
@@ -432,20 +554,86 @@ class Client(object):
         return identifier_auth
 
     def get_keyauthorization(self, dns_token):
+        """
+        https://tools.ietf.org/html/draft-ietf-acme-acme#section-8.1
+        keyAuthorization = token || '.' || base64url(JWK_Thumbprint(accountKey))
+        This is computed locally; it does not need any network calls.
+        """
         self.logger.debug("get_keyauthorization")
-        acme_header_jwk_json = json.dumps(
-            self.get_acme_header("GET_THUMBPRINT")["jwk"], sort_keys=True, separators=(",", ":")
-        )
-        acme_thumbprint = self.calculate_safe_base64(
-            hashlib.sha256(acme_header_jwk_json.encode("utf8")).digest()
-        )
-        acme_keyauthorization = "{0}.{1}".format(dns_token, acme_thumbprint)
+        acme_keyauthorization = "{0}.{1}".format(dns_token, self.get_jwk_thumbprint())
         base64_of_acme_keyauthorization = self.calculate_safe_base64(
             hashlib.sha256(acme_keyauthorization.encode("utf8")).digest()
         )
 
         return acme_keyauthorization, base64_of_acme_keyauthorization
 
+    def create_poller(self):
+        """
+        returns the polling.Poller used to wait on authorizations and orders.
+        an ACME_AUTH_STATUS_WAIT_PERIOD of 0 means that polls are not waited on at all.
+        """
+        if self.ACME_AUTH_STATUS_WAIT_PERIOD <= 0:
+            return polling.Poller(
+                initial_interval=1,
+                max_interval=1,
+                timeout=self.ACME_POLL_TIMEOUT,
+                max_polls=self.ACME_AUTH_STATUS_MAX_CHECKS,
+                sleep=polling.no_sleep,
+                async_sleep=polling.async_no_sleep,
+            )
+        return polling.Poller(
+            initial_interval=min(1, self.ACME_AUTH_STATUS_WAIT_PERIOD),
+            max_interval=self.ACME_AUTH_STATUS_WAIT_PERIOD,
+            timeout=self.ACME_POLL_TIMEOUT,
+            max_polls=self.ACME_AUTH_STATUS_MAX_CHECKS,
+        )
+
+    def get_acme_resource(self, url):
+        headers = {"User-Agent": self.User_Agent}
+        response = self.http_session.get(url, timeout=self.ACME_REQUEST_TIMEOUT, headers=headers)
+        self.nonce_pool.harvest(response)
+        return response
+
+    def poll_acme_resource(self, url, final_statuses, description):
+        """
+        polls url until the status of the resource is `valid` and returns the last response.
+        raises ValueError if the status becomes one of final_statuses, eg `invalid`,
+        and TimeoutError if it does not become `valid` within ACME_POLL_TIMEOUT.
+        """
+
+        return self.create_poller().poll(
+            lambda: self.get_acme_resource(url),
+            lambda response: self.is_acme_resource_valid(response, final_statuses, description),
+            description=description,
+        )
+
+    def is_acme_resource_valid(self, response, final_statuses, description):
+        """
+        returns True if the status of the acme resource in response is `valid`.
+        raises ValueError if the request failed, or if the status is one of final_statuses.
+        """
+        self.logger.debug(
+            "{0}_response. status_code={1}. response={2}".format(
+                description, response.status_code, self.log_response(response)
+            )
+        )
+        if response.status_code not in [200, 201]:
+            raise ValueError(
+                "Error during {description}: status_code={status_code} response={response}".format(
+                    description=description,
+                    status_code=response.status_code,
+                    response=self.log_response(response),
+                )
+            )
+        status = response.json()["status"]
+        if status in final_statuses:
+            raise ValueError(
+                "Error during {description}: status={status} response={response}".format(
+                    description=description, status=status, response=self.log_response(response)
+                )
+            )
+        return status == "valid"
+
     def check_authorization_status(self, authorization_url):
         """
         https://tools.ietf.org/html/draft-ietf-acme-acme#section-7.5.1
@@ -460,41 +648,32 @@ class Client(object):
         HTTP/DNS provisioning] the query after some time.
         The server MUST provide information about its retry state to the
         client via the "errors" field in the challenge and the Retry-After
+
+        Polls the authorization until it is `valid`; raises ValueError if the authorization fails.
         """
         self.logger.info("check_authorization_status")
-        time.sleep(self.ACME_AUTH_STATUS_WAIT_PERIOD)
-        number_of_checks = 0
-        while True:
-            headers = {"User-Agent": self.User_Agent}
-            check_authorization_status_response = requests.get(
-                authorization_url, timeout=self.ACME_REQUEST_TIMEOUT, headers=headers
-            )
-            authorization_status = check_authorization_status_response.json()["status"]
-            number_of_checks = number_of_checks + 1
-            self.logger.debug(
-                "check_authorization_status_response. status_code={0}. response={1}".format(
-                    check_authorization_status_response.status_code,
-                    self.log_response(check_authorization_status_response),
-                )
-            )
-            if number_of_checks == self.ACME_AUTH_STATUS_MAX_CHECKS:
-                raise StopIteration(
-                    "Checks done={0}. Max checks allowed={1}. Interval between checks={2}seconds.".format(
-                        number_of_checks,
-                        self.ACME_AUTH_STATUS_MAX_CHECKS,
-                        self.ACME_AUTH_STATUS_WAIT_PERIOD,
-                    )
-                )
-
-            if authorization_status in ["pending", "valid"]:
-                break
-            else:
-                # for any other status, sleep then retry
-                time.sleep(self.ACME_AUTH_STATUS_WAIT_PERIOD)
-
+        check_authorization_status_response = self.poll_acme_resource(
+            authorization_url,
+            final_statuses=["invalid", "deactivated", "expired", "revoked"],
+            description="check_authorization_status",
+        )
         self.logger.info("check_authorization_status_success")
         return check_authorization_status_response
 
+    def check_order_status(self, order_url):
+        """
+        https://tools.ietf.org/html/draft-ietf-acme-acme#section-7.4
+        After the finalize request, the order is `processing` until the certificate is issued.
+        The client polls the order until it is `valid`; the certificate url is then in the
+        "certificate" field of the order.
+        """
+        self.logger.info("check_order_status")
+        check_order_status_response = self.poll_acme_resource(
+            order_url, final_statuses=["invalid"], description="check_order_status"
+        )
+        self.logger.info("check_order_status_success")
+        return check_order_status_response
+
     def respond_to_challenge(self, acme_keyauthorization, dns_challenge_url):
         """
         https://tools.ietf.org/html/draft-ietf-acme-acme#section-7.5.1
@@ -539,6 +718,18 @@ class Client(object):
         self.logger.info("send_csr")
         payload = {"csr": self.calculate_safe_base64(self.csr)}
         send_csr_response = self.make_signed_acme_request(url=finalize_url, payload=payload)
+        certificate_url = self.parse_send_csr_response(send_csr_response)
+        if certificate_url is None:
+            certificate_url = self.check_order_status(self.order_url).json()["certificate"]
+
+        self.logger.info("send_csr_success")
+        return certificate_url
+
+    def parse_send_csr_response(self, send_csr_response):
+        """
+        returns the certificate url if the finalized order is already `valid`, and None if the
+        order(self.order_url) has to be polled first. raises ValueError if the csr was rejected.
+        """
         self.logger.debug(
             "send_csr_response. status_code={0}. response={1}".format(
                 send_csr_response.status_code, self.log_response(send_csr_response)
@@ -553,10 +744,16 @@ class Client(object):
                 )
             )
         send_csr_response_json = send_csr_response.json()
-        certificate_url = send_csr_response_json["certificate"]
-
-        self.logger.info("send_csr_success")
-        return certificate_url
+        certificate_url = send_csr_response_json.get("certificate")
+        if send_csr_response_json.get("status") == "valid" and certificate_url:
+            return certificate_url
+        if not self.order_url:
+            raise ValueError(
+                "Error sending csr: the order is not valid and has no url to poll. response={0}".format(
+                    self.log_response(send_csr_response)
+                )
+            )
+        return None
 
     def download_certificate(self, certificate_url):
         self.logger.info("download_certificate")
@@ -564,6 +761,12 @@ class Client(object):
         download_certificate_response = self.make_signed_acme_request(
             certificate_url, payload="DOWNLOAD_Z_CERTIFICATE"
         )
+        return self.parse_certificate(download_certificate_response)
+
+    def parse_certificate(self, download_certificate_response):
+        """
+        returns the PEM certificate chain in download_certificate_response.
+        """
         self.logger.debug(
             "download_certificate_response. status_code={0}. response={1}".format(
                 download_certificate_response.status_code,
@@ -584,153 +787,207 @@ class Client(object):
         self.logger.info("download_certificate_success")
         return pem_certificate
 
+    def get_signer(self):
+        return self.account.get_signer()
+
     def sign_message(self, message):
-        self.logger.debug("sign_message")
-        pk = OpenSSL.crypto.load_privatekey(OpenSSL.crypto.FILETYPE_PEM, self.account_key.encode())
-        return OpenSSL.crypto.sign(pk, message.encode("utf8"), self.digest)
+        return self.account.sign_message(message)
 
     def get_nonce(self):
+        return self.account.get_nonce()
+
+    @staticmethod
+    def calculate_safe_base64(un_encoded_data):
         """
-        https://tools.ietf.org/html/draft-ietf-acme-acme#section-6.4
-        Each request to an ACME server must include a fresh unused nonce
-        in order to protect against replay attacks.
+        takes in a string or bytes
+        returns a string
         """
-        self.logger.debug("get_nonce")
-        headers = {"User-Agent": self.User_Agent}
-        response = requests.get(
-            self.ACME_GET_NONCE_URL, timeout=self.ACME_REQUEST_TIMEOUT, headers=headers
-        )
-        nonce = response.headers["Replay-Nonce"]
-        return nonce
+        return jws.calculate_safe_base64(un_encoded_data)
 
     @staticmethod
-    def stringfy_items(payload):
+    def calculate_jwk_thumbprint(jwk):
         """
-        method that takes a dictionary and then converts any keys or values
-        in that are of type bytes into unicode strings.
-        This is necessary esp if you want to then turn that dict into a json string.
+        https://tools.ietf.org/html/rfc7638#section-3
         """
-        if isinstance(payload, str):
-            return payload
+        return jws.calculate_jwk_thumbprint(jwk)
 
-        for k, v in payload.items():
-            if isinstance(k, bytes):
-                k = k.decode("utf-8")
-            if isinstance(v, bytes):
-                v = v.decode("utf-8")
-            payload[k] = v
-        return payload
+    def get_jwk(self):
+        return self.account.get_jwk()
 
-    @staticmethod
-    def calculate_safe_base64(un_encoded_data):
+    def get_jwk_thumbprint(self):
+        return self.account.get_jwk_thumbprint()
+
+    def get_account_id(self):
+        return self.account.get_account_id()
+
+    def get_acme_header(self, url):
+        return self.account.get_acme_header(url)
+
+    def make_signed_acme_request(self, url, payload):
+        return self.account.make_signed_acme_request(url, payload)
+
+    def post_signed_acme_request(self, url, payload):
+        return self.account.post_signed_acme_request(url, payload)
+
+    def run_concurrently(self, function, items):
         """
-        takes in a string or bytes
-        returns a string
+        calls function(item) for every item on a thread pool of at most self.max_workers threads
+        and waits for all of the calls to finish, whether they succeed or not.
+        returns the futures of the calls, in the same order as items.
+        """
+        items = list(items)
+        if not items:
+            return []
+        max_workers = min(self.max_workers, len(items))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(function, item) for item in items]
+        return futures
+
+    def wait_for_dns_propagation(self, dns_names):
         """
-        if isinstance(un_encoded_data, str):
-            un_encoded_data = un_encoded_data.encode("utf8")
-        r = base64.urlsafe_b64encode(un_encoded_data).rstrip(b"=")
-        return r.decode("utf8")
+        called after the dns records have been created and before the challenges are responded to.
+        waits until propagation_checker sees the records on the authoritative nameservers or,
+        without a propagation_checker, ACME_AUTH_STATUS_WAIT_PERIOD seconds once per order.
 
-    def get_acme_header(self, url):
+        :param dns_names: (required) [list]
+            the records that were created; dicts with dns_name and domain_dns_value.
         """
-        https://tools.ietf.org/html/draft-ietf-acme-acme#section-6.2
-        The JWS Protected Header MUST include the following fields:
-        - "alg" (Algorithm)
-        - "jwk" (JSON Web Key, only for requests to new-account and revoke-cert resources)
-        - "kid" (Key ID, for all other requests). gotten from self.ACME_NEW_ACCOUNT_URL
-        - "nonce". gotten from self.ACME_GET_NONCE_URL
-        - "url"
-        """
-        self.logger.debug("get_acme_header")
-        header = {"alg": "RS256", "nonce": self.get_nonce(), "url": url}
-        if url in [self.ACME_NEW_ACCOUNT_URL, self.ACME_REVOKE_CERT_URL, "GET_THUMBPRINT"]:
-            private_key = cryptography.hazmat.primitives.serialization.load_pem_private_key(
-                self.account_key.encode(),
-                password=None,
-                backend=cryptography.hazmat.backends.default_backend(),
-            )
-            public_key_public_numbers = private_key.public_key().public_numbers()
-            # private key public exponent in hex format
-            exponent = "{0:x}".format(public_key_public_numbers.e)
-            exponent = "0{0}".format(exponent) if len(exponent) % 2 else exponent
-            # private key modulus in hex format
-            modulus = "{0:x}".format(public_key_public_numbers.n)
-            jwk = {
-                "kty": "RSA",
-                "e": self.calculate_safe_base64(binascii.unhexlify(exponent)),
-                "n": self.calculate_safe_base64(binascii.unhexlify(modulus)),
-            }
-            header["jwk"] = jwk
+        self.logger.info("wait_for_dns_propagation. dns_names={0}".format(len(dns_names)))
+        if self.propagation_checker is not None:
+            self.propagation_checker.wait(dns_names)
         else:
-            header["kid"] = self.kid
-        return header
+            time.sleep(self.ACME_AUTH_STATUS_WAIT_PERIOD)
 
-    def make_signed_acme_request(self, url, payload):
-        self.logger.debug("make_signed_acme_request")
-        headers = {"User-Agent": self.User_Agent}
-        payload = self.stringfy_items(payload)
+    def remember_authorization(self, url, authorization):
+        """
+        records a valid authorization in the authorization cache.
 
-        if payload in ["GET_Z_CHALLENGE", "DOWNLOAD_Z_CERTIFICATE"]:
-            response = requests.get(url, timeout=self.ACME_REQUEST_TIMEOUT, headers=headers)
-        else:
-            payload64 = self.calculate_safe_base64(json.dumps(payload))
-            protected = self.get_acme_header(url)
-            protected64 = self.calculate_safe_base64(json.dumps(protected))
-            signature = self.sign_message(message="{0}.{1}".format(protected64, payload64))  # bytes
-            signature64 = self.calculate_safe_base64(signature)  # str
-            data = json.dumps(
-                {"protected": protected64, "payload": payload64, "signature": signature64}
+        :param url:           (required) [string]
+            the url of the authorization.
+        :param authorization: (required) [dict]
+            the authorization object; needs identifier, wildcard and expires.
+        """
+        identifier = authorization["identifier"]["value"]
+        if authorization.get("wildcard"):
+            identifier = "*." + identifier
+        self.authorization_cache.add(
+            self.get_account_id(), identifier, url, authorization.get("expires")
+        )
+
+    def get_pending_authorizations(self, authorizations):
+        """
+        returns the authorization urls that are not in the authorization cache.
+        authorizations that this account validated recently are still valid; they are neither
+        fetched nor validated again.
+        """
+        account_id = self.get_account_id()
+        pending_authorizations = []
+        for url in authorizations:
+            identifier = self.authorization_cache.get(account_id, url)
+            if identifier is None:
+                pending_authorizations.append(url)
+            else:
+                self.logger.info("cached_authorization. identifier={0}".format(identifier))
+        return pending_authorizations
+
+    def get_challenges(self, identifier_auths):
+        """
+        returns the dns records to create and the challenges to respond to for identifier_auths.
+        authorizations that are already valid need neither; they are added to the authorization cache.
+        """
+        account_id = self.get_account_id()
+        responders = []
+        dns_names_to_create = []
+        for identifier_auth in identifier_auths:
+            if identifier_auth.get("status") == "valid":
+                # https://tools.ietf.org/html/draft-ietf-acme-acme#section-7.1.4
+                # the server reused an authorization that is already valid; no challenge is needed.
+                self.logger.info(
+                    "valid_authorization. domain={0}".format(identifier_auth["domain"])
+                )
+                self.authorization_cache.add(
+                    account_id,
+                    identifier_auth["domain"],
+                    identifier_auth["url"],
+                    identifier_auth.get("expires"),
+                )
+                continue
+            acme_keyauthorization, domain_dns_value = self.get_keyauthorization(
+                identifier_auth["dns_token"]
             )
-            headers.update({"Content-Type": "application/jose+json"})
-            response = requests.post(
-                url, data=data.encode("utf8"), timeout=self.ACME_REQUEST_TIMEOUT, headers=headers
+            dns_names_to_create.append(
+                {"dns_name": identifier_auth["domain"], "domain_dns_value": domain_dns_value}
             )
-        return response
+            responders.append(
+                {
+                    "authorization_url": identifier_auth["url"],
+                    "acme_keyauthorization": acme_keyauthorization,
+                    "dns_challenge_url": identifier_auth["dns_challenge_url"],
+                }
+            )
+        return dns_names_to_create, responders
+
+    @staticmethod
+    def get_dns_record_pairs(dns_names):
+        """
+        returns the (domain_name, domain_dns_value) pairs that sewer.BaseDns.create_dns_records takes.
+        """
+        return [(i["dns_name"], i["domain_dns_value"]) for i in dns_names]
 
     def get_certificate(self):
         self.logger.debug("get_certificate")
-        domain_dns_value = "placeholder"
         dns_names_to_delete = []
+        authorizations = []
         try:
+            self.prepare()
             self.acme_register()
             authorizations, finalize_url = self.apply_for_cert_issuance()
-            responders = []
-            for url in authorizations:
-                identifier_auth = self.get_identifier_authorization(url)
-                authorization_url = identifier_auth["url"]
-                dns_name = identifier_auth["domain"]
-                dns_token = identifier_auth["dns_token"]
-                dns_challenge_url = identifier_auth["dns_challenge_url"]
-
-                acme_keyauthorization, domain_dns_value = self.get_keyauthorization(dns_token)
-                self.dns_class.create_dns_record(dns_name, domain_dns_value)
-                dns_names_to_delete.append(
-                    {"dns_name": dns_name, "domain_dns_value": domain_dns_value}
+
+            pending_authorizations = self.get_pending_authorizations(authorizations)
+
+            # fetch all the authorizations at the same time.
+            identifier_auths = [
+                i.result()
+                for i in self.run_concurrently(
+                    self.get_identifier_authorization, pending_authorizations
                 )
-                responders.append(
-                    {
-                        "authorization_url": authorization_url,
-                        "acme_keyauthorization": acme_keyauthorization,
-                        "dns_challenge_url": dns_challenge_url,
-                    }
+            ]
+            dns_names_to_create, responders = self.get_challenges(identifier_auths)
+
+            # all the dns records of the order are created with one call, so that the dns_class
+            # can batch them. it either creates all of them or none, see sewer.BaseDns.create_dns_records
+            if dns_names_to_create:
+                self.dns_class.create_dns_records(
+                    self.get_dns_record_pairs(dns_names_to_create), max_workers=self.max_workers
                 )
+                dns_names_to_delete = dns_names_to_create
+                self.wait_for_dns_propagation(dns_names_to_create)
 
             # for a case where you want certificates for *.exmaple.com and example.com
             # you have to create both dns records AND then respond to the challenge.
             # see issues/83
             for i in responders:
-                self.check_authorization_status(i["authorization_url"])
                 self.respond_to_challenge(i["acme_keyauthorization"], i["dns_challenge_url"])
+            # the certificate can only be issued once all the authorizations are valid.
+            futures = self.run_concurrently(
+                self.check_authorization_status, [i["authorization_url"] for i in responders]
+            )
+            for responder, future in zip(responders, futures):
+                self.remember_authorization(responder["authorization_url"], future.result().json())
 
             certificate_url = self.send_csr(finalize_url)
             certificate = self.download_certificate(certificate_url)
         except Exception as e:
             self.logger.error("Error: Unable to issue certificate. error={0}".format(str(e)))
+            # the server may no longer consider a cached authorization valid, eg if it was deactivated.
+            for url in authorizations:
+                self.authorization_cache.remove(self.get_account_id(), url)
             raise e
         finally:
-            for i in dns_names_to_delete:
-                self.dns_class.delete_dns_record(i["dns_name"], i["domain_dns_value"])
+            if dns_names_to_delete:
+                self.dns_class.delete_dns_records(
+                    self.get_dns_record_pairs(dns_names_to_delete), max_workers=self.max_workers
+                )
 
         return certificate
 
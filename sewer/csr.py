@@ -0,0 +1,160 @@
+import base64
+import hashlib
+import logging
+import threading
+import collections
+
+from cryptography import x509
+from cryptography.x509.oid import NameOID
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes, serialization
+
+from . import state
+
+
+def get_key_fingerprint(certificate_key):
+    """
+    returns the sha256 hex digest of the PEM encoded certificate key.
+    it is computed without parsing the key, so that a cache hit does not load the key at all.
+    """
+    return hashlib.sha256(certificate_key.strip().encode("utf8")).hexdigest()
+
+
+def get_hash_algorithm(digest):
+    """
+    returns the cryptography hash algorithm for an OpenSSL style digest name, eg sha256.
+    """
+    algorithm = getattr(hashes, str(digest).upper(), None)
+    if not isinstance(algorithm, type) or not issubclass(algorithm, hashes.HashAlgorithm):
+        raise ValueError("digest should be a hash algorithm, eg sha256. not {0}".format(digest))
+    return algorithm()
+
+
+def unique_domain_names(domain_names):
+    """
+    returns domain_names without duplicates, in their original order.
+    """
+    return list(collections.OrderedDict.fromkeys(domain_names))
+
+
+def create_csr(certificate_key, domain_names, digest="sha256"):
+    """
+    https://tools.ietf.org/html/draft-ietf-acme-acme#section-7.4
+    creates a certificate signing request for domain_names, signed with certificate_key.
+    The first domain name is the common name, and all of them are in the subjectAltName extension.
+
+    :param certificate_key: (required) [string]
+        the PEM encoded private key of the certificate.
+    :param domain_names:    (required) [list]
+        the names of the certificate. wildcards are allowed.
+    :param digest:          (optional) [string]
+        the digest used to sign the csr.
+
+    returns the csr DER encoded, as bytes.
+    """
+    domain_names = unique_domain_names(domain_names)
+    if not domain_names:
+        raise ValueError("domain_names should have at least one domain name")
+    private_key = serialization.load_pem_private_key(
+        certificate_key.encode(), password=None, backend=default_backend()
+    )
+    builder = (
+        x509.CertificateSigningRequestBuilder()
+        .subject_name(x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, domain_names[0])]))
+        .add_extension(
+            x509.SubjectAlternativeName([x509.DNSName(i) for i in domain_names]), critical=False
+        )
+    )
+    csr = builder.sign(private_key, get_hash_algorithm(digest), default_backend())
+    return csr.public_bytes(serialization.Encoding.DER)
+
+
+class CsrCache(object):
+    """
+    Remembers the certificate signing requests that have been created, so that a renewal with the same
+    certificate key and the same names does not load the key and sign a new csr.
+
+    Entries are keyed by the fingerprint of the certificate key, the common name, the sorted set of
+    names and the digest. The least recently used entries are dropped once there are more than
+    max_entries. When path is given, the cache is stored in that json file so that it outlives
+    the process; it holds no secrets, only csrs and key fingerprints. It is safe to use from multiple threads.
+
+    usage:
+        cache = sewer.CsrCache(path='/var/lib/sewer/csrs.json')
+        client = sewer.Client(domain_name='example.com',
+                              dns_class=dns_class,
+                              certificate_key=certificate_key,
+                              csr_cache=cache)
+    """
+
+    def __init__(self, path=None, max_entries=128):
+        """
+        :param path:        (optional) [string]
+            the json file that the cache is loaded from and saved to. None keeps it in memory only.
+        :param max_entries: (optional) [integer]
+            the max number of csrs that are kept.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries should be at least 1. not {0}".format(max_entries))
+        self.path = path
+        self.max_entries = max_entries
+        self.logger = logging.getLogger()
+        self._lock = threading.Lock()
+        self._entries = self.load()
+
+    @staticmethod
+    def entry_key(certificate_key, domain_names, digest):
+        domain_names = unique_domain_names(domain_names)
+        return " ".join(
+            [get_key_fingerprint(certificate_key), str(digest).lower(), domain_names[0]]
+            + sorted(domain_names)
+        )
+
+    def load(self):
+        return state.load_json_file(
+            self.path, "csr cache", object_pairs_hook=collections.OrderedDict
+        )
+
+    def save(self):
+        """
+        writes the cache to path. should be called with self._lock held.
+        """
+        if self.path is None:
+            return
+        state.save_json_file(self.path, self._entries, prefix=".sewer-csr-", sort_keys=False)
+
+    def get(self, certificate_key, domain_names, digest="sha256"):
+        """
+        returns the DER encoded csr for certificate_key, domain_names and digest, or None.
+        """
+        key = self.entry_key(certificate_key, domain_names, digest)
+        with self._lock:
+            csr = self._entries.get(key)
+            if csr is None:
+                return None
+            self._entries.move_to_end(key)
+        return base64.b64decode(csr)
+
+    def add(self, certificate_key, domain_names, digest, csr):
+        key = self.entry_key(certificate_key, domain_names, digest)
+        with self._lock:
+            self._entries[key] = base64.b64encode(csr).decode("utf8")
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self.save()
+
+    def get_or_create(self, certificate_key, domain_names, digest="sha256"):
+        """
+        returns the cached csr for certificate_key, domain_names and digest; it is created and
+        cached if there is none. see create_csr.
+        """
+        csr = self.get(certificate_key, domain_names, digest)
+        if csr is None:
+            csr = create_csr(certificate_key, domain_names, digest)
+            self.add(certificate_key, domain_names, digest, csr)
+        return csr
+
+
+# the cache of the clients that are not given one; csrs are reused within the process.
+DEFAULT_CSR_CACHE = CsrCache()
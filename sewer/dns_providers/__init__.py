@@ -4,5 +4,5 @@ from .cloudflare import CloudFlareDns  # noqa: F401
 from .acmedns import AcmeDnsDns  # noqa: F401
 from .aliyundns import AliyunDns  # noqa: F401
 from .hurricane import HurricaneDns  # noqa: F401
-from .rackspace import RackspaceDns  # noqa: F401
+from .rackspace import RackspaceDns, RackspaceTokenCache  # noqa: F401
 from .dnspod import DNSPodDns
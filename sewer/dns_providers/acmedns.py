@@ -5,7 +5,6 @@ try:
     from dns.resolver import Resolver
 except ImportError:
     acmedns_dependencies = False
-import requests
 
 from . import common
 
@@ -16,7 +15,14 @@ class AcmeDnsDns(common.BaseDns):
 
     dns_provider_name = "acmedns"
 
-    def __init__(self, ACME_DNS_API_USER, ACME_DNS_API_KEY, ACME_DNS_API_BASE_URL):
+    def __init__(
+        self,
+        ACME_DNS_API_USER,
+        ACME_DNS_API_KEY,
+        ACME_DNS_API_BASE_URL,
+        http_session=None,
+        async_http_session=None,
+    ):
 
         if not acmedns_dependencies:
             raise ImportError(
@@ -31,24 +37,52 @@ class AcmeDnsDns(common.BaseDns):
             self.ACME_DNS_API_BASE_URL = ACME_DNS_API_BASE_URL + "/"
         else:
             self.ACME_DNS_API_BASE_URL = ACME_DNS_API_BASE_URL
-        super(AcmeDnsDns, self).__init__()
-
-    def create_dns_record(self, domain_name, domain_dns_value):
-        self.logger.info("create_dns_record")
-        # if we have been given a wildcard name, strip wildcard
-        domain_name = domain_name.lstrip("*.")
+        super(AcmeDnsDns, self).__init__(
+            http_session=http_session, async_http_session=async_http_session
+        )
 
+    def find_subdomain(self, domain_name):
+        """
+        returns the acme-dns subdomain that _acme-challenge.domain_name is a CNAME of.
+        """
         resolver = Resolver(configure=False)
         resolver.nameservers = ["8.8.8.8"]
         answer = resolver.query("_acme-challenge.{0}.".format(domain_name), "TXT")
         subdomain, _ = str(answer.canonical_name).split(".", 1)
+        return subdomain
+
+    def get_headers(self):
+        return {"X-Api-User": self.ACME_DNS_API_USER, "X-Api-Key": self.ACME_DNS_API_KEY}
+
+    def create_dns_record(self, domain_name, domain_dns_value):
+        self.logger.info("create_dns_record")
+        # if we have been given a wildcard name, strip wildcard
+        domain_name = common.strip_wildcard(domain_name)
+        subdomain = self.find_subdomain(domain_name)
 
         url = urllib.parse.urljoin(self.ACME_DNS_API_BASE_URL, "update")
-        headers = {"X-Api-User": self.ACME_DNS_API_USER, "X-Api-Key": self.ACME_DNS_API_KEY}
         body = {"subdomain": subdomain, "txt": domain_dns_value}
-        update_acmedns_dns_record_response = requests.post(
-            url, headers=headers, json=body, timeout=self.HTTP_TIMEOUT
+        update_acmedns_dns_record_response = self.http_session.post(
+            url, headers=self.get_headers(), json=body, timeout=self.HTTP_TIMEOUT
         )
+        self.check_create_dns_record_response(update_acmedns_dns_record_response)
+        self.logger.info("create_dns_record_end")
+
+    async def async_create_dns_record(self, domain_name, domain_dns_value):
+        self.logger.info("create_dns_record")
+        domain_name = common.strip_wildcard(domain_name)
+        # dnspython's resolver blocks, so that the lookup is run on the executor.
+        subdomain = await self.run_in_executor(self.find_subdomain, domain_name)
+
+        url = urllib.parse.urljoin(self.ACME_DNS_API_BASE_URL, "update")
+        body = {"subdomain": subdomain, "txt": domain_dns_value}
+        update_acmedns_dns_record_response = await self.async_request(
+            "POST", url, headers=self.get_headers(), json=body, timeout=self.HTTP_TIMEOUT
+        )
+        self.check_create_dns_record_response(update_acmedns_dns_record_response)
+        self.logger.info("create_dns_record_end")
+
+    def check_create_dns_record_response(self, update_acmedns_dns_record_response):
         self.logger.debug(
             "update_acmedns_dns_record_response. status_code={0}. response={1}".format(
                 update_acmedns_dns_record_response.status_code,
@@ -64,9 +98,11 @@ class AcmeDnsDns(common.BaseDns):
                     response=self.log_response(update_acmedns_dns_record_response),
                 )
             )
-        self.logger.info("create_dns_record_end")
 
     def delete_dns_record(self, domain_name, domain_dns_value):
         self.logger.info("delete_dns_record")
         # acme-dns doesn't support this
         self.logger.info("delete_dns_record_success")
+
+    async def async_delete_dns_record(self, domain_name, domain_dns_value):
+        self.delete_dns_record(domain_name, domain_dns_value)
@@ -1,4 +1,6 @@
 import json
+import threading
+import collections
 
 try:
     aliyun_dependencies = True
@@ -15,20 +17,23 @@ from . import common
 class _ResponseForAliyun(object):
     """
     wrapper aliyun resp to the format sewer wanted.
+    content is the body that has already been decoded; it is not encoded and decoded again.
     """
 
     def __init__(self, status_code=200, content=None, headers=None):
         self.status_code = status_code
         self.headers = headers or {}
         self.content = content or {}
-        self.content = json.dumps(content)
         super(_ResponseForAliyun, self).__init__()
 
     def json(self):
-        return json.loads(self.content)
+        return self.content
 
 
 class AliyunDns(common.BaseDns):
+    # the max page size of DescribeDomainRecords.
+    PAGE_SIZE = 500
+
     def __init__(self, key, secret, endpoint="cn-beijing", debug=False):
         """
         aliyun dns client
@@ -46,7 +51,28 @@ class AliyunDns(common.BaseDns):
         self._secret = secret
         self._endpoint = endpoint
         self._debug = debug
-        self.clt = client.AcsClient(self._key, self._secret, self._endpoint, debug=self._debug)
+        # the AcsClient of every thread; see clt
+        self._local = threading.local()
+        # (domain_name, domain_dns_value) to the RecordId of the records that were created,
+        # so that they are deleted without querying them.
+        self._record_ids = {}
+
+    @property
+    def clt(self):
+        """
+        the AcsClient of the calling thread. the records are created and deleted on up to
+        max_workers threads, and the sdk client is not documented as safe to share between them.
+        """
+        clt = getattr(self._local, "clt", None)
+        if clt is None:
+            clt = self._local.clt = client.AcsClient(
+                self._key, self._secret, self._endpoint, debug=self._debug
+            )
+        return clt
+
+    @clt.setter
+    def clt(self, clt):
+        self._local.clt = clt
 
     def _send_reqeust(self, request):
         """
@@ -61,8 +87,7 @@ class AliyunDns(common.BaseDns):
                 self.logger.warning("aliyundns resp error: %s", result)
         except Exception as exc:
             self.logger.warning("aliyundns failed to send request: %s, %s", str(exc), request)
-            status, headers, result = 502, {}, b'{"Success": false}'
-            result = json.loads(result)
+            status, headers, result = 502, {}, {"Success": False}
 
         if self._debug:
             self.logger.info("aliyundns request name: %s", request.__class__.__name__)
@@ -125,6 +150,26 @@ class AliyunDns(common.BaseDns):
         body = resp.json()
         return body
 
+    def query_all_recored_items(self, host, zone=None, tipe=None, psize=None):
+        """
+        query all the recored items, a page at a time.
+        :param str host: like example.com
+        :param str zone: like menduo.example.com
+        :param str tipe: TXT, CNAME, IP or other
+        :param int psize: the page size, PAGE_SIZE by default.
+        :return list: the 'Record' items of all the pages. see query_recored_items
+        """
+        psize = psize or self.PAGE_SIZE
+        recored_list = []
+        page = 1
+        while True:
+            recoreds = self.query_recored_items(host, zone, tipe=tipe, page=page, psize=psize)
+            page_recored_list = recoreds.get("DomainRecords", {}).get("Record", [])
+            recored_list.extend(page_recored_list)
+            if not page_recored_list or len(recored_list) >= recoreds.get("TotalCount", 0):
+                return recored_list
+            page += 1
+
     def query_recored_id(self, root, zone, tipe="TXT"):
         """
         find recored
@@ -134,8 +179,7 @@ class AliyunDns(common.BaseDns):
         :return str:
         """
         record_id = None
-        recoreds = self.query_recored_items(root, zone, tipe=tipe)
-        recored_list = recoreds.get("DomainRecords", {}).get("Record", [])
+        recored_list = self.query_all_recored_items(root, zone, tipe=tipe)
         recored_item_list = [i for i in recored_list if i["RR"] == zone]
         if len(recored_item_list):
             record_id = recored_item_list[0]["RecordId"]
@@ -149,7 +193,7 @@ class AliyunDns(common.BaseDns):
         :return tuple: root, zone, acme_txt
         """
         # if we have been given a wildcard name, strip wildcard
-        domain_name = domain_name.lstrip("*.")
+        domain_name = common.strip_wildcard(domain_name)
         if domain_name.count(".") > 1:
             zone, middle, last = str(domain_name).rsplit(".", 2)
             root = ".".join([middle, last])
@@ -177,6 +221,9 @@ class AliyunDns(common.BaseDns):
         request.set_Type("TXT")
         request.set_Value(domain_dns_value)
         resp = self._send_reqeust(request)
+        record_id = resp.json().get("RecordId")
+        if record_id:
+            self._record_ids[(common.strip_wildcard(domain_name), domain_dns_value)] = record_id
 
         self.logger.info("create_dns_record end: %s", (domain_name, domain_dns_value, resp.json()))
 
@@ -185,26 +232,112 @@ class AliyunDns(common.BaseDns):
     def delete_dns_record(self, domain_name, domain_dns_value):
         """
         delete a txt record we created just now.
+        the record is deleted by the RecordId that creating it returned; if it was not created by
+        this instance, the records with its name and value are looked up and deleted.
         :param str domain_name: the value sewer client passed in, like *.menduo.example.com
-        :param str domain_dns_value: the value sewer client passed in. we do not use this.
+        :param str domain_dns_value: the value sewer client passed in.
         :return _ResponseForAliyun:
         :return:
         """
         self.logger.info("delete_dns_record start: %s", (domain_name, domain_dns_value))
 
-        root, _, acme_txt = self.extract_zone(domain_name)
-
-        record_id = self.query_recored_id(root, acme_txt)
-        if not record_id:
-            msg = "failed to find record_id of domain: %s, value: %s", domain_name, domain_dns_value
-            self.logger.warning(msg)
+        record_id = self._record_ids.pop(
+            (common.strip_wildcard(domain_name), domain_dns_value), None
+        )
+        if record_id:
+            record_ids = [record_id]
+        else:
+            root, _, acme_txt = self.extract_zone(domain_name)
+            record_ids = [
+                i["RecordId"]
+                for i in self.query_all_recored_items(root, acme_txt, tipe="TXT")
+                if i["RR"] == acme_txt and i["Value"] == domain_dns_value
+            ]
+        if not record_ids:
+            self.logger.warning(
+                "failed to find record_id of domain: %s, value: %s", domain_name, domain_dns_value
+            )
             return
 
+        for record_id in record_ids:
+            resp = self.delete_dns_record_id(record_id)
+
+        self.logger.info("delete_dns_record end: %s", (domain_name, domain_dns_value, resp.json()))
+        return resp
+
+    def delete_dns_record_id(self, record_id):
+        """
+        delete the record record_id.
+        :param str record_id: the RecordId of the record
+        :return _ResponseForAliyun:
+        """
         self.logger.info("start to delete dns record, id: %s", record_id)
 
         request = DeleteDomainRecordRequest.DeleteDomainRecordRequest()
         request.set_RecordId(record_id)
         resp = self._send_reqeust(request)
-
-        self.logger.info("delete_dns_record end: %s", (domain_name, domain_dns_value, resp.json()))
+        if resp.status_code != 200 or resp.json().get("Success") is False:
+            self.logger.warning(
+                "failed to delete dns record, id: %s, resp: %s", record_id, resp.json()
+            )
         return resp
+
+    def get_txt_record_index(self, root):
+        """
+        list all the TXT records of the zone root, a page at a time.
+        :param str root: root host, like example.com
+        :return dict: (RR, Value) to the RecordIds of the records with that name and value
+        """
+        index = collections.defaultdict(list)
+        for i in self.query_all_recored_items(root, tipe="TXT"):
+            index[(i["RR"], i["Value"])].append(i["RecordId"])
+        return index
+
+    def find_dns_record_ids(self, dns_names):
+        """
+        find the records of dns_names in the TXT index of their zones; every zone is listed once.
+        :param list dns_names: (domain_name, domain_dns_value) pairs
+        :return list: the RecordIds of the records that were found
+        """
+        dns_zones = collections.OrderedDict()
+        for domain_name, domain_dns_value in dns_names:
+            root, _, acme_txt = self.extract_zone(domain_name)
+            dns_zones.setdefault(root, []).append((acme_txt, domain_dns_value))
+
+        record_ids = []
+        for root, records in dns_zones.items():
+            index = self.get_txt_record_index(root)
+            for record in records:
+                if not index.get(record):
+                    self.logger.warning("failed to find record_id of record: %s", (root,) + record)
+                record_ids.extend(index.get(record, []))
+        return record_ids
+
+    def delete_dns_records(self, dns_names, max_workers=1):
+        """
+        delete the records we created by their RecordId, on up to max_workers threads.
+        the records that were not created by this instance are found in the TXT index of their zone.
+        see sewer.BaseDns.delete_dns_records
+        """
+        self.logger.info("delete_dns_records start: %s", len(dns_names))
+
+        record_ids = []
+        unknown_dns_names = []
+        for domain_name, domain_dns_value in dns_names:
+            record_id = self._record_ids.pop(
+                (common.strip_wildcard(domain_name), domain_dns_value), None
+            )
+            if record_id:
+                record_ids.append(record_id)
+            else:
+                unknown_dns_names.append((domain_name, domain_dns_value))
+        if unknown_dns_names:
+            record_ids.extend(self.find_dns_record_ids(unknown_dns_names))
+
+        errors = self.run_concurrently(
+            lambda record_id, _: self.delete_dns_record_id(record_id),
+            [(i, None) for i in collections.OrderedDict.fromkeys(record_ids)],
+            max_workers,
+        )
+        self.raise_first_error(errors)
+        self.logger.info("delete_dns_records end: %s", len(record_ids))
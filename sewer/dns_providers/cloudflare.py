@@ -1,39 +1,86 @@
+import time
+import asyncio
+import threading
 import urllib.parse
 
-import requests
-
 from . import common
+from .. import polling
 
 
 class CloudFlareDns(common.BaseDns):
     """
+    The zones of the account are fetched once, page by page, and kept in an index of zone name
+    to zone id for CLOUDFLARE_ZONE_INDEX_TTL seconds. A domain name belongs to the longest zone
+    name that it ends with; eg a.b.example.com is in the zone b.example.com, if there is one,
+    rather than in example.com.
     """
 
     dns_provider_name = "cloudflare"
+    # the max page size of the zones listing.
+    ZONES_PER_PAGE = 50
+    # the number of times that a delete is retried when cloudflare rate limits it.
+    RATE_LIMIT_RETRIES = 3
 
     def __init__(
         self,
         CLOUDFLARE_EMAIL,
         CLOUDFLARE_API_KEY,
         CLOUDFLARE_API_BASE_URL="https://api.cloudflare.com/client/v4/",
+        http_session=None,
+        async_http_session=None,
+        CLOUDFLARE_ZONE_INDEX_TTL=3600,
     ):
+        """
+        :param CLOUDFLARE_ZONE_INDEX_TTL: (optional) [integer]
+            the number of seconds that the zones of the account are used for before they are
+            fetched again. a zone that is not in the index is always fetched again.
+        """
         self.CLOUDFLARE_DNS_ZONE_ID = None
         self.CLOUDFLARE_EMAIL = CLOUDFLARE_EMAIL
         self.CLOUDFLARE_API_KEY = CLOUDFLARE_API_KEY
         self.CLOUDFLARE_API_BASE_URL = CLOUDFLARE_API_BASE_URL
         self.HTTP_TIMEOUT = 65  # seconds
+        self.CLOUDFLARE_ZONE_INDEX_TTL = CLOUDFLARE_ZONE_INDEX_TTL
+        # zone name to zone id, and the time.monotonic() that it was fetched at.
+        self._zone_index = None
+        self._zone_index_fetched_at = None
+        self._zone_index_lock = threading.Lock()
+        # the asyncio.Lock that makes concurrent tasks fetch the zones once; created on first use.
+        self._async_zone_index_lock = None
+        # (domain_name, domain_dns_value) to the (zone id, record id) of the records that were
+        # created, so that they are deleted without listing them.
+        self._dns_record_ids = {}
 
         if CLOUDFLARE_API_BASE_URL[-1] != "/":
             self.CLOUDFLARE_API_BASE_URL = CLOUDFLARE_API_BASE_URL + "/"
         else:
             self.CLOUDFLARE_API_BASE_URL = CLOUDFLARE_API_BASE_URL
-        super(CloudFlareDns, self).__init__()
+        super(CloudFlareDns, self).__init__(
+            http_session=http_session, async_http_session=async_http_session
+        )
 
-    def find_dns_zone(self, domain_name):
-        self.logger.debug("find_dns_zone")
-        url = urllib.parse.urljoin(self.CLOUDFLARE_API_BASE_URL, "zones?status=active")
-        headers = {"X-Auth-Email": self.CLOUDFLARE_EMAIL, "X-Auth-Key": self.CLOUDFLARE_API_KEY}
-        find_dns_zone_response = requests.get(url, headers=headers, timeout=self.HTTP_TIMEOUT)
+    def get_headers(self):
+        return {"X-Auth-Email": self.CLOUDFLARE_EMAIL, "X-Auth-Key": self.CLOUDFLARE_API_KEY}
+
+    def get_dns_records_url(self, zone_id):
+        """
+        returns the url of the dns records of the zone zone_id.
+        """
+        return urllib.parse.urljoin(
+            self.CLOUDFLARE_API_BASE_URL, "zones/{0}/dns_records".format(zone_id)
+        )
+
+    def get_zones_url(self, page):
+        return urllib.parse.urljoin(
+            self.CLOUDFLARE_API_BASE_URL,
+            "zones?status=active&page={0}&per_page={1}".format(page, self.ZONES_PER_PAGE),
+        )
+
+    def parse_zones_page(self, find_dns_zone_response):
+        """
+        returns the zones in a page of the zones listing, as a dict of zone name to zone id, and
+        the number of pages of the listing.
+        """
         self.logger.debug(
             "find_dns_zone_response. status_code={0}".format(find_dns_zone_response.status_code)
         )
@@ -44,41 +91,235 @@ class CloudFlareDns(common.BaseDns):
                     response=self.log_response(find_dns_zone_response),
                 )
             )
+        data = find_dns_zone_response.json()
+        zones = {i["name"]: i["id"] for i in data["result"]}
+        total_pages = (data.get("result_info") or {}).get("total_pages") or 1
+        return zones, total_pages
+
+    def fetch_zones(self):
+        """
+        returns all the active zones of the account, as a dict of zone name to zone id.
+        """
+        self.logger.debug("fetch_zones")
+        zones = {}
+        page, total_pages = 1, 1
+        while page <= total_pages:
+            find_dns_zone_response = self.http_session.get(
+                self.get_zones_url(page), headers=self.get_headers(), timeout=self.HTTP_TIMEOUT
+            )
+            page_zones, total_pages = self.parse_zones_page(find_dns_zone_response)
+            zones.update(page_zones)
+            page += 1
+        self.logger.debug("fetch_zones_success. zones={0}".format(len(zones)))
+        return zones
 
-        result = find_dns_zone_response.json()["result"]
-        for i in result:
-            if i["name"] in domain_name:
-                setattr(self, "CLOUDFLARE_DNS_ZONE_ID", i["id"])
-        if isinstance(self.CLOUDFLARE_DNS_ZONE_ID, type(None)):
+    async def async_fetch_zones(self):
+        self.logger.debug("fetch_zones")
+        zones = {}
+        page, total_pages = 1, 1
+        while page <= total_pages:
+            find_dns_zone_response = await self.async_request(
+                "GET",
+                self.get_zones_url(page),
+                headers=self.get_headers(),
+                timeout=self.HTTP_TIMEOUT,
+            )
+            page_zones, total_pages = self.parse_zones_page(find_dns_zone_response)
+            zones.update(page_zones)
+            page += 1
+        self.logger.debug("fetch_zones_success. zones={0}".format(len(zones)))
+        return zones
+
+    def is_zone_index_stale(self):
+        return (
+            self._zone_index is None
+            or time.monotonic() - self._zone_index_fetched_at > self.CLOUDFLARE_ZONE_INDEX_TTL
+        )
+
+    def set_zone_index(self, zones):
+        self._zone_index = zones
+        self._zone_index_fetched_at = time.monotonic()
+
+    def needs_zone_index(self, refresh, fetched_at):
+        """
+        returns True if the zone index should be fetched; because it is stale, or because refresh
+        is True and nobody fetched it since fetched_at, when the caller found it lacking.
+        """
+        return self.is_zone_index_stale() or (refresh and self._zone_index_fetched_at == fetched_at)
+
+    def get_zone_index(self, refresh=False):
+        """
+        returns the zone index, and fetches it if it is stale or refresh is True.
+        the threads that need it while it is being fetched wait for that fetch.
+        """
+        fetched_at = self._zone_index_fetched_at
+        with self._zone_index_lock:
+            if self.needs_zone_index(refresh, fetched_at):
+                self.set_zone_index(self.fetch_zones())
+            return self._zone_index
+
+    async def async_get_zone_index(self, refresh=False):
+        """
+        the asyncio counterpart of get_zone_index; the tasks that need the zone index while it is
+        being fetched wait for that fetch.
+        """
+        if self._async_zone_index_lock is None:
+            self._async_zone_index_lock = asyncio.Lock()
+        fetched_at = self._zone_index_fetched_at
+        async with self._async_zone_index_lock:
+            if self.needs_zone_index(refresh, fetched_at):
+                zones = await self.async_fetch_zones()
+                with self._zone_index_lock:
+                    self.set_zone_index(zones)
+            return self._zone_index
+
+    @staticmethod
+    def match_dns_zone(domain_name, zones):
+        """
+        returns the id of the longest zone name in zones that domain_name is or ends with, or None.
+        """
+        domain_name = domain_name.rstrip(".").lower()
+        labels = domain_name.split(".")
+        for i in range(len(labels)):
+            zone_id = zones.get(".".join(labels[i:]))
+            if zone_id is not None:
+                return zone_id
+        return None
+
+    def check_dns_zone_id(self, domain_name, zone_id):
+        if zone_id is None:
             raise ValueError(
-                "Error unable to get DNS zone for domain_name={domain_name}: status_code={status_code} response={response}".format(
-                    domain_name=domain_name,
-                    status_code=find_dns_zone_response.status_code,
-                    response=self.log_response(find_dns_zone_response),
+                "Error unable to get DNS zone for domain_name={domain_name}: zones={zones}".format(
+                    domain_name=domain_name, zones=len(self._zone_index or {})
                 )
             )
+        return zone_id
 
+    def find_dns_zone_id(self, domain_name):
+        """
+        returns the id of the zone of domain_name. the zones are fetched again if it is in none of
+        them, in case the zone was added after the index was fetched.
+        """
+        zone_id = self.match_dns_zone(domain_name, self.get_zone_index())
+        if zone_id is None:
+            zone_id = self.match_dns_zone(domain_name, self.get_zone_index(refresh=True))
+        return self.check_dns_zone_id(domain_name, zone_id)
+
+    async def async_find_dns_zone_id(self, domain_name):
+        zone_id = self.match_dns_zone(domain_name, await self.async_get_zone_index())
+        if zone_id is None:
+            zone_id = self.match_dns_zone(
+                domain_name, await self.async_get_zone_index(refresh=True)
+            )
+        return self.check_dns_zone_id(domain_name, zone_id)
+
+    def find_dns_zone(self, domain_name):
+        """
+        returns the id of the zone of domain_name. it is also kept in CLOUDFLARE_DNS_ZONE_ID for
+        the callers that read it from there; the provider itself passes the returned id along,
+        since that attribute is shared by all the records that are created at the same time.
+        """
+        self.logger.debug("find_dns_zone")
+        zone_id = self.CLOUDFLARE_DNS_ZONE_ID = self.find_dns_zone_id(domain_name)
         self.logger.debug("find_dns_zone_success")
+        return zone_id
 
-    def create_dns_record(self, domain_name, domain_dns_value):
-        self.logger.info("create_dns_record")
-        # if we have been given a wildcard name, strip wildcard
-        domain_name = domain_name.lstrip("*.")
-        self.find_dns_zone(domain_name)
+    async def async_find_dns_zone(self, domain_name):
+        self.logger.debug("find_dns_zone")
+        zone_id = self.CLOUDFLARE_DNS_ZONE_ID = await self.async_find_dns_zone_id(domain_name)
+        self.logger.debug("find_dns_zone_success")
+        return zone_id
 
-        url = urllib.parse.urljoin(
-            self.CLOUDFLARE_API_BASE_URL,
-            "zones/{0}/dns_records".format(self.CLOUDFLARE_DNS_ZONE_ID),
-        )
-        headers = {"X-Auth-Email": self.CLOUDFLARE_EMAIL, "X-Auth-Key": self.CLOUDFLARE_API_KEY}
-        body = {
+    def get_dns_zone_ids(self, dns_names):
+        """
+        returns a dict of the zone id of every domain name in dns_names, without wildcards.
+        """
+        return {i: self.find_dns_zone_id(i) for i in self.get_record_names(dns_names)}
+
+    async def async_get_dns_zone_ids(self, dns_names):
+        return {i: await self.async_find_dns_zone_id(i) for i in self.get_record_names(dns_names)}
+
+    @staticmethod
+    def get_dns_record_body(domain_name, domain_dns_value):
+        return {
             "type": "TXT",
             "name": "_acme-challenge" + "." + domain_name + ".",
             "content": "{0}".format(domain_dns_value),
         }
-        create_cloudflare_dns_record_response = requests.post(
-            url, headers=headers, json=body, timeout=self.HTTP_TIMEOUT
+
+    def create_dns_record(self, domain_name, domain_dns_value):
+        self.logger.info("create_dns_record")
+        # if we have been given a wildcard name, strip wildcard
+        domain_name = common.strip_wildcard(domain_name)
+        zone_id = self.find_dns_zone(domain_name)
+        self.add_dns_record(zone_id, domain_name, domain_dns_value)
+        self.logger.info("create_dns_record_end")
+
+    async def async_create_dns_record(self, domain_name, domain_dns_value):
+        self.logger.info("create_dns_record")
+        domain_name = common.strip_wildcard(domain_name)
+        zone_id = await self.async_find_dns_zone(domain_name)
+        await self.async_add_dns_record(zone_id, domain_name, domain_dns_value)
+        self.logger.info("create_dns_record_end")
+
+    def create_dns_records(self, dns_names, max_workers=1):
+        """
+        looks up the zones of all the records in the zone index, then creates the records on up
+        to max_workers threads. see sewer.BaseDns.create_dns_records
+        """
+        self.logger.info("create_dns_records. dns_names={0}".format(len(dns_names)))
+        zone_ids = self.get_dns_zone_ids(dns_names)
+        self.create_all_or_none(
+            lambda domain_name, domain_dns_value: self.add_dns_record(
+                zone_ids[common.strip_wildcard(domain_name)],
+                common.strip_wildcard(domain_name),
+                domain_dns_value,
+            ),
+            dns_names,
+            max_workers,
+        )
+        self.logger.info("create_dns_records_end")
+
+    async def async_create_dns_records(self, dns_names, max_workers=1):
+        self.logger.info("create_dns_records. dns_names={0}".format(len(dns_names)))
+        zone_ids = await self.async_get_dns_zone_ids(dns_names)
+        await self.async_create_all_or_none(
+            lambda domain_name, domain_dns_value: self.async_add_dns_record(
+                zone_ids[common.strip_wildcard(domain_name)],
+                common.strip_wildcard(domain_name),
+                domain_dns_value,
+            ),
+            dns_names,
+            max_workers,
+        )
+        self.logger.info("create_dns_records_end")
+
+    def add_dns_record(self, zone_id, domain_name, domain_dns_value):
+        create_cloudflare_dns_record_response = self.http_session.post(
+            self.get_dns_records_url(zone_id),
+            headers=self.get_headers(),
+            json=self.get_dns_record_body(domain_name, domain_dns_value),
+            timeout=self.HTTP_TIMEOUT,
+        )
+        self.check_create_dns_record_response(create_cloudflare_dns_record_response)
+        self.remember_dns_record_id(
+            zone_id, domain_name, domain_dns_value, create_cloudflare_dns_record_response
         )
+
+    async def async_add_dns_record(self, zone_id, domain_name, domain_dns_value):
+        create_cloudflare_dns_record_response = await self.async_request(
+            "POST",
+            self.get_dns_records_url(zone_id),
+            headers=self.get_headers(),
+            json=self.get_dns_record_body(domain_name, domain_dns_value),
+            timeout=self.HTTP_TIMEOUT,
+        )
+        self.check_create_dns_record_response(create_cloudflare_dns_record_response)
+        self.remember_dns_record_id(
+            zone_id, domain_name, domain_dns_value, create_cloudflare_dns_record_response
+        )
+
+    def check_create_dns_record_response(self, create_cloudflare_dns_record_response):
         self.logger.debug(
             "create_cloudflare_dns_record_response. status_code={0}. response={1}".format(
                 create_cloudflare_dns_record_response.status_code,
@@ -94,58 +335,193 @@ class CloudFlareDns(common.BaseDns):
                     response=self.log_response(create_cloudflare_dns_record_response),
                 )
             )
-        self.logger.info("create_dns_record_end")
+
+    def remember_dns_record_id(
+        self, zone_id, domain_name, domain_dns_value, create_cloudflare_dns_record_response
+    ):
+        result = create_cloudflare_dns_record_response.json().get("result")
+        if isinstance(result, dict) and result.get("id") is not None:
+            self._dns_record_ids[(domain_name, domain_dns_value)] = (zone_id, result["id"])
+
+    def pop_dns_record_ids(self, dns_names):
+        """
+        returns the (zone id, record id) of the pairs in dns_names whose record was created by
+        this instance, and the pairs whose record was not. the records are forgotten.
+        """
+        dns_record_ids = []
+        unknown_dns_names = []
+        for domain_name, domain_dns_value in dns_names:
+            dns_record_id = self._dns_record_ids.pop(
+                (common.strip_wildcard(domain_name), domain_dns_value), None
+            )
+            if dns_record_id is None:
+                unknown_dns_names.append((domain_name, domain_dns_value))
+            else:
+                dns_record_ids.append(dns_record_id)
+        return dns_record_ids, unknown_dns_names
 
     def delete_dns_record(self, domain_name, domain_dns_value):
         self.logger.info("delete_dns_record")
+        dns_record_ids, unknown_dns_names = self.pop_dns_record_ids(
+            [(domain_name, domain_dns_value)]
+        )
+        for zone_id, dns_record_id in dns_record_ids:
+            self.delete_dns_record_id(zone_id, dns_record_id)
+        if unknown_dns_names:
+            domain_name = common.strip_wildcard(domain_name)
+            self.remove_dns_records(self.find_dns_zone_id(domain_name), domain_name)
+        self.logger.info("delete_dns_record_success")
+
+    async def async_delete_dns_record(self, domain_name, domain_dns_value):
+        self.logger.info("delete_dns_record")
+        dns_record_ids, unknown_dns_names = self.pop_dns_record_ids(
+            [(domain_name, domain_dns_value)]
+        )
+        for zone_id, dns_record_id in dns_record_ids:
+            await self.async_delete_dns_record_id(zone_id, dns_record_id)
+        if unknown_dns_names:
+            domain_name = common.strip_wildcard(domain_name)
+            await self.async_remove_dns_records(
+                await self.async_find_dns_zone_id(domain_name), domain_name
+            )
+        self.logger.info("delete_dns_record_success")
 
-        class MockResponse(object):
-            def __init__(self, status_code=200, content="mock-response"):
-                self.status_code = status_code
-                self.content = content
-                super(MockResponse, self).__init__()
+    def delete_dns_records(self, dns_names, max_workers=1):
+        """
+        deletes the records that this instance created by their id, on up to max_workers threads.
+        the records of any other names are looked up in their zone and deleted.
+        """
+        self.logger.info("delete_dns_records. dns_names={0}".format(len(dns_names)))
+        dns_record_ids, unknown_dns_names = self.pop_dns_record_ids(dns_names)
+        errors = self.run_concurrently(self.delete_dns_record_id, dns_record_ids, max_workers)
+        if unknown_dns_names:
+            zone_ids = self.get_dns_zone_ids(unknown_dns_names)
+            errors += self.run_concurrently(
+                lambda domain_name, _: self.remove_dns_records(zone_ids[domain_name], domain_name),
+                [(i, None) for i in self.get_record_names(unknown_dns_names)],
+                max_workers,
+            )
+        self.raise_first_error(errors)
+        self.logger.info("delete_dns_records_success")
+
+    async def async_delete_dns_records(self, dns_names, max_workers=1):
+        self.logger.info("delete_dns_records. dns_names={0}".format(len(dns_names)))
+        dns_record_ids, unknown_dns_names = self.pop_dns_record_ids(dns_names)
+        errors = await self.async_run_concurrently(
+            self.async_delete_dns_record_id, dns_record_ids, max_workers
+        )
+        if unknown_dns_names:
+            zone_ids = await self.async_get_dns_zone_ids(unknown_dns_names)
+            errors += await self.async_run_concurrently(
+                lambda domain_name, _: self.async_remove_dns_records(
+                    zone_ids[domain_name], domain_name
+                ),
+                [(i, None) for i in self.get_record_names(unknown_dns_names)],
+                max_workers,
+            )
+        self.raise_first_error(errors)
+        self.logger.info("delete_dns_records_success")
 
-            def json(self):
-                return {}
+    def get_dns_record_url(self, zone_id, dns_record_id):
+        return urllib.parse.urljoin(
+            self.CLOUDFLARE_API_BASE_URL,
+            "zones/{0}/dns_records/{1}".format(zone_id, dns_record_id),
+        )
 
-        delete_dns_record_response = MockResponse()
-        headers = {"X-Auth-Email": self.CLOUDFLARE_EMAIL, "X-Auth-Key": self.CLOUDFLARE_API_KEY}
+    def get_rate_limit_wait(self, delete_dns_record_response, retries):
+        """
+        returns the seconds to wait before a request that was rate limited(429) is retried;
+        what its Retry-After header asks for, else 1, 2, 4.. seconds.
+        """
+        retry_after = polling.parse_retry_after(delete_dns_record_response)
+        if retry_after is None:
+            retry_after = 2**retries
+        return min(retry_after, self.HTTP_TIMEOUT)
 
+    def delete_dns_record_id(self, zone_id, dns_record_id):
+        """
+        deletes a record by its id. a rate limited(429) delete is retried here, at most
+        RATE_LIMIT_RETRIES times, so that it is also retried when http_session has no Retry policy,
+        eg a plain requests.Session.
+        """
+        retries = 0
+        while True:
+            delete_dns_record_response = self.http_session.delete(
+                self.get_dns_record_url(zone_id, dns_record_id),
+                headers=self.get_headers(),
+                timeout=self.HTTP_TIMEOUT,
+            )
+            if delete_dns_record_response.status_code != 429 or retries >= self.RATE_LIMIT_RETRIES:
+                break
+            time.sleep(self.get_rate_limit_wait(delete_dns_record_response, retries))
+            retries += 1
+        self.check_delete_dns_record_response(delete_dns_record_response)
+
+    async def async_delete_dns_record_id(self, zone_id, dns_record_id):
+        """
+        the asyncio counterpart of delete_dns_record_id.
+        """
+        retries = 0
+        while True:
+            delete_dns_record_response = await self.async_request(
+                "DELETE",
+                self.get_dns_record_url(zone_id, dns_record_id),
+                headers=self.get_headers(),
+                timeout=self.HTTP_TIMEOUT,
+            )
+            if delete_dns_record_response.status_code != 429 or retries >= self.RATE_LIMIT_RETRIES:
+                break
+            await asyncio.sleep(self.get_rate_limit_wait(delete_dns_record_response, retries))
+            retries += 1
+        self.check_delete_dns_record_response(delete_dns_record_response)
+
+    def remove_dns_records(self, zone_id, domain_name):
+        """
+        deletes all the TXT records of _acme-challenge.domain_name in the zone zone_id.
+        """
         dns_name = "_acme-challenge" + "." + domain_name
         list_dns_payload = {"type": "TXT", "name": dns_name}
-        list_dns_url = urllib.parse.urljoin(
-            self.CLOUDFLARE_API_BASE_URL,
-            "zones/{0}/dns_records".format(self.CLOUDFLARE_DNS_ZONE_ID),
+        list_dns_response = self.http_session.get(
+            self.get_dns_records_url(zone_id),
+            params=list_dns_payload,
+            headers=self.get_headers(),
+            timeout=self.HTTP_TIMEOUT,
         )
 
-        list_dns_response = requests.get(
-            list_dns_url, params=list_dns_payload, headers=headers, timeout=self.HTTP_TIMEOUT
+        for dns_record_id in self.get_dns_record_ids(list_dns_response):
+            self.delete_dns_record_id(zone_id, dns_record_id)
+
+    async def async_remove_dns_records(self, zone_id, domain_name):
+        dns_name = "_acme-challenge" + "." + domain_name
+        list_dns_payload = {"type": "TXT", "name": dns_name}
+        list_dns_response = await self.async_request(
+            "GET",
+            self.get_dns_records_url(zone_id),
+            params=list_dns_payload,
+            headers=self.get_headers(),
+            timeout=self.HTTP_TIMEOUT,
         )
 
-        for i in range(0, len(list_dns_response.json()["result"])):
-            dns_record_id = list_dns_response.json()["result"][i]["id"]
-            url = urllib.parse.urljoin(
-                self.CLOUDFLARE_API_BASE_URL,
-                "zones/{0}/dns_records/{1}".format(self.CLOUDFLARE_DNS_ZONE_ID, dns_record_id),
-            )
-            headers = {"X-Auth-Email": self.CLOUDFLARE_EMAIL, "X-Auth-Key": self.CLOUDFLARE_API_KEY}
-            delete_dns_record_response = requests.delete(
-                url, headers=headers, timeout=self.HTTP_TIMEOUT
+        for dns_record_id in self.get_dns_record_ids(list_dns_response):
+            await self.async_delete_dns_record_id(zone_id, dns_record_id)
+
+    @staticmethod
+    def get_dns_record_ids(list_dns_response):
+        return [i["id"] for i in list_dns_response.json()["result"]]
+
+    def check_delete_dns_record_response(self, delete_dns_record_response):
+        self.logger.debug(
+            "delete_dns_record_response. status_code={0}. response={1}".format(
+                delete_dns_record_response.status_code,
+                self.log_response(delete_dns_record_response),
             )
-            self.logger.debug(
+        )
+        if delete_dns_record_response.status_code != 200:
+            # extended logging for debugging
+            # we do not need to raise exception
+            self.logger.error(
                 "delete_dns_record_response. status_code={0}. response={1}".format(
                     delete_dns_record_response.status_code,
                     self.log_response(delete_dns_record_response),
                 )
             )
-            if delete_dns_record_response.status_code != 200:
-                # extended logging for debugging
-                # we do not need to raise exception
-                self.logger.error(
-                    "delete_dns_record_response. status_code={0}. response={1}".format(
-                        delete_dns_record_response.status_code,
-                        self.log_response(delete_dns_record_response),
-                    )
-                )
-
-        self.logger.info("delete_dns_record_success")
@@ -1,13 +1,46 @@
+import asyncio
 import logging
+import threading
+import collections
+import concurrent.futures
+
+from .. import transport
+
+
+def strip_wildcard(domain_name):
+    """
+    returns domain_name without its wildcard label, eg example.com for *.example.com.
+    only a leading `*.` is removed; str.lstrip("*.") would also eat the dots and stars after it.
+    """
+    if domain_name.startswith("*."):
+        return domain_name[2:]
+    return domain_name
 
 
 class BaseDns(object):
     """
     """
 
-    def __init__(self, LOG_LEVEL="INFO"):
+    def __init__(self, LOG_LEVEL="INFO", http_session=None, async_http_session=None):
+        """
+        :param LOG_LEVEL:          (optional) [string]
+            the level to output log messages at.
+        :param http_session:       (optional) [requests.Session]
+            the session used for all http calls to the dns provider's api.
+            if you do not provide one, sewer.transport.create_session() is used; it is created
+            on first use, so the providers that do not call their api with requests never create one.
+        :param async_http_session: (optional) [aiohttp.ClientSession]
+            the session used for all http calls made by the async methods, eg async_create_dns_record.
+            if you do not provide one, one is created for the running event loop on first use.
+        """
         self.LOG_LEVEL = LOG_LEVEL
         self.dns_provider_name = self.__class__.__name__
+        self._http_session = http_session
+        self._http_session_lock = threading.Lock()
+        self.async_http_session = async_http_session
+        # the session created by get_async_http_session, and the event loop that it belongs to
+        self._own_async_http_session = None
+        self._own_async_http_session_loop = None
 
         self.logger = logging.getLogger()
         handler = logging.StreamHandler()
@@ -17,6 +50,21 @@ class BaseDns(object):
             self.logger.addHandler(handler)
         self.logger.setLevel(self.LOG_LEVEL)
 
+    @property
+    def http_session(self):
+        """
+        the requests.Session of the provider; see __init__.
+        """
+        if self._http_session is None:
+            with self._http_session_lock:
+                if self._http_session is None:
+                    self._http_session = transport.create_session()
+        return self._http_session
+
+    @http_session.setter
+    def http_session(self, http_session):
+        self._http_session = http_session
+
     def log_response(self, response):
         """
         renders a python-requests response as json or as a string
@@ -75,3 +123,186 @@ class BaseDns(object):
         """
         self.logger.info("delete_dns_record")
         raise NotImplementedError("delete_dns_record method must be implemented.")
+
+    def get_async_http_session(self):
+        """
+        returns the aiohttp.ClientSession for the running event loop.
+        """
+        if self.async_http_session is not None:
+            return self.async_http_session
+        loop = asyncio.get_running_loop()
+        if (
+            self._own_async_http_session is None
+            or self._own_async_http_session.closed
+            or self._own_async_http_session_loop is not loop
+        ):
+            self._own_async_http_session = transport.create_async_session()
+            self._own_async_http_session_loop = loop
+        return self._own_async_http_session
+
+    async def async_close(self):
+        """
+        closes the aiohttp.ClientSession that get_async_http_session created, if any.
+        """
+        if self._own_async_http_session is not None:
+            await self._own_async_http_session.close()
+            self._own_async_http_session = None
+            self._own_async_http_session_loop = None
+
+    async def async_request(self, method, url, **kwargs):
+        """
+        the asyncio counterpart of self.http_session.request; returns a sewer.transport.AsyncResponse.
+        kwargs are the same as for sewer.transport.async_request; eg headers, params, data, json and timeout.
+        """
+        return await transport.async_request(self.get_async_http_session(), method, url, **kwargs)
+
+    async def run_in_executor(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+    async def async_create_dns_record(self, domain_name, domain_dns_value):
+        """
+        The asyncio counterpart of create_dns_record, used by sewer.AsyncClient.
+
+        By default it runs create_dns_record on the event loop's default executor, so every dns
+        provider works with sewer.AsyncClient. Dns providers with an http api override it to make
+        their calls with async_request, so that many records are created on one event loop
+        without tying up a thread each.
+        """
+        await self.run_in_executor(self.create_dns_record, domain_name, domain_dns_value)
+
+    async def async_delete_dns_record(self, domain_name, domain_dns_value):
+        """
+        The asyncio counterpart of delete_dns_record; see async_create_dns_record.
+        """
+        await self.run_in_executor(self.delete_dns_record, domain_name, domain_dns_value)
+
+    @staticmethod
+    def run_concurrently(function, dns_names, max_workers=1):
+        """
+        calls function(domain_name, domain_dns_value) for every pair in dns_names on at most
+        max_workers threads, and waits for all of the calls to finish, whether they succeed or not.
+        returns the exception that each call raised, or None, in the same order as dns_names.
+        """
+        if not dns_names:
+            return []
+        if max_workers == 1:
+            errors = []
+            for domain_name, domain_dns_value in dns_names:
+                try:
+                    function(domain_name, domain_dns_value)
+                    errors.append(None)
+                except Exception as e:
+                    errors.append(e)
+            return errors
+        max_workers = min(max_workers, len(dns_names))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(function, *i) for i in dns_names]
+        return [i.exception() for i in futures]
+
+    @staticmethod
+    async def async_run_concurrently(function, dns_names, max_workers=1):
+        """
+        the asyncio counterpart of run_concurrently; function is a coroutine function.
+        """
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def call(domain_name, domain_dns_value):
+            async with semaphore:
+                await function(domain_name, domain_dns_value)
+
+        results = await asyncio.gather(*[call(*i) for i in dns_names], return_exceptions=True)
+        return [i if isinstance(i, BaseException) else None for i in results]
+
+    @staticmethod
+    def raise_first_error(errors):
+        for error in errors:
+            if error is not None:
+                raise error
+
+    def create_all_or_none(self, function, dns_names, max_workers=1):
+        """
+        calls function(domain_name, domain_dns_value) for every pair in dns_names, on up to
+        max_workers threads. if any of the calls fails, the records of the calls that succeeded
+        are deleted with delete_dns_records and the first error is raised.
+        """
+        dns_names = list(dns_names)
+        errors = self.run_concurrently(function, dns_names, max_workers)
+        created = [dns_name for dns_name, error in zip(dns_names, errors) if error is None]
+        if len(created) != len(dns_names):
+            if created:
+                try:
+                    self.delete_dns_records(created, max_workers)
+                except Exception as e:
+                    logging.getLogger().error(
+                        "Unable to delete dns records. error={0}".format(str(e))
+                    )
+            self.raise_first_error(errors)
+
+    async def async_create_all_or_none(self, function, dns_names, max_workers=1):
+        """
+        the asyncio counterpart of create_all_or_none; function is a coroutine function.
+        """
+        dns_names = list(dns_names)
+        errors = await self.async_run_concurrently(function, dns_names, max_workers)
+        created = [dns_name for dns_name, error in zip(dns_names, errors) if error is None]
+        if len(created) != len(dns_names):
+            if created:
+                try:
+                    await self.async_delete_dns_records(created, max_workers)
+                except Exception as e:
+                    logging.getLogger().error(
+                        "Unable to delete dns records. error={0}".format(str(e))
+                    )
+            self.raise_first_error(errors)
+
+    @staticmethod
+    def get_record_names(dns_names):
+        """
+        returns the domain names of the (domain_name, domain_dns_value) pairs in dns_names without
+        wildcards and duplicates; the records of *.example.com and example.com share a name.
+        """
+        return list(collections.OrderedDict.fromkeys(strip_wildcard(i) for i, _ in dns_names))
+
+    def create_dns_records(self, dns_names, max_workers=1):
+        """
+        Creates a dns TXT record for each (domain_name, domain_dns_value) pair in dns_names.
+        sewer.Client calls it once per order, with all the records that the order needs.
+
+        By default it calls create_dns_record for every pair, on up to max_workers threads.
+        Dns providers that can create many records with fewer api calls override it.
+        Either all the records are created or an error is raised; the records that were
+        created before the error are deleted again.
+
+        :param dns_names:   (required) [list]
+            the (domain_name, domain_dns_value) pairs. see create_dns_record.
+        :param max_workers: (optional) [integer]
+            the max number of records that are created at the same time.
+        """
+        self.create_all_or_none(self.create_dns_record, dns_names, max_workers)
+
+    def delete_dns_records(self, dns_names, max_workers=1):
+        """
+        Deletes the dns TXT record of each (domain_name, domain_dns_value) pair in dns_names.
+        By default it calls delete_dns_record for every pair, on up to max_workers threads;
+        the first error is raised once all of them have been attempted.
+        """
+        self.raise_first_error(
+            self.run_concurrently(self.delete_dns_record, list(dns_names), max_workers)
+        )
+
+    async def async_create_dns_records(self, dns_names, max_workers=1):
+        """
+        The asyncio counterpart of create_dns_records, used by sewer.AsyncClient.
+        By default it awaits async_create_dns_record for every pair, at most max_workers at a time.
+        """
+        await self.async_create_all_or_none(self.async_create_dns_record, dns_names, max_workers)
+
+    async def async_delete_dns_records(self, dns_names, max_workers=1):
+        """
+        The asyncio counterpart of delete_dns_records.
+        """
+        self.raise_first_error(
+            await self.async_run_concurrently(
+                self.async_delete_dns_record, list(dns_names), max_workers
+            )
+        )
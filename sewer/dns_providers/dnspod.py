@@ -1,7 +1,5 @@
 import urllib.parse
 
-import requests
-
 from . import common
 
 
@@ -11,23 +9,39 @@ class DNSPodDns(common.BaseDns):
 
     dns_provider_name = "dnspod"
 
-    def __init__(self, DNSPOD_ID, DNSPOD_API_KEY, DNSPOD_API_BASE_URL="https://dnsapi.cn/"):
+    def __init__(
+        self,
+        DNSPOD_ID,
+        DNSPOD_API_KEY,
+        DNSPOD_API_BASE_URL="https://dnsapi.cn/",
+        http_session=None,
+        async_http_session=None,
+    ):
         self.DNSPOD_ID = DNSPOD_ID
         self.DNSPOD_API_KEY = DNSPOD_API_KEY
         self.DNSPOD_API_BASE_URL = DNSPOD_API_BASE_URL
         self.HTTP_TIMEOUT = 65  # seconds
         self.DNSPOD_LOGIN = "{0},{1}".format(self.DNSPOD_ID, self.DNSPOD_API_KEY)
+        # (domain_name, domain_dns_value) to the id of the records that were created,
+        # so that they are removed without listing them.
+        self._dns_record_ids = {}
 
         if DNSPOD_API_BASE_URL[-1] != "/":
             self.DNSPOD_API_BASE_URL = DNSPOD_API_BASE_URL + "/"
         else:
             self.DNSPOD_API_BASE_URL = DNSPOD_API_BASE_URL
-        super(DNSPodDns, self).__init__()
+        super(DNSPodDns, self).__init__(
+            http_session=http_session, async_http_session=async_http_session
+        )
 
-    def create_dns_record(self, domain_name, domain_dns_value):
-        self.logger.info("create_dns_record")
+    @staticmethod
+    def split_domain_name(domain_name):
+        """
+        returns the (subdomain, domain) of domain_name. the subdomain is empty or starts with a dot,
+        eg ".www" for www.example.com
+        """
         # if we have been given a wildcard name, strip wildcard
-        domain_name = domain_name.lstrip("*.")
+        domain_name = common.strip_wildcard(domain_name)
         subd = ""
         if domain_name.count(".") != 1:  # not top level domain
             pos = domain_name.rfind(".", 0, domain_name.rfind("."))
@@ -35,20 +49,31 @@ class DNSPodDns(common.BaseDns):
             domain_name = domain_name[pos + 1 :]
             if subd != "":
                 subd = "." + subd
+        return subd, domain_name
 
+    def get_record_name(self, domain_name):
+        """
+        returns the (sub_domain, domain) of the challenge record of domain_name,
+        eg ("_acme-challenge.www", "example.com") for *.www.example.com
+        """
+        subd, domain_name = self.split_domain_name(domain_name)
+        return "_acme-challenge" + subd, domain_name
+
+    def get_create_dns_record_request(self, domain_name, domain_dns_value):
+        sub_domain, domain_name = self.get_record_name(domain_name)
         url = urllib.parse.urljoin(self.DNSPOD_API_BASE_URL, "Record.Create")
         body = {
             "record_type": "TXT",
             "domain": domain_name,
-            "sub_domain": "_acme-challenge" + subd,
+            "sub_domain": sub_domain,
             "value": domain_dns_value,
             "record_line_id": "0",
             "format": "json",
             "login_token": self.DNSPOD_LOGIN,
         }
-        create_dnspod_dns_record_response = requests.post(
-            url, data=body, timeout=self.HTTP_TIMEOUT
-        ).json()
+        return url, body
+
+    def check_create_dns_record_response(self, create_dnspod_dns_record_response):
         self.logger.debug(
             "create_dnspod_dns_record_response. status_code={0}. response={1}".format(
                 create_dnspod_dns_record_response["status"]["code"],
@@ -64,55 +89,180 @@ class DNSPodDns(common.BaseDns):
                     response=create_dnspod_dns_record_response["status"]["message"],
                 )
             )
+
+    def remember_dns_record_id(
+        self, domain_name, domain_dns_value, create_dnspod_dns_record_response
+    ):
+        record = create_dnspod_dns_record_response.get("record")
+        if isinstance(record, dict) and record.get("id") is not None:
+            key = (common.strip_wildcard(domain_name), domain_dns_value)
+            self._dns_record_ids[key] = record["id"]
+
+    def pop_dns_record_ids(self, dns_names):
+        """
+        returns the (domain_name, record id) of the pairs in dns_names whose record was created by
+        this instance, and the pairs whose record was not. the records are forgotten.
+        """
+        dns_record_ids = []
+        unknown_dns_names = []
+        for domain_name, domain_dns_value in dns_names:
+            record_id = self._dns_record_ids.pop(
+                (common.strip_wildcard(domain_name), domain_dns_value), None
+            )
+            if record_id is None:
+                unknown_dns_names.append((domain_name, domain_dns_value))
+            else:
+                dns_record_ids.append((domain_name, record_id))
+        return dns_record_ids, unknown_dns_names
+
+    def create_dns_record(self, domain_name, domain_dns_value):
+        self.logger.info("create_dns_record")
+        url, body = self.get_create_dns_record_request(domain_name, domain_dns_value)
+        create_dnspod_dns_record_response = self.http_session.post(
+            url, data=body, timeout=self.HTTP_TIMEOUT
+        ).json()
+        self.check_create_dns_record_response(create_dnspod_dns_record_response)
+        self.remember_dns_record_id(
+            domain_name, domain_dns_value, create_dnspod_dns_record_response
+        )
         self.logger.info("create_dns_record_end")
 
-    def delete_dns_record(self, domain_name, domain_dns_value):
-        self.logger.info("delete_dns_record")
-        domain_name = domain_name.lstrip("*.")
-        subd = ""
-        if domain_name.count(".") != 1:  # not top level domain
-            pos = domain_name.rfind(".", 0, domain_name.rfind("."))
-            subd = domain_name[:pos]
-            domain_name = domain_name[pos + 1 :]
-            if subd != "":
-                subd = "." + subd
+    async def async_create_dns_record(self, domain_name, domain_dns_value):
+        self.logger.info("create_dns_record")
+        url, body = self.get_create_dns_record_request(domain_name, domain_dns_value)
+        create_dnspod_dns_record_response = (
+            await self.async_request("POST", url, data=body, timeout=self.HTTP_TIMEOUT)
+        ).json()
+        self.check_create_dns_record_response(create_dnspod_dns_record_response)
+        self.remember_dns_record_id(
+            domain_name, domain_dns_value, create_dnspod_dns_record_response
+        )
+        self.logger.info("create_dns_record_end")
 
+    def get_list_dns_records_request(self, domain_name):
+        sub_domain, rootdomain = self.get_record_name(domain_name)
         url = urllib.parse.urljoin(self.DNSPOD_API_BASE_URL, "Record.List")
-        # pos = domain_name.rfind(".",0, domain_name.rfind("."))
-        subdomain = "_acme-challenge." + subd
-        rootdomain = domain_name
         body = {
             "login_token": self.DNSPOD_LOGIN,
             "format": "json",
             "domain": rootdomain,
-            "subdomain": subdomain,
+            "subdomain": sub_domain,
             "record_type": "TXT",
         }
-        list_dns_response = requests.post(url, data=body, timeout=self.HTTP_TIMEOUT).json()
+        return url, body
+
+    def get_dns_record_ids(self, list_dns_response):
         if list_dns_response["status"]["code"] != "1":
             self.logger.error(
                 "list_dns_record_response. status_code={0}. message={1}".format(
                     list_dns_response["status"]["code"], list_dns_response["status"]["message"]
                 )
             )
-        for i in range(0, len(list_dns_response["records"])):
-            rid = list_dns_response["records"][i]["id"]
-            urlr = urllib.parse.urljoin(self.DNSPOD_API_BASE_URL, "Record.Remove")
-            bodyr = {
-                "login_token": self.DNSPOD_LOGIN,
-                "format": "json",
-                "domain": rootdomain,
-                "record_id": rid,
-            }
-            delete_dns_record_response = requests.post(
-                urlr, data=bodyr, timeout=self.HTTP_TIMEOUT
-            ).json()
-            if delete_dns_record_response["status"]["code"] != "1":
-                self.logger.error(
-                    "delete_dns_record_response. status_code={0}. message={1}".format(
-                        delete_dns_record_response["status"]["code"],
-                        delete_dns_record_response["status"]["message"],
-                    )
+        return [i["id"] for i in list_dns_response["records"]]
+
+    def get_delete_dns_record_request(self, domain_name, record_id):
+        _, rootdomain = self.split_domain_name(domain_name)
+        url = urllib.parse.urljoin(self.DNSPOD_API_BASE_URL, "Record.Remove")
+        body = {
+            "login_token": self.DNSPOD_LOGIN,
+            "format": "json",
+            "domain": rootdomain,
+            "record_id": record_id,
+        }
+        return url, body
+
+    def check_delete_dns_record_response(self, delete_dns_record_response):
+        if delete_dns_record_response["status"]["code"] != "1":
+            self.logger.error(
+                "delete_dns_record_response. status_code={0}. message={1}".format(
+                    delete_dns_record_response["status"]["code"],
+                    delete_dns_record_response["status"]["message"],
                 )
+            )
 
+    def delete_dns_record(self, domain_name, domain_dns_value):
+        self.logger.info("delete_dns_record")
+        dns_record_ids, unknown_dns_names = self.pop_dns_record_ids(
+            [(domain_name, domain_dns_value)]
+        )
+        if unknown_dns_names:
+            dns_record_ids = [(domain_name, i) for i in self.list_dns_record_ids(domain_name)]
+        for _, rid in dns_record_ids:
+            self.remove_dns_record(domain_name, rid)
+        self.logger.info("delete_dns_record_success")
+
+    async def async_delete_dns_record(self, domain_name, domain_dns_value):
+        self.logger.info("delete_dns_record")
+        dns_record_ids, unknown_dns_names = self.pop_dns_record_ids(
+            [(domain_name, domain_dns_value)]
+        )
+        if unknown_dns_names:
+            dns_record_ids = [
+                (domain_name, i) for i in await self.async_list_dns_record_ids(domain_name)
+            ]
+        for _, rid in dns_record_ids:
+            await self.async_remove_dns_record(domain_name, rid)
         self.logger.info("delete_dns_record_success")
+
+    def delete_dns_records(self, dns_names, max_workers=1):
+        """
+        removes the records that this instance created by their id, on up to max_workers threads
+        that share http_session. the records of any other names are listed once per name first.
+        the dnspod api has no batch remove; every record is removed with its own Record.Remove request.
+        """
+        self.logger.info("delete_dns_records. dns_names={0}".format(len(dns_names)))
+        record_ids, unknown_dns_names = self.pop_dns_record_ids(dns_names)
+
+        def list_dns_record_ids(domain_name, _):
+            record_ids.extend((domain_name, i) for i in self.list_dns_record_ids(domain_name))
+
+        names = [(i, None) for i in self.get_record_names(unknown_dns_names)]
+        self.raise_first_error(self.run_concurrently(list_dns_record_ids, names, max_workers))
+        self.raise_first_error(
+            self.run_concurrently(self.remove_dns_record, record_ids, max_workers)
+        )
+        self.logger.info("delete_dns_records_success")
+
+    async def async_delete_dns_records(self, dns_names, max_workers=1):
+        self.logger.info("delete_dns_records. dns_names={0}".format(len(dns_names)))
+        record_ids, unknown_dns_names = self.pop_dns_record_ids(dns_names)
+
+        async def list_dns_record_ids(domain_name, _):
+            record_ids.extend(
+                (domain_name, i) for i in await self.async_list_dns_record_ids(domain_name)
+            )
+
+        names = [(i, None) for i in self.get_record_names(unknown_dns_names)]
+        self.raise_first_error(
+            await self.async_run_concurrently(list_dns_record_ids, names, max_workers)
+        )
+        self.raise_first_error(
+            await self.async_run_concurrently(self.async_remove_dns_record, record_ids, max_workers)
+        )
+        self.logger.info("delete_dns_records_success")
+
+    def list_dns_record_ids(self, domain_name):
+        url, body = self.get_list_dns_records_request(domain_name)
+        list_dns_response = self.http_session.post(url, data=body, timeout=self.HTTP_TIMEOUT).json()
+        return self.get_dns_record_ids(list_dns_response)
+
+    async def async_list_dns_record_ids(self, domain_name):
+        url, body = self.get_list_dns_records_request(domain_name)
+        list_dns_response = await self.async_request(
+            "POST", url, data=body, timeout=self.HTTP_TIMEOUT
+        )
+        return self.get_dns_record_ids(list_dns_response.json())
+
+    def remove_dns_record(self, domain_name, record_id):
+        urlr, bodyr = self.get_delete_dns_record_request(domain_name, record_id)
+        delete_dns_record_response = self.http_session.post(
+            urlr, data=bodyr, timeout=self.HTTP_TIMEOUT
+        ).json()
+        self.check_delete_dns_record_response(delete_dns_record_response)
+
+    async def async_remove_dns_record(self, domain_name, record_id):
+        urlr, bodyr = self.get_delete_dns_record_request(domain_name, record_id)
+        delete_dns_record_response = await self.async_request(
+            "POST", urlr, data=bodyr, timeout=self.HTTP_TIMEOUT
+        )
+        self.check_delete_dns_record_response(delete_dns_record_response.json())
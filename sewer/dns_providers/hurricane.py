@@ -46,7 +46,7 @@ class HurricaneDns(common.BaseDns):
         :return tuple: root, zone, acme_txt
         """
         # if we have been given a wildcard name, strip wildcard
-        domain_name = domain_name.lstrip("*.")
+        domain_name = common.strip_wildcard(domain_name)
         if domain_name.count(".") > 1:
             zone, middle, last = str(domain_name).rsplit(".", 2)
             root = ".".join([middle, last])
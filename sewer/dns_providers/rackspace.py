@@ -1,8 +1,158 @@
+import re
+import time
+import asyncio
+import logging
+import datetime
+import threading
+import collections
 import urllib.parse
-import requests
 from . import common
+from .. import state
+from .. import polling
 import tldextract
-import time
+
+
+def parse_token_expires(expires):
+    """
+    The "expires" field of a rackspace identity token is an ISO 8601 timestamp with a timezone,
+    eg 2014-11-24T22:05:39.115Z or 2014-11-24T16:05:39.115-06:00; fractional seconds are dropped.
+    returns it as seconds since the epoch, or None if expires can not be parsed.
+    """
+    if not expires:
+        return None
+    expires = re.sub(r"\.\d+", "", str(expires).strip())
+    if expires.endswith("Z"):
+        expires = expires[:-1] + "+00:00"
+    try:
+        return datetime.datetime.strptime(expires, "%Y-%m-%dT%H:%M:%S%z").timestamp()
+    except ValueError:
+        return None
+
+
+class RackspaceTokenCache(object):
+    """
+    Remembers the identity tokens of rackspace users, and the dns api endpoint that comes with them,
+    so that a RackspaceDns does not ask the identity service for a new token every time it is built.
+
+    A token is used until refresh_before seconds before it expires, then a new one is fetched.
+    A token whose expiry is missing or can not be parsed is used for default_lifetime seconds.
+    Only one thread fetches the token of a user at a time; the others wait for it and use it.
+    When path is given, the cache is stored in that json file so that it outlives the process and
+    is shared by the processes that use the same file. The file holds the tokens; it is only
+    readable by its owner. It is safe to use from multiple threads.
+
+    usage:
+        cache = sewer.RackspaceTokenCache(path='/var/lib/sewer/rackspace-tokens.json')
+        dns_class = sewer.RackspaceDns(RACKSPACE_USERNAME=username,
+                                       RACKSPACE_API_KEY=api_key,
+                                       token_cache=cache)
+    """
+
+    def __init__(self, path=None, refresh_before=300, default_lifetime=3600):
+        """
+        :param path:             (optional) [string]
+            the json file that the cache is loaded from and saved to. None keeps it in memory only.
+        :param refresh_before:   (optional) [integer]
+            the number of seconds before a token expires that a new one is fetched.
+        :param default_lifetime: (optional) [integer]
+            the number of seconds that a token is taken to be valid for when the identity service
+            does not say when it expires. rackspace tokens are valid for 24 hours by default.
+        """
+        self.path = path
+        self.refresh_before = refresh_before
+        self.default_lifetime = default_lifetime
+        self.logger = logging.getLogger()
+        self._lock = threading.Lock()
+        self._fetch_locks = {}
+        self._entries = self.load()
+
+    def load(self):
+        entries = state.load_json_file(self.path, "rackspace token cache")
+        return {k: v for k, v in entries.items() if isinstance(v, dict) and "expires" in v}
+
+    def save(self):
+        """
+        writes the cache to path. should be called with self._lock held.
+        """
+        if self.path is None:
+            return
+        state.save_json_file(self.path, self._entries, prefix=".sewer-rackspace-")
+
+    def get(self, username, now=None):
+        """
+        returns the (token, api base url) of username if its token is valid for at least
+        refresh_before seconds more. returns None otherwise.
+        """
+        now = now or time.time()
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None or entry["expires"] - now < self.refresh_before:
+                return None
+            return entry["token"], entry["api_base_url"]
+
+    def add(self, username, token, api_base_url, expires):
+        """
+        records the token of username, which expires at expires(an ISO 8601 timestamp), or in
+        default_lifetime seconds if expires is None or can not be parsed. expired tokens are dropped.
+        """
+        now = time.time()
+        expires = parse_token_expires(expires)
+        if expires is None:
+            expires = now + self.default_lifetime
+        with self._lock:
+            self._entries[username] = {
+                "token": token,
+                "api_base_url": api_base_url,
+                "expires": expires,
+            }
+            for i in [i for i in self._entries if self._entries[i]["expires"] <= now]:
+                del self._entries[i]
+            self.save()
+
+    def remove(self, username, token=None):
+        """
+        forgets the token of username, eg because the api no longer accepts it. when token is
+        given, it is only forgotten if it is still that token; a newer one that another thread
+        fetched in the meantime is kept.
+        """
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None or (token is not None and entry["token"] != token):
+                return
+            del self._entries[username]
+            self.save()
+
+    def reload(self):
+        """
+        takes the tokens that another process saved to path, when they expire later than ours.
+        """
+        entries = self.load()
+        with self._lock:
+            for username, entry in entries.items():
+                if entry["expires"] > self._entries.get(username, {}).get("expires", 0):
+                    self._entries[username] = entry
+
+    def get_or_fetch(self, username, fetch):
+        """
+        returns the cached (token, api base url) of username. if there is none, fetch() is called to
+        get a (token, api base url, expires) and the token is cached.
+        """
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(username, threading.Lock())
+        with fetch_lock:
+            credentials = self.get(username)
+            if credentials is None and self.path is not None:
+                self.reload()
+                credentials = self.get(username)
+            if credentials is not None:
+                return credentials
+            token, api_base_url, expires = fetch()
+            self.add(username, token, api_base_url, expires)
+            return token, api_base_url
+
+
+# the cache of the providers that are not given one; tokens are reused within the process.
+DEFAULT_RACKSPACE_TOKEN_CACHE = RackspaceTokenCache()
 
 
 class RackspaceDns(common.BaseDns):
@@ -10,9 +160,24 @@ class RackspaceDns(common.BaseDns):
     """
 
     dns_providername = "rackspace"
+    # the max page size of the listings of the rackspace dns api.
+    PAGE_SIZE = 100
 
     def get_rackspace_credentials(self):
+        """
+        returns the (token, api base url) of RACKSPACE_USERNAME, from the token cache if it has a
+        token that is not about to expire.
+        """
         self.logger.debug("get_rackspace_credentials")
+        return self.token_cache.get_or_fetch(
+            self.RACKSPACE_USERNAME, self.fetch_rackspace_credentials
+        )
+
+    def fetch_rackspace_credentials(self):
+        """
+        asks the identity service for a new token. returns the (token, api base url, expires).
+        """
+        self.logger.debug("fetch_rackspace_credentials")
         RACKSPACE_IDENTITY_URL = "https://identity.api.rackspacecloud.com/v2.0/tokens"
         payload = {
             "auth": {
@@ -22,7 +187,9 @@ class RackspaceDns(common.BaseDns):
                 }
             }
         }
-        find_rackspace_api_details_response = requests.post(RACKSPACE_IDENTITY_URL, json=payload)
+        find_rackspace_api_details_response = self.http_session.post(
+            RACKSPACE_IDENTITY_URL, json=payload, timeout=self.HTTP_TIMEOUT
+        )
         self.logger.debug(
             "find_rackspace_api_details_response. status_code={0}".format(
                 find_rackspace_api_details_response.status_code
@@ -37,6 +204,7 @@ class RackspaceDns(common.BaseDns):
             )
         data = find_rackspace_api_details_response.json()
         api_token = data["access"]["token"]["id"]
+        expires = data["access"]["token"].get("expires")
         url_data = next(
             (item for item in data["access"]["serviceCatalog"] if item["type"] == "rax:dns"), None
         )
@@ -46,77 +214,274 @@ class RackspaceDns(common.BaseDns):
             )
         else:
             api_base_url = url_data["endpoints"][0]["publicURL"] + "/"
-        return (api_token, api_base_url)
+        return (api_token, api_base_url, expires)
 
-    def __init__(self, RACKSPACE_USERNAME, RACKSPACE_API_KEY):
-        self.RACKSPACE_DNS_ZONE_ID = None
+    def __init__(
+        self,
+        RACKSPACE_USERNAME,
+        RACKSPACE_API_KEY,
+        http_session=None,
+        async_http_session=None,
+        RACKSPACE_CALLBACK_TIMEOUT=65,
+        poller=None,
+        token_cache=None,
+        RACKSPACE_ZONE_INDEX_TTL=3600,
+    ):
+        """
+        :param RACKSPACE_CALLBACK_TIMEOUT: (optional) [number]
+            the max seconds to wait for the jobs that create or delete records to complete.
+        :param poller:                     (optional) [sewer.polling.Poller]
+            the poller used to wait on the callback urls of the jobs.
+            overrides RACKSPACE_CALLBACK_TIMEOUT.
+        :param token_cache:                (optional) [sewer.RackspaceTokenCache]
+            the cache of the identity tokens. if you do not provide one, tokens are cached in memory
+            and shared by all the RackspaceDns of the process.
+        :param RACKSPACE_ZONE_INDEX_TTL:   (optional) [integer]
+            the number of seconds that the domains of the account are used for before they are
+            fetched again. a domain that is not in them is always fetched again.
+        """
         self.RACKSPACE_USERNAME = RACKSPACE_USERNAME
         self.RACKSPACE_API_KEY = RACKSPACE_API_KEY
         self.HTTP_TIMEOUT = 65  # seconds
-        super(RackspaceDns, self).__init__()
-        self.RACKSPACE_API_TOKEN, self.RACKSPACE_API_BASE_URL = self.get_rackspace_credentials()
-        self.RACKSPACE_HEADERS = {
-            "X-Auth-Token": self.RACKSPACE_API_TOKEN,
-            "Content-Type": "application/json",
-        }
+        self.token_cache = token_cache or DEFAULT_RACKSPACE_TOKEN_CACHE
+        self.RACKSPACE_ZONE_INDEX_TTL = RACKSPACE_ZONE_INDEX_TTL
+        self._zone_index = None
+        self._zone_index_fetched_at = None
+        self._zone_index_lock = threading.Lock()
+        # the asyncio.Lock that makes concurrent tasks fetch the domains once; created on first use.
+        self._async_zone_index_lock = None
+        # jobs usually complete within a second or two; poll them early, then back off.
+        self.poller = poller or polling.Poller(
+            initial_interval=0.5, max_interval=8, timeout=RACKSPACE_CALLBACK_TIMEOUT
+        )
+        super(RackspaceDns, self).__init__(
+            http_session=http_session, async_http_session=async_http_session
+        )
+        _, self.RACKSPACE_API_BASE_URL = self.get_rackspace_credentials()
+
+    @property
+    def RACKSPACE_API_TOKEN(self):
+        """
+        the current token of RACKSPACE_USERNAME; it is fetched again when it is about to expire.
+        read-only; it used to be an attribute set in __init__.
+        """
+        return self.get_rackspace_credentials()[0]
+
+    @property
+    def RACKSPACE_HEADERS(self):
+        return {"X-Auth-Token": self.RACKSPACE_API_TOKEN, "Content-Type": "application/json"}
+
+    def api_request(self, method, url, **kwargs):
+        """
+        makes a request to the dns api with the current token, and returns the response.
+        if the api rejects the token(401), eg because it was revoked before it expired, the token
+        is dropped from the token cache and the request is made once more with a new one.
+        kwargs are passed on to http_session; eg json and timeout.
+        """
+        send = getattr(self.http_session, method.lower())
+        headers = self.RACKSPACE_HEADERS
+        response = send(url, headers=headers, **kwargs)
+        if response.status_code == 401:
+            self.logger.info("rackspace_token_rejected. fetching a new one")
+            self.token_cache.remove(self.RACKSPACE_USERNAME, headers["X-Auth-Token"])
+            response = send(url, headers=self.RACKSPACE_HEADERS, **kwargs)
+        return response
+
+    async def async_api_request(self, method, url, **kwargs):
+        """
+        the asyncio counterpart of api_request. the token is looked up on the executor, since it
+        is fetched with a blocking request when the cached one is about to expire.
+        """
+        headers = await self.run_in_executor(lambda: self.RACKSPACE_HEADERS)
+        response = await self.async_request(method, url, headers=headers, **kwargs)
+        if response.status_code == 401:
+            self.logger.info("rackspace_token_rejected. fetching a new one")
+            self.token_cache.remove(self.RACKSPACE_USERNAME, headers["X-Auth-Token"])
+            headers = await self.run_in_executor(lambda: self.RACKSPACE_HEADERS)
+            response = await self.async_request(method, url, headers=headers, **kwargs)
+        return response
 
     def get_dns_zone(self, domain_name):
         self.logger.debug("get_dns_zone")
+        self.RACKSPACE_DNS_ZONE = self.get_dns_zone_name(domain_name)
+
+    @staticmethod
+    def get_dns_zone_name(domain_name):
         extracted_domain = tldextract.extract(domain_name)
-        self.RACKSPACE_DNS_ZONE = ".".join([extracted_domain.domain, extracted_domain.suffix])
+        return ".".join([extracted_domain.domain, extracted_domain.suffix])
 
-    def find_dns_zone_id(self, domain_name):
-        self.logger.debug("find_dns_zone_id")
-        self.get_dns_zone(domain_name)
-        url = self.RACKSPACE_API_BASE_URL + "domains"
-        find_dns_zone_id_response = requests.get(url, headers=self.RACKSPACE_HEADERS)
+    def get_list_url(self, path, offset, **params):
+        """
+        returns the url of the page of the listing at path that starts at offset.
+        """
+        params = sorted(params.items()) + [("limit", self.PAGE_SIZE), ("offset", offset)]
+        return urllib.parse.urljoin(
+            self.RACKSPACE_API_BASE_URL, path + "?" + urllib.parse.urlencode(params)
+        )
+
+    def parse_list_page(self, list_response, key, error):
+        """
+        returns the items of a page of a listing, and the total number of items of the listing.
+        """
         self.logger.debug(
-            "find_dns_zone_id_response. status_code={0}".format(
-                find_dns_zone_id_response.status_code
-            )
+            "list_response. key={0} status_code={1}".format(key, list_response.status_code)
         )
-        if find_dns_zone_id_response.status_code != 200:
+        if list_response.status_code != 200:
             raise ValueError(
-                "Error getting rackspace dns domain info: status_code={status_code} response={response}".format(
-                    status_code=find_dns_zone_id_response.status_code,
-                    response=self.log_response(find_dns_zone_id_response),
+                "{error}: status_code={status_code} response={response}".format(
+                    error=error,
+                    status_code=list_response.status_code,
+                    response=self.log_response(list_response),
                 )
             )
-        result = find_dns_zone_id_response.json()
-        domain_data = next(
-            (item for item in result["domains"] if item["name"] == self.RACKSPACE_DNS_ZONE), None
+        data = list_response.json()
+        items = data[key]
+        return items, data.get("totalEntries") or len(items)
+
+    def list_all(self, path, key, error, **params):
+        """
+        returns all the items of the listing at path, which is fetched a page at a time.
+        """
+        items = []
+        total_entries = 1
+        while len(items) < total_entries:
+            list_response = self.api_request(
+                "GET", self.get_list_url(path, len(items), **params), timeout=self.HTTP_TIMEOUT
+            )
+            page_items, total_entries = self.parse_list_page(list_response, key, error)
+            if not page_items:
+                break
+            items.extend(page_items)
+        return items
+
+    async def async_list_all(self, path, key, error, **params):
+        items = []
+        total_entries = 1
+        while len(items) < total_entries:
+            list_response = await self.async_api_request(
+                "GET", self.get_list_url(path, len(items), **params), timeout=self.HTTP_TIMEOUT
+            )
+            page_items, total_entries = self.parse_list_page(list_response, key, error)
+            if not page_items:
+                break
+            items.extend(page_items)
+        return items
+
+    def is_zone_index_stale(self):
+        return (
+            self._zone_index is None
+            or time.monotonic() - self._zone_index_fetched_at > self.RACKSPACE_ZONE_INDEX_TTL
         )
-        if domain_data is None:
+
+    def set_zone_index(self, domains):
+        self._zone_index = {i["name"]: i["id"] for i in domains}
+        self._zone_index_fetched_at = time.monotonic()
+
+    def needs_zone_index(self, refresh, fetched_at):
+        """
+        returns True if the domains should be fetched; because they are stale, or because refresh
+        is True and nobody fetched them since fetched_at, when the caller found them lacking.
+        """
+        return self.is_zone_index_stale() or (refresh and self._zone_index_fetched_at == fetched_at)
+
+    def get_zone_index(self, refresh=False):
+        """
+        returns a dict of the name to the id of all the domains of the account, and fetches them
+        if they are stale or refresh is True. the threads that need them while they are being
+        fetched wait for that fetch.
+        """
+        fetched_at = self._zone_index_fetched_at
+        with self._zone_index_lock:
+            if self.needs_zone_index(refresh, fetched_at):
+                self.set_zone_index(
+                    self.list_all("domains", "domains", "Error getting rackspace dns domain info")
+                )
+            return self._zone_index
+
+    async def async_get_zone_index(self, refresh=False):
+        if self._async_zone_index_lock is None:
+            self._async_zone_index_lock = asyncio.Lock()
+        fetched_at = self._zone_index_fetched_at
+        async with self._async_zone_index_lock:
+            if self.needs_zone_index(refresh, fetched_at):
+                domains = await self.async_list_all(
+                    "domains", "domains", "Error getting rackspace dns domain info"
+                )
+                with self._zone_index_lock:
+                    self.set_zone_index(domains)
+            return self._zone_index
+
+    def check_dns_zone_id(self, dns_zone, dns_zone_id):
+        if dns_zone_id is None:
             raise ValueError(
                 "Error finding information for {dns_zone} in dns response data:\n{response_data})".format(
-                    dns_zone=self.RACKSPACE_DNS_ZONE,
-                    response_data=self.log_response(find_dns_zone_id_response),
+                    dns_zone=dns_zone, response_data=self._zone_index
                 )
             )
-        dns_zone_id = domain_data["id"]
         self.logger.debug("find_dns_zone_id_success")
         return dns_zone_id
 
-    def find_dns_record_id(self, domain_name, domain_dns_value):
-        self.logger.debug("find_dns_record_id")
-        self.RACKSPACE_DNS_ZONE_ID = self.find_dns_zone_id(domain_name)
-        url = self.RACKSPACE_API_BASE_URL + "domains/{0}/records".format(self.RACKSPACE_DNS_ZONE_ID)
-        find_dns_record_id_response = requests.get(url, headers=self.RACKSPACE_HEADERS)
-        self.logger.debug(
-            "find_dns_record_id_response. status_code={0}".format(
-                find_dns_record_id_response.status_code
-            )
+    def find_dns_zone_id(self, domain_name):
+        """
+        returns the id of the zone of domain_name. the domains are fetched again if it is in none
+        of them, in case the domain was added after they were fetched.
+        """
+        self.logger.debug("find_dns_zone_id")
+        dns_zone = self.get_dns_zone_name(domain_name)
+        dns_zone_id = self.get_zone_index().get(dns_zone)
+        if dns_zone_id is None:
+            dns_zone_id = self.get_zone_index(refresh=True).get(dns_zone)
+        return self.check_dns_zone_id(dns_zone, dns_zone_id)
+
+    async def async_find_dns_zone_id(self, domain_name):
+        self.logger.debug("find_dns_zone_id")
+        dns_zone = self.get_dns_zone_name(domain_name)
+        dns_zone_id = (await self.async_get_zone_index()).get(dns_zone)
+        if dns_zone_id is None:
+            dns_zone_id = (await self.async_get_zone_index(refresh=True)).get(dns_zone)
+        return self.check_dns_zone_id(dns_zone, dns_zone_id)
+
+    def list_dns_records(self, dns_zone_id):
+        """
+        returns all the TXT records of the zone dns_zone_id.
+        """
+        return self.list_all(
+            "domains/{0}/records".format(dns_zone_id),
+            "records",
+            "Error finding dns records for {0}".format(dns_zone_id),
+            type="TXT",
         )
-        self.logger.debug(url)
-        if find_dns_record_id_response.status_code != 200:
-            raise ValueError(
-                "Error finding dns records for {dns_zone}: status_code={status_code} response={response}".format(
-                    dns_zone=self.RACKSPACE_DNS_ZONE,
-                    status_code=find_dns_record_id_response.status_code,
-                    response=self.log_response(find_dns_record_id_response),
-                )
-            )
-        records = find_dns_record_id_response.json()["records"]
+
+    async def async_list_dns_records(self, dns_zone_id):
+        return await self.async_list_all(
+            "domains/{0}/records".format(dns_zone_id),
+            "records",
+            "Error finding dns records for {0}".format(dns_zone_id),
+            type="TXT",
+        )
+
+    def find_dns_record_id(self, domain_name, domain_dns_value, dns_zone_id=None):
+        """
+        returns the id of the record of domain_name with the value domain_dns_value.
+        the zone of domain_name is looked up unless its id is given.
+        """
+        self.logger.debug("find_dns_record_id")
+        if dns_zone_id is None:
+            dns_zone_id = self.find_dns_zone_id(domain_name)
+        records = self.list_dns_records(dns_zone_id)
+        return self.match_dns_record_id(domain_name, domain_dns_value, records)
+
+    async def async_find_dns_record_id(self, domain_name, domain_dns_value, dns_zone_id=None):
+        self.logger.debug("find_dns_record_id")
+        if dns_zone_id is None:
+            dns_zone_id = await self.async_find_dns_zone_id(domain_name)
+        records = await self.async_list_dns_records(dns_zone_id)
+        return self.match_dns_record_id(domain_name, domain_dns_value, records)
+
+    def match_dns_record_id(self, domain_name, domain_dns_value, records):
+        """
+        returns the id of the record in records whose data is domain_dns_value.
+        """
         RACKSPACE_RECORD_DATA = next(
             (item for item in records if item["data"] == domain_dns_value), None
         )
@@ -125,7 +490,7 @@ class RackspaceDns(common.BaseDns):
                 "Couldn't find record with name {domain_name}\ncontaining data: {domain_dns_value}\nin the response data:{response_data}".format(
                     domain_name=domain_name,
                     domain_dns_value=domain_dns_value,
-                    response_data=self.log_response(find_dns_record_id_response),
+                    response_data=records,
                 )
             )
         record_id = RACKSPACE_RECORD_DATA["id"]
@@ -133,48 +498,201 @@ class RackspaceDns(common.BaseDns):
         return record_id
 
     def poll_callback_url(self, callback_url):
-        start_time = time.time()
-        while True:
-            callback_url_response = requests.get(callback_url, headers=self.RACKSPACE_HEADERS)
-            if time.time() > start_time + self.HTTP_TIMEOUT:
-                raise ValueError(
-                    "Timed out polling callbackurl for dns record status.  Last status_code={status_code} last response={response}".format(
-                        status_code=callback_url_response.status_code,
-                        response=self.log_response(callback_url_response),
-                    )
-                )
-            if callback_url_response.status_code != 200:
-                raise Exception(
-                    "Could not get dns record status from callback url.  Status code ={status_code}. response={response}".format(
-                        status_code=callback_url_response.status_code,
-                        response=self.log_response(callback_url_response),
-                    )
+        self.poll_callback_urls([callback_url])
+
+    async def async_poll_callback_url(self, callback_url):
+        await self.async_poll_callback_urls([callback_url])
+
+    def poll_callback_urls(self, callback_urls):
+        """
+        waits until the jobs of all the callback_urls are completed. every round polls the jobs
+        that are still running, then waits with the backoff of self.poller.
+        raises an error as soon as a job fails, and TimeoutError if they do not all complete in time.
+        """
+        running = list(collections.OrderedDict.fromkeys(callback_urls))
+        self.poller.poll(
+            lambda: [(i, self.api_request("GET", i, timeout=self.HTTP_TIMEOUT)) for i in running],
+            lambda responses: self.remove_completed_callbacks(running, responses),
+            description="rackspace_callback",
+        )
+
+    async def async_poll_callback_urls(self, callback_urls):
+        running = list(collections.OrderedDict.fromkeys(callback_urls))
+
+        async def request():
+            responses = await asyncio.gather(
+                *[self.async_api_request("GET", i, timeout=self.HTTP_TIMEOUT) for i in running]
+            )
+            return list(zip(running, responses))
+
+        await self.poller.poll_async(
+            request,
+            lambda responses: self.remove_completed_callbacks(running, responses),
+            description="rackspace_callback",
+        )
+
+    def remove_completed_callbacks(self, running, responses):
+        """
+        removes the callback urls of the completed jobs in responses from running.
+        returns True when no job is running anymore.
+        """
+        for callback_url, callback_url_response in responses:
+            if self.is_callback_completed(callback_url_response):
+                running.remove(callback_url)
+        return not running
+
+    def is_callback_completed(self, callback_url_response):
+        """
+        returns True when the job of callback_url_response is completed, and raises an error if it failed.
+        """
+        if callback_url_response.status_code != 200:
+            raise Exception(
+                "Could not get dns record status from callback url.  Status code ={status_code}. response={response}".format(
+                    status_code=callback_url_response.status_code,
+                    response=self.log_response(callback_url_response),
                 )
-            if callback_url_response.json()["status"] == "ERROR":
-                raise Exception(
-                    "Error in creating/deleting dns record: status_Code={status_code}. response={response}".format(
-                        status_code=callback_url_response.status_code,
-                        response=self.log_response(callback_url_response),
-                    )
+            )
+        status = callback_url_response.json()["status"]
+        if status == "ERROR":
+            raise Exception(
+                "Error in creating/deleting dns record: status_Code={status_code}. response={response}".format(
+                    status_code=callback_url_response.status_code,
+                    response=self.log_response(callback_url_response),
                 )
-            if callback_url_response.json()["status"] == "COMPLETED":
-                break
+            )
+        return status == "COMPLETED"
 
-    def create_dns_record(self, domain_name, domain_dns_value):
-        self.logger.info("create_dns_record")
-        # strip wildcard if present
-        domain_name = domain_name.lstrip("*.")
-        self.RACKSPACE_DNS_ZONE_ID = self.find_dns_zone_id(domain_name)
-        record_name = "_acme-challenge." + domain_name
+    def get_create_dns_records_request(self, dns_zone_id, dns_names):
+        """
+        returns the url and body of the request that creates the records of all the
+        (domain_name, domain_dns_value) pairs in dns_names in the zone dns_zone_id.
+        """
         url = urllib.parse.urljoin(
-            self.RACKSPACE_API_BASE_URL, "domains/{0}/records".format(self.RACKSPACE_DNS_ZONE_ID)
+            self.RACKSPACE_API_BASE_URL, "domains/{0}/records".format(dns_zone_id)
         )
         body = {
-            "records": [{"name": record_name, "type": "TXT", "data": domain_dns_value, "ttl": 3600}]
+            "records": [
+                {
+                    "name": "_acme-challenge." + common.strip_wildcard(domain_name),
+                    "type": "TXT",
+                    "data": domain_dns_value,
+                    "ttl": 3600,
+                }
+                for domain_name, domain_dns_value in dns_names
+            ]
         }
-        create_rackspace_dns_record_response = requests.post(
-            url, headers=self.RACKSPACE_HEADERS, json=body, timeout=self.HTTP_TIMEOUT
+        return url, body
+
+    def create_dns_record(self, domain_name, domain_dns_value):
+        self.logger.info("create_dns_record")
+        # strip wildcard if present
+        domain_name = common.strip_wildcard(domain_name)
+        dns_zone_id = self.find_dns_zone_id(domain_name)
+        url, body = self.get_create_dns_records_request(
+            dns_zone_id, [(domain_name, domain_dns_value)]
+        )
+        create_rackspace_dns_record_response = self.api_request(
+            "POST", url, json=body, timeout=self.HTTP_TIMEOUT
+        )
+        callback_url = self.get_create_dns_record_callback_url(create_rackspace_dns_record_response)
+        self.poll_callback_url(callback_url)
+        self.logger.info(
+            "create_dns_record_success. Name: {record_name} Data: {data}".format(
+                record_name="_acme-challenge." + domain_name, data=domain_dns_value
+            )
+        )
+
+    async def async_create_dns_record(self, domain_name, domain_dns_value):
+        self.logger.info("create_dns_record")
+        domain_name = common.strip_wildcard(domain_name)
+        dns_zone_id = await self.async_find_dns_zone_id(domain_name)
+        url, body = self.get_create_dns_records_request(
+            dns_zone_id, [(domain_name, domain_dns_value)]
+        )
+        create_rackspace_dns_record_response = await self.async_api_request(
+            "POST", url, json=body, timeout=self.HTTP_TIMEOUT
+        )
+        callback_url = self.get_create_dns_record_callback_url(create_rackspace_dns_record_response)
+        await self.async_poll_callback_url(callback_url)
+        self.logger.info(
+            "create_dns_record_success. Name: {record_name} Data: {data}".format(
+                record_name="_acme-challenge." + domain_name, data=domain_dns_value
+            )
+        )
+
+    def group_by_dns_zone(self, dns_names):
+        """
+        returns an OrderedDict of the zone name of the records in dns_names, and the
+        (domain_name, domain_dns_value) pairs in that zone.
+        """
+        dns_zones = collections.OrderedDict()
+        for domain_name, domain_dns_value in dns_names:
+            dns_zone = self.get_dns_zone_name(common.strip_wildcard(domain_name))
+            dns_zones.setdefault(dns_zone, []).append((domain_name, domain_dns_value))
+        return dns_zones
+
+    def create_dns_records(self, dns_names, max_workers=1):
+        """
+        creates all the records of a zone with one request, then waits for the callback urls
+        of all the zones together.
+        see sewer.BaseDns.create_dns_records
+        """
+        self.logger.info("create_dns_records. dns_names={0}".format(len(dns_names)))
+        created = []
+        callback_urls = []
+        try:
+            for zone_dns_names in self.group_by_dns_zone(dns_names).values():
+                callback_urls.append(self.add_dns_records(zone_dns_names))
+                created.extend(zone_dns_names)
+            self.poll_callback_urls(callback_urls)
+        except Exception:
+            if created:
+                try:
+                    self.delete_dns_records(created, max_workers)
+                except Exception as e:
+                    self.logger.error("Unable to delete dns records. error={0}".format(str(e)))
+            raise
+        self.logger.info("create_dns_records_success")
+
+    async def async_create_dns_records(self, dns_names, max_workers=1):
+        self.logger.info("create_dns_records. dns_names={0}".format(len(dns_names)))
+        created = []
+        callback_urls = []
+        try:
+            for zone_dns_names in self.group_by_dns_zone(dns_names).values():
+                callback_urls.append(await self.async_add_dns_records(zone_dns_names))
+                created.extend(zone_dns_names)
+            await self.async_poll_callback_urls(callback_urls)
+        except Exception:
+            if created:
+                try:
+                    await self.async_delete_dns_records(created, max_workers)
+                except Exception as e:
+                    self.logger.error("Unable to delete dns records. error={0}".format(str(e)))
+            raise
+        self.logger.info("create_dns_records_success")
+
+    def add_dns_records(self, dns_names):
+        """
+        starts the job that creates the records of dns_names, which are all in one zone, with one
+        request. returns the callback url of the job.
+        """
+        dns_zone_id = self.find_dns_zone_id(common.strip_wildcard(dns_names[0][0]))
+        url, body = self.get_create_dns_records_request(dns_zone_id, dns_names)
+        create_rackspace_dns_record_response = self.api_request(
+            "POST", url, json=body, timeout=self.HTTP_TIMEOUT
         )
+        return self.get_create_dns_record_callback_url(create_rackspace_dns_record_response)
+
+    async def async_add_dns_records(self, dns_names):
+        dns_zone_id = await self.async_find_dns_zone_id(common.strip_wildcard(dns_names[0][0]))
+        url, body = self.get_create_dns_records_request(dns_zone_id, dns_names)
+        create_rackspace_dns_record_response = await self.async_api_request(
+            "POST", url, json=body, timeout=self.HTTP_TIMEOUT
+        )
+        return self.get_create_dns_record_callback_url(create_rackspace_dns_record_response)
+
+    def get_create_dns_record_callback_url(self, create_rackspace_dns_record_response):
         self.logger.debug(
             "create_rackspace_dns_record_response. status_code={status_code}".format(
                 status_code=create_rackspace_dns_record_response.status_code
@@ -187,26 +705,144 @@ class RackspaceDns(common.BaseDns):
                     response=create_rackspace_dns_record_response.text,
                 )
             )
-            # response=self.log_response(create_rackspace_dns_record_response)))
-            # After posting the dns record we want created, the response gives us a url to check that will
+        # After posting the dns record we want created, the response gives us a url to check that will
         # update when the job is done
-        callback_url = create_rackspace_dns_record_response.json()["callbackUrl"]
+        return create_rackspace_dns_record_response.json()["callbackUrl"]
+
+    def get_delete_dns_record_url(self, dns_zone_id, record_id):
+        return self.RACKSPACE_API_BASE_URL + "domains/{domain_id}/records/?id={record_id}".format(
+            domain_id=dns_zone_id, record_id=record_id
+        )
+
+    def delete_dns_record(self, domain_name, domain_dns_value):
+        self.logger.info("delete_dns_record")
+        record_name = "_acme-challenge." + domain_name
+        dns_zone_id = self.find_dns_zone_id(domain_name)
+        record_id = self.find_dns_record_id(domain_name, domain_dns_value, dns_zone_id)
+        delete_dns_record_response = self.api_request(
+            "DELETE", self.get_delete_dns_record_url(dns_zone_id, record_id)
+        )
+        callback_url = self.get_delete_dns_record_callback_url(delete_dns_record_response)
         self.poll_callback_url(callback_url)
         self.logger.info(
-            "create_dns_record_success. Name: {record_name} Data: {data}".format(
+            "delete_dns_record_success. Name: {record_name} Data: {data}".format(
                 record_name=record_name, data=domain_dns_value
             )
         )
 
-    def delete_dns_record(self, domain_name, domain_dns_value):
+    async def async_delete_dns_record(self, domain_name, domain_dns_value):
         self.logger.info("delete_dns_record")
         record_name = "_acme-challenge." + domain_name
-        self.RACKSPACE_DNS_ZONE_ID = self.find_dns_zone_id(domain_name)
-        self.RACKSPACE_RECORD_ID = self.find_dns_record_id(domain_name, domain_dns_value)
-        url = self.RACKSPACE_API_BASE_URL + "domains/{domain_id}/records/?id={record_id}".format(
-            domain_id=self.RACKSPACE_DNS_ZONE_ID, record_id=self.RACKSPACE_RECORD_ID
+        dns_zone_id = await self.async_find_dns_zone_id(domain_name)
+        record_id = await self.async_find_dns_record_id(domain_name, domain_dns_value, dns_zone_id)
+        delete_dns_record_response = await self.async_api_request(
+            "DELETE", self.get_delete_dns_record_url(dns_zone_id, record_id)
+        )
+        callback_url = self.get_delete_dns_record_callback_url(delete_dns_record_response)
+        await self.async_poll_callback_url(callback_url)
+        self.logger.info(
+            "delete_dns_record_success. Name: {record_name} Data: {data}".format(
+                record_name=record_name, data=domain_dns_value
+            )
+        )
+
+    def get_delete_dns_records_url(self, dns_zone_id, record_ids):
+        return urllib.parse.urljoin(
+            self.RACKSPACE_API_BASE_URL,
+            "domains/{0}/records?{1}".format(
+                dns_zone_id, urllib.parse.urlencode([("id", i) for i in record_ids])
+            ),
+        )
+
+    def delete_dns_records(self, dns_names, max_workers=1):
+        """
+        lists the TXT records of every zone once and deletes all the records of a zone with one
+        request, then waits for the callback urls of all the zones together.
+        see sewer.BaseDns.delete_dns_records
+        """
+        self.logger.info("delete_dns_records. dns_names={0}".format(len(dns_names)))
+        callback_urls = []
+        errors = []
+        for zone_dns_names in self.group_by_dns_zone(dns_names).values():
+            try:
+                callback_url = self.remove_dns_records(zone_dns_names)
+            except Exception as e:
+                errors.append(e)
+                continue
+            if callback_url is not None:
+                callback_urls.append(callback_url)
+        if callback_urls:
+            self.poll_callback_urls(callback_urls)
+        self.raise_first_error(errors)
+        self.logger.info("delete_dns_records_success")
+
+    async def async_delete_dns_records(self, dns_names, max_workers=1):
+        self.logger.info("delete_dns_records. dns_names={0}".format(len(dns_names)))
+        callback_urls = []
+        errors = []
+        for zone_dns_names in self.group_by_dns_zone(dns_names).values():
+            try:
+                callback_url = await self.async_remove_dns_records(zone_dns_names)
+            except Exception as e:
+                errors.append(e)
+                continue
+            if callback_url is not None:
+                callback_urls.append(callback_url)
+        if callback_urls:
+            await self.async_poll_callback_urls(callback_urls)
+        self.raise_first_error(errors)
+        self.logger.info("delete_dns_records_success")
+
+    def remove_dns_records(self, dns_names):
+        """
+        starts the job that deletes the records of dns_names, which are all in one zone, with one
+        request. returns the callback url of the job, or None if none of the records were found.
+        """
+        dns_zone_id = self.find_dns_zone_id(common.strip_wildcard(dns_names[0][0]))
+        records = self.list_dns_records(dns_zone_id)
+        record_ids = self.get_dns_record_ids(dns_names, records)
+        if not record_ids:
+            return None
+        delete_dns_record_response = self.api_request(
+            "DELETE",
+            self.get_delete_dns_records_url(dns_zone_id, record_ids),
+            timeout=self.HTTP_TIMEOUT,
         )
-        delete_dns_record_response = requests.delete(url, headers=self.RACKSPACE_HEADERS)
+        return self.get_delete_dns_record_callback_url(delete_dns_record_response)
+
+    async def async_remove_dns_records(self, dns_names):
+        dns_zone_id = await self.async_find_dns_zone_id(common.strip_wildcard(dns_names[0][0]))
+        records = await self.async_list_dns_records(dns_zone_id)
+        record_ids = self.get_dns_record_ids(dns_names, records)
+        if not record_ids:
+            return None
+        delete_dns_record_response = await self.async_api_request(
+            "DELETE",
+            self.get_delete_dns_records_url(dns_zone_id, record_ids),
+            timeout=self.HTTP_TIMEOUT,
+        )
+        return self.get_delete_dns_record_callback_url(delete_dns_record_response)
+
+    def get_dns_record_ids(self, dns_names, records):
+        """
+        returns the ids of the records in records of the (domain_name, domain_dns_value) pairs in
+        dns_names, without duplicates. a pair that has no record, eg because it was already deleted,
+        is logged and skipped, so that it does not keep the others from being deleted.
+        """
+        record_ids = collections.OrderedDict()
+        for domain_name, domain_dns_value in dns_names:
+            record_id = next((i["id"] for i in records if i["data"] == domain_dns_value), None)
+            if record_id is None:
+                self.logger.warning(
+                    "Couldn't find record with name {0} containing data: {1}. skipping it".format(
+                        "_acme-challenge." + common.strip_wildcard(domain_name), domain_dns_value
+                    )
+                )
+                continue
+            record_ids[record_id] = None
+        return list(record_ids)
+
+    def get_delete_dns_record_callback_url(self, delete_dns_record_response):
         # After sending a delete request, if all goes well, we get a 202 from the server and a URL that we can poll
         # to see when the job is done
         self.logger.debug(
@@ -219,10 +855,4 @@ class RackspaceDns(common.BaseDns):
                     response=self.log_response(delete_dns_record_response),
                 )
             )
-        callback_url = delete_dns_record_response.json()["callbackUrl"]
-        self.poll_callback_url(callback_url)
-        self.logger.info(
-            "delete_dns_record_success. Name: {record_name} Data: {data}".format(
-                record_name=record_name, data=domain_dns_value
-            )
-        )
+        return delete_dns_record_response.json()["callbackUrl"]
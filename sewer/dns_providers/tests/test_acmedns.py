@@ -1,3 +1,4 @@
+import asyncio
 import mock
 import json
 from unittest import TestCase
@@ -33,9 +34,13 @@ class Testacmedns(TestCase):
         pass
 
     def test_acmedns_is_called_by_create_dns_record(self):
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
+        with mock.patch.object(
+            self.dns_class.http_session, "post"
+        ) as mock_requests_post, mock.patch(
             "sewer.AcmeDnsDns.delete_dns_record"
-        ) as mock_delete_dns_record, mock.patch("dns.resolver.Resolver.query") as mock_dns_resolver:
+        ) as mock_delete_dns_record, mock.patch(
+            "dns.resolver.Resolver.query"
+        ) as mock_dns_resolver:
             mock_requests_post.return_value = (
                 mock_delete_dns_record.return_value
             ) = test_utils.MockResponse()
@@ -55,9 +60,29 @@ class Testacmedns(TestCase):
             )
 
     def test_acmedns_is_not_called_by_delete_dns_record(self):
-        with mock.patch("requests.post") as mock_requests_post:
+        with mock.patch.object(self.dns_class.http_session, "post") as mock_requests_post:
             mock_requests_post.return_value = test_utils.MockResponse()
             self.dns_class.delete_dns_record(
                 domain_name=self.domain_name, domain_dns_value=self.domain_dns_value
             )
             self.assertFalse(mock_requests_post.called)
+
+    def test_acmedns_is_called_by_async_create_dns_record(self):
+        with mock.patch("sewer.AcmeDnsDns.async_request") as mock_async_request, mock.patch(
+            "dns.resolver.Resolver.query"
+        ) as mock_dns_resolver:
+            mock_async_request.return_value = test_utils.MockResponse()
+            mock_dns_resolver.return_value = test_utils.MockDnsResolver()
+            asyncio.run(
+                self.dns_class.async_create_dns_record(
+                    domain_name=self.domain_name, domain_dns_value=self.domain_dns_value
+                )
+            )
+            self.assertDictEqual(
+                {"X-Api-User": self.acmedns_API_USER, "X-Api-Key": self.acmedns_API_KEY},
+                mock_async_request.call_args[1]["headers"],
+            )
+            self.assertDictEqual(
+                {"subdomain": "canonical", "txt": self.domain_dns_value},
+                mock_async_request.call_args[1]["json"],
+            )
@@ -1,6 +1,8 @@
 import mock
+from concurrent import futures
 from unittest import TestCase
 import sewer
+from sewer.dns_providers.aliyundns import _ResponseForAliyun
 from . import test_utils
 
 
@@ -74,3 +76,119 @@ class TestAliyunDNS(TestCase):
                 domain_name=self.domain_name, domain_dns_value=self.domain_dns_value
             )
             self.assertFalse(mock_requests_post.called)
+
+    @staticmethod
+    def records_page(records, total_count):
+        return _ResponseForAliyun(
+            200,
+            {
+                "DomainRecords": {
+                    "Record": [
+                        {"RR": rr, "Value": value, "RecordId": record_id, "Type": "TXT"}
+                        for rr, value, record_id in records
+                    ]
+                },
+                "TotalCount": total_count,
+            },
+        )
+
+    def test_response_is_decoded_once(self):
+        content = {"RecordId": "record-1"}
+        self.assertIs(_ResponseForAliyun(200, content).json(), content)
+
+    def test_created_record_is_deleted_by_record_id(self):
+        with mock.patch("sewer.AliyunDns._send_reqeust") as mock_send_request:
+            mock_send_request.side_effect = [
+                _ResponseForAliyun(200, {"RecordId": "record-1"}),
+                _ResponseForAliyun(200, {"RecordId": "record-1"}),
+            ]
+            self.dns_class.create_dns_record("*." + self.domain_name, self.domain_dns_value)
+            self.dns_class.delete_dns_record("*." + self.domain_name, self.domain_dns_value)
+
+            self.assertEqual(mock_send_request.call_count, 2)
+            delete_request = mock_send_request.call_args[0][0]
+            self.assertEqual(delete_request.get_action_name(), "DeleteDomainRecord")
+            self.assertEqual(delete_request.get_query_params()["RecordId"], "record-1")
+
+    def test_failed_delete_is_logged(self):
+        with mock.patch("sewer.AliyunDns._send_reqeust") as mock_send_request, mock.patch.object(
+            self.dns_class.logger, "warning"
+        ) as mock_warning:
+            mock_send_request.return_value = _ResponseForAliyun(
+                200, {"Code": "DomainRecordNotBelongToUser", "Success": False}
+            )
+            self.dns_class.delete_dns_record_id("record-1")
+            mock_warning.assert_called_once()
+            self.assertIn("record-1", mock_warning.call_args[0])
+
+            mock_warning.reset_mock()
+            mock_send_request.return_value = _ResponseForAliyun(200, {"RequestId": "request-1"})
+            self.dns_class.delete_dns_record_id("record-1")
+            mock_warning.assert_not_called()
+
+    def test_every_thread_has_its_own_acs_client(self):
+        clt = self.dns_class.clt
+        self.assertIs(self.dns_class.clt, clt)
+        with futures.ThreadPoolExecutor(max_workers=1) as executor:
+            other_clt = executor.submit(lambda: self.dns_class.clt).result()
+        self.assertIsNot(other_clt, clt)
+
+    def test_missing_record_is_logged(self):
+        with mock.patch("sewer.AliyunDns.query_all_recored_items") as mock_query, mock.patch.object(
+            self.dns_class.logger, "warning"
+        ) as mock_warning:
+            mock_query.return_value = []
+            self.assertIsNone(
+                self.dns_class.delete_dns_record(self.domain_name, self.domain_dns_value)
+            )
+            mock_warning.assert_called_once_with(
+                "failed to find record_id of domain: %s, value: %s",
+                self.domain_name,
+                self.domain_dns_value,
+            )
+
+    def test_query_all_recored_items_is_paginated(self):
+        self.dns_class.PAGE_SIZE = 2
+        with mock.patch("sewer.AliyunDns._send_reqeust") as mock_send_request:
+            mock_send_request.side_effect = [
+                self.records_page([("a", "1", "record-1"), ("b", "2", "record-2")], 3),
+                self.records_page([("c", "3", "record-3")], 3),
+            ]
+            records = self.dns_class.query_all_recored_items(self.domain_name, tipe="TXT")
+            self.assertEqual([i["RecordId"] for i in records], ["record-1", "record-2", "record-3"])
+            self.assertEqual(
+                [
+                    i[0][0].get_query_params()["PageNumber"]
+                    for i in mock_send_request.call_args_list
+                ],
+                [1, 2],
+            )
+
+    def test_unknown_records_are_found_in_the_txt_index_of_their_zone(self):
+        self.dns_class.PAGE_SIZE = 2
+        with mock.patch("sewer.AliyunDns._send_reqeust") as mock_send_request:
+            mock_send_request.side_effect = [
+                self.records_page(
+                    [("_acme-challenge", "value-1", "record-1"), ("_acme-challenge", "other", "x")],
+                    3,
+                ),
+                self.records_page([("_acme-challenge.sub", "value-2", "record-2")], 3),
+                _ResponseForAliyun(200, {}),
+                _ResponseForAliyun(200, {}),
+            ]
+            self.dns_class.delete_dns_records(
+                [(self.domain_name, "value-1"), ("*.sub." + self.domain_name, "value-2")]
+            )
+            requests = [i[0][0] for i in mock_send_request.call_args_list]
+            self.assertEqual(
+                [i.get_action_name() for i in requests],
+                [
+                    "DescribeDomainRecords",
+                    "DescribeDomainRecords",
+                    "DeleteDomainRecord",
+                    "DeleteDomainRecord",
+                ],
+            )
+            self.assertEqual(
+                [i.get_query_params()["RecordId"] for i in requests[2:]], ["record-1", "record-2"]
+            )
@@ -1,5 +1,10 @@
-import mock
 import json
+import asyncio
+import urllib.parse
+import concurrent.futures
+
+import mock
+import requests
 from unittest import TestCase
 
 import sewer
@@ -33,9 +38,13 @@ class TestCloudflare(TestCase):
         pass
 
     def test_delete_dns_record_is_not_called_by_create_dns_record(self):
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
-            "requests.get"
-        ) as mock_requests_get, mock.patch("requests.delete") as mock_requests_delete, mock.patch(
+        with mock.patch.object(
+            self.dns_class.http_session, "post"
+        ) as mock_requests_post, mock.patch.object(
+            self.dns_class.http_session, "get"
+        ) as mock_requests_get, mock.patch.object(
+            self.dns_class.http_session, "delete"
+        ) as mock_requests_delete, mock.patch(
             "sewer.CloudFlareDns.delete_dns_record"
         ) as mock_delete_dns_record:
             mock_requests_post.return_value = (
@@ -50,9 +59,13 @@ class TestCloudflare(TestCase):
             self.assertFalse(mock_delete_dns_record.called)
 
     def test_cloudflare_is_called_by_create_dns_record(self):
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
-            "requests.get"
-        ) as mock_requests_get, mock.patch("requests.delete") as mock_requests_delete, mock.patch(
+        with mock.patch.object(
+            self.dns_class.http_session, "post"
+        ) as mock_requests_post, mock.patch.object(
+            self.dns_class.http_session, "get"
+        ) as mock_requests_get, mock.patch.object(
+            self.dns_class.http_session, "delete"
+        ) as mock_requests_delete, mock.patch(
             "sewer.CloudFlareDns.delete_dns_record"
         ) as mock_delete_dns_record:
             mock_requests_post.return_value = (
@@ -79,9 +92,13 @@ class TestCloudflare(TestCase):
             )
 
     def test_cloudflare_is_called_by_delete_dns_record(self):
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
-            "requests.get"
-        ) as mock_requests_get, mock.patch("requests.delete") as mock_requests_delete:
+        with mock.patch.object(
+            self.dns_class.http_session, "post"
+        ) as mock_requests_post, mock.patch.object(
+            self.dns_class.http_session, "get"
+        ) as mock_requests_get, mock.patch.object(
+            self.dns_class.http_session, "delete"
+        ) as mock_requests_delete:
             mock_requests_post.return_value = (
                 mock_requests_delete.return_value
             ) = test_utils.MockResponse()
@@ -101,6 +118,304 @@ class TestCloudflare(TestCase):
             }
             self.assertDictEqual(expected, mock_requests_delete.call_args[1])
             self.assertIn(
-                "https://some-mock-url.com/zones/None/dns_records/some-mock-dns-zone-id",
+                "https://some-mock-url.com/zones/some-mock-dns-zone-id/dns_records/some-mock-dns-zone-id",
                 str(mock_requests_delete.call_args),
             )
+
+    def test_unknown_wildcard_record_is_deleted_in_the_zone_of_its_name(self):
+        with mock.patch.object(
+            self.dns_class.http_session, "get"
+        ) as mock_requests_get, mock.patch.object(
+            self.dns_class.http_session, "delete"
+        ) as mock_requests_delete:
+            zones = self.mock_zones([[("example.com", "zone-1"), ("example.org", "zone-2")]])
+            mock_requests_get.side_effect = lambda url, **kwargs: (
+                zones(url) if "zones?" in url else self.mock_response({"result": [{"id": "r-1"}]})
+            )
+            mock_requests_delete.return_value = self.mock_response({"result": {}})
+            # another record was looked up last; the shared CLOUDFLARE_DNS_ZONE_ID is not used.
+            self.dns_class.find_dns_zone("example.com")
+
+            self.dns_class.delete_dns_record("*.example.org", "value-1")
+            self.assertEqual(
+                mock_requests_get.call_args[0][0],
+                "https://some-mock-url.com/zones/zone-2/dns_records",
+            )
+            self.assertEqual(
+                mock_requests_get.call_args[1]["params"],
+                {"type": "TXT", "name": "_acme-challenge.example.org"},
+            )
+            self.assertEqual(
+                mock_requests_delete.call_args[0][0],
+                "https://some-mock-url.com/zones/zone-2/dns_records/r-1",
+            )
+
+    def test_cloudflare_is_called_by_async_create_dns_record(self):
+        with mock.patch.object(
+            self.dns_class.http_session, "post"
+        ) as mock_requests_post, mock.patch(
+            "sewer.CloudFlareDns.async_request"
+        ) as mock_async_request:
+            mock_async_request.return_value = test_utils.MockResponse()
+
+            asyncio.run(
+                self.dns_class.async_create_dns_record(
+                    domain_name=self.domain_name, domain_dns_value=self.domain_dns_value
+                )
+            )
+            self.assertFalse(mock_requests_post.called)
+            methods = [i[0][0] for i in mock_async_request.call_args_list]
+            self.assertEqual(methods, ["GET", "POST"])
+            self.assertDictEqual(
+                {"X-Auth-Email": self.CLOUDFLARE_EMAIL, "X-Auth-Key": self.CLOUDFLARE_API_KEY},
+                mock_async_request.call_args[1]["headers"],
+            )
+            self.assertDictEqual(
+                {
+                    "type": "TXT",
+                    "name": "_acme-challenge.example.com.",
+                    "content": self.domain_dns_value,
+                },
+                mock_async_request.call_args[1]["json"],
+            )
+            self.assertEqual(mock_async_request.call_args[1]["timeout"], 65)
+
+    def test_cloudflare_is_called_by_async_delete_dns_record(self):
+        with mock.patch("sewer.CloudFlareDns.async_request") as mock_async_request:
+            mock_async_request.return_value = test_utils.MockResponse()
+
+            asyncio.run(
+                self.dns_class.async_delete_dns_record(
+                    domain_name=self.domain_name, domain_dns_value=self.domain_dns_value
+                )
+            )
+            self.assertEqual(mock_async_request.call_args[0][0], "DELETE")
+            self.assertIn("some-mock-dns-zone-id", mock_async_request.call_args[0][1])
+
+    def test_zones_are_fetched_once_by_create_dns_records(self):
+        with mock.patch.object(
+            self.dns_class.http_session, "post"
+        ) as mock_requests_post, mock.patch.object(
+            self.dns_class.http_session, "get"
+        ) as mock_requests_get:
+            mock_requests_post.return_value = test_utils.MockResponse()
+            mock_requests_get.return_value = test_utils.MockResponse()
+
+            self.dns_class.create_dns_records(
+                [
+                    ("example.com", "value-1"),
+                    ("*.example.com", "value-2"),
+                    ("www.example.com", "value-3"),
+                ],
+                max_workers=3,
+            )
+            self.assertEqual(mock_requests_get.call_count, 1)
+            self.assertEqual(
+                sorted(i[1]["json"]["name"] for i in mock_requests_post.call_args_list),
+                [
+                    "_acme-challenge.example.com.",
+                    "_acme-challenge.example.com.",
+                    "_acme-challenge.www.example.com.",
+                ],
+            )
+            self.assertEqual(
+                mock_requests_post.call_args[0][0],
+                "https://some-mock-url.com/zones/some-mock-dns-zone-id/dns_records",
+            )
+
+    def test_records_of_a_name_are_deleted_once_by_async_delete_dns_records(self):
+        with mock.patch("sewer.CloudFlareDns.async_request") as mock_async_request:
+            mock_async_request.return_value = test_utils.MockResponse()
+
+            asyncio.run(
+                self.dns_class.async_delete_dns_records(
+                    [("example.com", "value-1"), ("*.example.com", "value-2")]
+                )
+            )
+            # the zones, the records of _acme-challenge.example.com and the one record.
+            methods = [i[0][0] for i in mock_async_request.call_args_list]
+            self.assertEqual(methods, ["GET", "GET", "DELETE"])
+
+    def mock_zones(self, pages):
+        """
+        returns a side_effect for http_session.get that lists the zones in pages.
+        """
+
+        def get(url, **kwargs):
+            page = int(urllib.parse.parse_qs(urllib.parse.urlparse(url).query)["page"][0])
+            result = [{"name": name, "id": zone_id} for name, zone_id in pages[page - 1]]
+            return self.mock_response(
+                {"result": result, "result_info": {"total_pages": len(pages)}}
+            )
+
+        return get
+
+    @staticmethod
+    def mock_response(content, status_code=200, headers=None):
+        response = test_utils.MockResponse(status_code)
+        response.content = json.dumps(content).encode()
+        response.headers = headers or {}
+        return response
+
+    def test_zones_are_listed_page_by_page(self):
+        with mock.patch.object(self.dns_class.http_session, "get") as mock_requests_get:
+            mock_requests_get.side_effect = self.mock_zones(
+                [[("example.org", "zone-1")], [("example.com", "zone-2")]]
+            )
+            self.assertEqual(self.dns_class.find_dns_zone_id("www.example.com"), "zone-2")
+            self.assertEqual(self.dns_class.find_dns_zone_id("example.org"), "zone-1")
+            self.assertEqual(mock_requests_get.call_count, 2)
+            self.assertIn("page=2&per_page=50", mock_requests_get.call_args[0][0])
+
+    def test_longest_matching_zone_is_used(self):
+        with mock.patch.object(self.dns_class.http_session, "get") as mock_requests_get:
+            mock_requests_get.side_effect = self.mock_zones(
+                [
+                    [
+                        ("example.com", "zone-1"),
+                        ("sub.example.com", "zone-2"),
+                        ("ample.com", "zone-3"),
+                    ]
+                ]
+            )
+            self.assertEqual(self.dns_class.find_dns_zone_id("a.sub.example.com"), "zone-2")
+            self.assertEqual(self.dns_class.find_dns_zone_id("sub.example.com"), "zone-2")
+            self.assertEqual(self.dns_class.find_dns_zone_id("a.example.com"), "zone-1")
+            self.assertEqual(self.dns_class.find_dns_zone_id("example.com"), "zone-1")
+            with self.assertRaises(ValueError):
+                self.dns_class.find_dns_zone_id("notexample.com")
+
+    def test_zone_index_is_fetched_again_when_it_is_stale(self):
+        with mock.patch.object(self.dns_class.http_session, "get") as mock_requests_get, mock.patch(
+            "time.monotonic"
+        ) as mock_monotonic:
+            mock_requests_get.side_effect = self.mock_zones([[("example.com", "zone-1")]])
+            mock_monotonic.return_value = 1000
+            self.dns_class.find_dns_zone_id("example.com")
+            mock_monotonic.return_value = 1000 + 3600
+            self.dns_class.find_dns_zone_id("example.com")
+            self.assertEqual(mock_requests_get.call_count, 1)
+
+            mock_monotonic.return_value = 1000 + 3601
+            self.dns_class.find_dns_zone_id("example.com")
+            self.assertEqual(mock_requests_get.call_count, 2)
+
+    def test_zone_index_is_fetched_again_for_an_unknown_zone(self):
+        with mock.patch.object(self.dns_class.http_session, "get") as mock_requests_get:
+            mock_requests_get.side_effect = self.mock_zones([[("example.com", "zone-1")]])
+            self.dns_class.find_dns_zone_id("example.com")
+            mock_requests_get.side_effect = self.mock_zones(
+                [[("example.com", "zone-1"), ("example.org", "zone-2")]]
+            )
+            self.assertEqual(self.dns_class.find_dns_zone_id("example.org"), "zone-2")
+            self.assertEqual(mock_requests_get.call_count, 2)
+
+    def test_zone_index_is_fetched_once_by_concurrent_threads(self):
+        with mock.patch.object(self.dns_class.http_session, "get") as mock_requests_get:
+            mock_requests_get.side_effect = self.mock_zones([[("example.com", "zone-1")]])
+            with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+                zone_ids = list(executor.map(self.dns_class.find_dns_zone_id, ["example.com"] * 8))
+            self.assertEqual(zone_ids, ["zone-1"] * 8)
+            self.assertEqual(mock_requests_get.call_count, 1)
+
+    def test_concurrent_async_records_are_created_in_their_own_zones(self):
+        zones = self.mock_zones([[("example.com", "zone-1"), ("example.org", "zone-2")]])
+
+        async def request(method, url, **kwargs):
+            # every task yields while the others look up their zones.
+            await asyncio.sleep(0)
+            if method == "GET":
+                return zones(url)
+            return self.mock_response({"result": {"id": url}})
+
+        async def create():
+            await asyncio.gather(
+                self.dns_class.async_create_dns_record("example.com", "value-1"),
+                self.dns_class.async_create_dns_record("*.example.org", "value-2"),
+            )
+
+        with mock.patch("sewer.CloudFlareDns.async_request", side_effect=request) as mock_request:
+            asyncio.run(create())
+            # the zones were fetched once, by the first task; the second waited for it.
+            methods = [i[0][0] for i in mock_request.call_args_list]
+            self.assertEqual(methods.count("GET"), 1)
+            self.assertEqual(
+                sorted(i[0][1] for i in mock_request.call_args_list if i[0][0] == "POST"),
+                [
+                    "https://some-mock-url.com/zones/zone-1/dns_records",
+                    "https://some-mock-url.com/zones/zone-2/dns_records",
+                ],
+            )
+
+    def test_created_records_are_deleted_by_id(self):
+        with mock.patch.object(
+            self.dns_class.http_session, "post"
+        ) as mock_requests_post, mock.patch.object(
+            self.dns_class.http_session, "get"
+        ) as mock_requests_get, mock.patch.object(
+            self.dns_class.http_session, "delete"
+        ) as mock_requests_delete:
+            mock_requests_get.side_effect = self.mock_zones(
+                [[("example.com", "zone-1"), ("example.org", "zone-2")]]
+            )
+            mock_requests_post.side_effect = [
+                self.mock_response({"result": {"id": "record-1"}}),
+                self.mock_response({"result": {"id": "record-2"}}),
+            ]
+            mock_requests_delete.return_value = self.mock_response({"result": {}})
+            dns_names = [("*.example.com", "value-1"), ("example.org", "value-2")]
+
+            self.dns_class.create_dns_records(dns_names)
+            self.dns_class.delete_dns_records(dns_names, max_workers=2)
+            # the zones were listed once, and the records were not listed at all.
+            self.assertEqual(mock_requests_get.call_count, 1)
+            self.assertEqual(
+                sorted(i[0][0] for i in mock_requests_delete.call_args_list),
+                [
+                    "https://some-mock-url.com/zones/zone-1/dns_records/record-1",
+                    "https://some-mock-url.com/zones/zone-2/dns_records/record-2",
+                ],
+            )
+
+            # the ids are forgotten once the records are deleted.
+            self.assertEqual(self.dns_class.pop_dns_record_ids(dns_names), ([], dns_names))
+
+    def test_rate_limited_delete_is_retried_with_a_plain_session(self):
+        self.dns_class.http_session = requests.Session()
+        with mock.patch.object(
+            self.dns_class.http_session, "delete"
+        ) as mock_requests_delete, mock.patch("time.sleep") as mock_sleep:
+            mock_requests_delete.side_effect = [
+                self.mock_response({"success": False}, 429, {"Retry-After": "2"}),
+                self.mock_response({"result": {"id": "record-1"}}),
+            ]
+            self.dns_class.delete_dns_record_id("zone-1", "record-1")
+            self.assertEqual(mock_requests_delete.call_count, 2)
+            self.assertEqual([i[0][0] for i in mock_sleep.call_args_list], [2.0])
+
+        with mock.patch.object(
+            self.dns_class.http_session, "delete"
+        ) as mock_requests_delete, mock.patch("time.sleep") as mock_sleep:
+            mock_requests_delete.return_value = self.mock_response({"success": False}, 429)
+            self.dns_class.delete_dns_record_id("zone-1", "record-1")
+            self.assertEqual(mock_requests_delete.call_count, self.dns_class.RATE_LIMIT_RETRIES + 1)
+
+    def test_rate_limited_delete_is_retried_after_retry_after(self):
+        with mock.patch("sewer.CloudFlareDns.async_request") as mock_async_request, mock.patch(
+            "asyncio.sleep"
+        ) as mock_sleep:
+            mock_async_request.side_effect = [
+                self.mock_response({"result": {"id": "record-1"}}),
+                self.mock_response({"success": False}, 429, {"Retry-After": "2"}),
+                self.mock_response({"success": False}, 429),
+                self.mock_response({"result": {"id": "record-1"}}),
+            ]
+            self.dns_class.set_zone_index({"example.com": "zone-1"})
+
+            asyncio.run(self.dns_class.async_create_dns_records([("example.com", "value-1")]))
+            asyncio.run(self.dns_class.async_delete_dns_records([("example.com", "value-1")]))
+            self.assertEqual([i[0][0] for i in mock_sleep.call_args_list], [2.0, 2])
+            self.assertEqual(
+                [i[0][0] for i in mock_async_request.call_args_list],
+                ["POST", "DELETE", "DELETE", "DELETE"],
+            )
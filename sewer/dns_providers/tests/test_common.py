@@ -1,5 +1,8 @@
+import asyncio
 from unittest import TestCase
 
+import mock
+
 import sewer
 
 
@@ -30,3 +33,75 @@ class TestCommon(TestCase):
             )
 
         self.assertRaises(NotImplementedError, mock_delete_dns_record)
+
+    def test_async_create_dns_record_runs_create_dns_record(self):
+        with mock.patch.object(self.dns_class, "create_dns_record") as mock_create_dns_record:
+            asyncio.run(
+                self.dns_class.async_create_dns_record(
+                    domain_name=self.domain_name, domain_dns_value=self.domain_dns_value
+                )
+            )
+            mock_create_dns_record.assert_called_once_with(self.domain_name, self.domain_dns_value)
+
+    def test_async_delete_dns_record_runs_delete_dns_record(self):
+        with mock.patch.object(self.dns_class, "delete_dns_record") as mock_delete_dns_record:
+            asyncio.run(
+                self.dns_class.async_delete_dns_record(
+                    domain_name=self.domain_name, domain_dns_value=self.domain_dns_value
+                )
+            )
+            mock_delete_dns_record.assert_called_once_with(self.domain_name, self.domain_dns_value)
+
+    def test_http_session_is_created_on_first_use(self):
+        with mock.patch("sewer.transport.create_session") as mock_create_session:
+            dns_class = sewer.BaseDns()
+            self.assertFalse(mock_create_session.called)
+            self.assertIs(dns_class.http_session, dns_class.http_session)
+            self.assertEqual(mock_create_session.call_count, 1)
+
+    def test_only_the_wildcard_label_is_stripped(self):
+        strip_wildcard = sewer.dns_providers.common.strip_wildcard
+        self.assertEqual(strip_wildcard("*.example.com"), "example.com")
+        self.assertEqual(strip_wildcard("example.com"), "example.com")
+        self.assertEqual(strip_wildcard("*.*.example.com"), "*.example.com")
+        self.assertEqual(
+            self.dns_class.get_record_names([("*.example.com", "a"), ("example.com", "b")]),
+            ["example.com"],
+        )
+
+    def test_create_dns_records_creates_every_record(self):
+        dns_names = [("example.com", "value-1"), ("*.example.com", "value-2")]
+        with mock.patch.object(self.dns_class, "create_dns_record") as mock_create_dns_record:
+            self.dns_class.create_dns_records(dns_names, max_workers=2)
+            self.assertEqual(
+                sorted(i[0] for i in mock_create_dns_record.call_args_list), sorted(dns_names)
+            )
+
+    def test_created_dns_records_are_deleted_when_one_fails(self):
+        def create_dns_record(domain_name, domain_dns_value):
+            if domain_name == "b.example.com":
+                raise ValueError("Error creating dns record")
+
+        dns_names = [("a.example.com", "1"), ("b.example.com", "2"), ("c.example.com", "3")]
+        with mock.patch.object(
+            self.dns_class, "create_dns_record", side_effect=create_dns_record
+        ), mock.patch.object(self.dns_class, "delete_dns_record") as mock_delete_dns_record:
+            with self.assertRaises(ValueError):
+                self.dns_class.create_dns_records(dns_names)
+            self.assertEqual(
+                [i[0] for i in mock_delete_dns_record.call_args_list],
+                [("a.example.com", "1"), ("c.example.com", "3")],
+            )
+
+    def test_async_created_dns_records_are_deleted_when_one_fails(self):
+        async def create_dns_record(domain_name, domain_dns_value):
+            if domain_name == "b.example.com":
+                raise ValueError("Error creating dns record")
+
+        dns_names = [("a.example.com", "1"), ("b.example.com", "2")]
+        with mock.patch.object(
+            self.dns_class, "async_create_dns_record", side_effect=create_dns_record
+        ), mock.patch.object(self.dns_class, "async_delete_dns_record") as mock_delete_dns_record:
+            with self.assertRaises(ValueError):
+                asyncio.run(self.dns_class.async_create_dns_records(dns_names, max_workers=2))
+            mock_delete_dns_record.assert_called_once_with("a.example.com", "1")
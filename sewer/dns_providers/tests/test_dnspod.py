@@ -1,3 +1,4 @@
+import asyncio
 import mock
 from unittest import TestCase
 
@@ -7,8 +8,7 @@ from . import test_utils
 
 
 class TestDNSPod(TestCase):
-    """
-    """
+    """ """
 
     def setUp(self):
         self.domain_name = "example.com"
@@ -52,10 +52,12 @@ class TestDNSPod(TestCase):
         pass
 
     def test_delete_dns_record_is_not_called_by_create_dns_record(
-        self
+        self,
     ):  # actually I don't know the purpose of this.
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
-            "requests.get"
+        with mock.patch.object(
+            self.dns_class.http_session, "post"
+        ) as mock_requests_post, mock.patch.object(
+            self.dns_class.http_session, "get"
         ) as mock_requests_get, mock.patch(
             "sewer.DNSPodDns.delete_dns_record"
         ) as mock_delete_dns_record:
@@ -70,9 +72,13 @@ class TestDNSPod(TestCase):
             self.assertFalse(mock_delete_dns_record.called)
 
     def test_dnspod_is_called_by_create_dns_record(self):
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
-            "requests.get"
-        ) as mock_requests_get, mock.patch("requests.delete") as mock_requests_delete, mock.patch(
+        with mock.patch.object(
+            self.dns_class.http_session, "post"
+        ) as mock_requests_post, mock.patch.object(
+            self.dns_class.http_session, "get"
+        ) as mock_requests_get, mock.patch.object(
+            self.dns_class.http_session, "delete"
+        ) as mock_requests_delete, mock.patch(
             "sewer.DNSPodDns.delete_dns_record"
         ) as mock_delete_dns_record:
             for test_data in self.test_datas:
@@ -99,9 +105,13 @@ class TestDNSPod(TestCase):
                 self.assertDictEqual(expected, mock_requests_post.call_args[1]["data"])
 
     def test_dnspod_is_called_by_delete_dns_record(self):
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
-            "requests.get"
-        ) as mock_requests_get, mock.patch("requests.delete") as mock_requests_delete:
+        with mock.patch.object(
+            self.dns_class.http_session, "post"
+        ) as mock_requests_post, mock.patch.object(
+            self.dns_class.http_session, "get"
+        ) as mock_requests_get, mock.patch.object(
+            self.dns_class.http_session, "delete"
+        ) as mock_requests_delete:
             for test_data in self.test_datas:
                 mock_resp = {
                     "status": {"code": "1", "message": "Action completed successful"},
@@ -132,9 +142,13 @@ class TestDNSPod(TestCase):
                 )
 
     def test_exception_is_raised_if_unsuccessful(self):
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
-            "requests.get"
-        ) as mock_requests_get, mock.patch("requests.delete") as mock_requests_delete, mock.patch(
+        with mock.patch.object(
+            self.dns_class.http_session, "post"
+        ) as mock_requests_post, mock.patch.object(
+            self.dns_class.http_session, "get"
+        ) as mock_requests_get, mock.patch.object(
+            self.dns_class.http_session, "delete"
+        ) as mock_requests_delete, mock.patch(
             "sewer.DNSPodDns.delete_dns_record"
         ) as mock_delete_dns_record:
             for test_data in self.test_datas:
@@ -151,3 +165,135 @@ class TestDNSPod(TestCase):
                     test_data["domain_name"],
                     domain_dns_value=self.domain_dns_value,
                 )
+
+    def test_dnspod_is_called_by_async_create_dns_record(self):
+        with mock.patch("sewer.DNSPodDns.async_request") as mock_async_request:
+            mock_resp = {"status": {"code": "1", "message": "Action completed successful"}}
+            mock_async_request.return_value = test_utils.MockResponse(content=mock_resp)
+            for test_data in self.test_datas:
+                asyncio.run(
+                    self.dns_class.async_create_dns_record(
+                        domain_name=test_data["domain_name"],
+                        domain_dns_value=test_data["domain_dns_value"],
+                    )
+                )
+                self.assertEqual(mock_async_request.call_args[0][0], "POST")
+                self.assertEqual(
+                    mock_async_request.call_args[1]["data"]["sub_domain"],
+                    test_data["expected_sub_domain_name"],
+                )
+
+    def test_async_create_dns_record_decodes_the_response_once(self):
+        with mock.patch("sewer.DNSPodDns.async_request") as mock_async_request:
+            mock_resp = test_utils.MockResponse(
+                content={"status": {"code": "1", "message": "ok"}, "record": {"id": "123456789"}}
+            )
+            mock_async_request.return_value = mock_resp
+            with mock.patch.object(mock_resp, "json", wraps=mock_resp.json) as mock_json:
+                asyncio.run(
+                    self.dns_class.async_create_dns_record(self.domain_name, self.domain_dns_value)
+                )
+                self.assertEqual(mock_json.call_count, 1)
+
+    def test_exception_is_raised_if_async_create_dns_record_is_unsuccessful(self):
+        with mock.patch("sewer.DNSPodDns.async_request") as mock_async_request:
+            mock_resp = {"status": {"code": "-1", "message": "Login failed"}}
+            mock_async_request.return_value = test_utils.MockResponse(content=mock_resp)
+            with self.assertRaises(ValueError):
+                asyncio.run(
+                    self.dns_class.async_create_dns_record(
+                        domain_name=self.domain_name, domain_dns_value=self.domain_dns_value
+                    )
+                )
+
+    def test_dnspod_is_called_by_async_delete_dns_record(self):
+        with mock.patch("sewer.DNSPodDns.async_request") as mock_async_request:
+            mock_resp = {
+                "status": {"code": "1", "message": "Action completed successful"},
+                "records": [{"id": "123456789", "name": "_acme-challenge", "type": "TXT"}],
+            }
+            mock_async_request.return_value = test_utils.MockResponse(content=mock_resp)
+            asyncio.run(
+                self.dns_class.async_delete_dns_record(
+                    domain_name=self.domain_name, domain_dns_value=self.domain_dns_value
+                )
+            )
+            self.assertEqual(
+                mock_async_request.call_args[0][1], "https://some-mock-url.com/Record.Remove"
+            )
+            self.assertEqual(mock_async_request.call_args[1]["data"]["record_id"], "123456789")
+
+    def test_records_of_a_name_are_listed_once_by_delete_dns_records(self):
+        with mock.patch.object(self.dns_class.http_session, "post") as mock_requests_post:
+            mock_resp = {
+                "status": {"code": "1", "message": "Action completed successful"},
+                "records": [{"id": "123456789", "name": "_acme-challenge", "type": "TXT"}],
+            }
+            mock_requests_post.return_value = test_utils.MockResponse(content=mock_resp)
+
+            self.dns_class.delete_dns_records(
+                [("example.com", "value-1"), ("*.example.com", "value-2")], max_workers=2
+            )
+            urls = [i[0][0] for i in mock_requests_post.call_args_list]
+            self.assertEqual(
+                urls,
+                [
+                    "https://some-mock-url.com/Record.List",
+                    "https://some-mock-url.com/Record.Remove",
+                ],
+            )
+
+    def test_created_records_are_removed_by_id(self):
+        with mock.patch.object(self.dns_class.http_session, "post") as mock_requests_post:
+            mock_requests_post.side_effect = [
+                test_utils.MockResponse(
+                    content={"status": {"code": "1", "message": "ok"}, "record": {"id": "record-1"}}
+                ),
+                test_utils.MockResponse(
+                    content={"status": {"code": "1", "message": "ok"}, "record": {"id": "record-2"}}
+                ),
+                test_utils.MockResponse(content={"status": {"code": "1", "message": "ok"}}),
+                test_utils.MockResponse(content={"status": {"code": "1", "message": "ok"}}),
+            ]
+            dns_names = [("*.example.com", "value-1"), ("sub1.example.com", "value-2")]
+            self.dns_class.create_dns_records(dns_names)
+            self.dns_class.delete_dns_records(dns_names, max_workers=2)
+
+            removes = mock_requests_post.call_args_list[2:]
+            self.assertEqual(
+                [i[0][0] for i in removes], ["https://some-mock-url.com/Record.Remove"] * 2
+            )
+            self.assertEqual(
+                sorted((i[1]["data"]["domain"], i[1]["data"]["record_id"]) for i in removes),
+                [("example.com", "record-1"), ("example.com", "record-2")],
+            )
+
+    def test_created_record_is_removed_by_id_by_async_delete_dns_record(self):
+        with mock.patch("sewer.DNSPodDns.async_request") as mock_async_request:
+            mock_async_request.side_effect = [
+                test_utils.MockResponse(
+                    content={"status": {"code": "1", "message": "ok"}, "record": {"id": "record-1"}}
+                ),
+                test_utils.MockResponse(content={"status": {"code": "1", "message": "ok"}}),
+            ]
+
+            async def create_and_delete():
+                await self.dns_class.async_create_dns_record("example.com", "value-1")
+                await self.dns_class.async_delete_dns_records([("example.com", "value-1")])
+
+            asyncio.run(create_and_delete())
+            self.assertEqual(
+                [i[0][1] for i in mock_async_request.call_args_list],
+                [
+                    "https://some-mock-url.com/Record.Create",
+                    "https://some-mock-url.com/Record.Remove",
+                ],
+            )
+            self.assertEqual(mock_async_request.call_args[1]["data"]["record_id"], "record-1")
+
+    def test_records_that_were_not_created_are_listed_by_their_sub_domain(self):
+        for test_data in self.test_datas:
+            url, body = self.dns_class.get_list_dns_records_request(test_data["domain_name"])
+            self.assertEqual(url, "https://some-mock-url.com/Record.List")
+            self.assertEqual(body["domain"], test_data["expected_domain_name"])
+            self.assertEqual(body["subdomain"], test_data["expected_sub_domain_name"])
@@ -1,7 +1,14 @@
+import os
+import time
+import asyncio
+import tempfile
+import threading
 import mock
 from unittest import TestCase
 
 import sewer
+from sewer import polling, transport
+from sewer.dns_providers.rackspace import parse_token_expires
 
 from . import test_utils
 
@@ -16,27 +23,42 @@ class TestRackspace(TestCase):
         self.RACKSPACE_USERNAME = "mock_username"
         self.RACKSPACE_API_KEY = "mock-api-key"
         self.RACKSPACE_API_TOKEN = "mock-api-token"
+        self.sleeps = []
+
+        # a token that does not expire, so that the provider never asks the identity service.
+        self.token_cache = sewer.RackspaceTokenCache()
+        self.token_cache.add(
+            self.RACKSPACE_USERNAME,
+            self.RACKSPACE_API_TOKEN,
+            "http://example.com/",
+            "2999-01-01T00:00:00.000Z",
+        )
 
         with mock.patch("requests.post") as mock_requests_post, mock.patch(
             "requests.get"
         ) as mock_requests_get, mock.patch(
-            "sewer.RackspaceDns.get_rackspace_credentials"
-        ) as mock_get_credentials, mock.patch(
             "sewer.RackspaceDns.find_dns_zone_id", autospec=True
         ) as mock_find_dns_zone_id:
             mock_requests_post.return_value = test_utils.MockResponse()
             mock_requests_get.return_value = test_utils.MockResponse()
-            mock_get_credentials.return_value = "mock-api-token", "http://example.com/"
             mock_find_dns_zone_id.return_value = "mock_zone_id"
             self.dns_class = sewer.RackspaceDns(
-                RACKSPACE_USERNAME=self.RACKSPACE_USERNAME, RACKSPACE_API_KEY=self.RACKSPACE_API_KEY
+                RACKSPACE_USERNAME=self.RACKSPACE_USERNAME,
+                RACKSPACE_API_KEY=self.RACKSPACE_API_KEY,
+                poller=polling.Poller(
+                    jitter=0, timeout=10, sleep=self.sleeps.append, async_sleep=self.async_sleep
+                ),
+                token_cache=self.token_cache,
             )
 
+    async def async_sleep(self, seconds):
+        self.sleeps.append(seconds)
+
     def tearDown(self):
         pass
 
     def test_find_dns_zone_id(self):
-        with mock.patch("requests.get") as mock_requests_get:
+        with mock.patch.object(self.dns_class.http_session, "get") as mock_requests_get:
             # see: https://developer.rackspace.com/docs/cloud-dns/v1/api-reference/domains/
             mock_dns_zone_id = 1_239_932
             mock_requests_content = {
@@ -57,8 +79,30 @@ class TestRackspace(TestCase):
             self.assertEqual(dns_zone_id, mock_dns_zone_id)
             self.assertTrue(mock_requests_get.called)
 
+    def test_concurrent_zone_lookups_fetch_the_domains_once(self):
+        domains = [{"name": "example.com", "id": "zone-1"}, {"name": "example.org", "id": "zone-2"}]
+
+        async def request(method, url, **kwargs):
+            await asyncio.sleep(0)
+            return test_utils.MockResponse(200, {"domains": domains, "totalEntries": 2})
+
+        async def find():
+            return await asyncio.gather(
+                self.dns_class.async_find_dns_zone_id("a.example.com"),
+                self.dns_class.async_find_dns_zone_id("a.example.org"),
+            )
+
+        with mock.patch(
+            "sewer.RackspaceDns.async_request", side_effect=request
+        ) as mock_async_request, mock.patch(
+            "sewer.RackspaceDns.get_dns_zone_name"
+        ) as mock_get_dns_zone_name:
+            mock_get_dns_zone_name.side_effect = lambda domain_name: domain_name.split(".", 1)[-1]
+            self.assertEqual(asyncio.run(find()), ["zone-1", "zone-2"])
+            self.assertEqual(mock_async_request.call_count, 1)
+
     def test_find_dns_record_id(self):
-        with mock.patch("requests.get") as mock_requests_get, mock.patch(
+        with mock.patch.object(self.dns_class.http_session, "get") as mock_requests_get, mock.patch(
             "sewer.RackspaceDns.find_dns_zone_id"
         ) as mock_find_dns_zone_id:
             # see: https://developer.rackspace.com/docs/cloud-dns/v1/api-reference/records/
@@ -88,10 +132,14 @@ class TestRackspace(TestCase):
             self.assertTrue(mock_find_dns_zone_id.called)
 
     def test_delete_dns_record_is_not_called_by_create_dns_record(self):
-        with mock.patch("sewer.RackspaceDns.find_dns_zone_id") as mock_find_dns_zone_id, mock.patch(
-            "requests.post"
-        ) as mock_requests_post, mock.patch("requests.get") as mock_requests_get, mock.patch(
-            "requests.delete"
+        with mock.patch(
+            "sewer.RackspaceDns.find_dns_zone_id"
+        ) as mock_find_dns_zone_id, mock.patch.object(
+            self.dns_class.http_session, "post"
+        ) as mock_requests_post, mock.patch.object(
+            self.dns_class.http_session, "get"
+        ) as mock_requests_get, mock.patch.object(
+            self.dns_class.http_session, "delete"
         ) as mock_requests_delete, mock.patch(
             "sewer.RackspaceDns.delete_dns_record"
         ) as mock_delete_dns_record, mock.patch(
@@ -110,9 +158,13 @@ class TestRackspace(TestCase):
             self.assertFalse(mock_delete_dns_record.called)
 
     def test_rackspace_is_called_by_create_dns_record(self):
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
-            "requests.get"
-        ) as mock_requests_get, mock.patch("requests.delete") as mock_requests_delete, mock.patch(
+        with mock.patch.object(
+            self.dns_class.http_session, "post"
+        ) as mock_requests_post, mock.patch.object(
+            self.dns_class.http_session, "get"
+        ) as mock_requests_get, mock.patch.object(
+            self.dns_class.http_session, "delete"
+        ) as mock_requests_delete, mock.patch(
             "sewer.RackspaceDns.delete_dns_record"
         ) as mock_delete_dns_record, mock.patch(
             "sewer.RackspaceDns.find_dns_zone_id"
@@ -140,9 +192,13 @@ class TestRackspace(TestCase):
             )
 
     def test_rackspace_is_called_by_delete_dns_record(self):
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
-            "requests.get"
-        ) as mock_requests_get, mock.patch("requests.delete") as mock_requests_delete, mock.patch(
+        with mock.patch.object(
+            self.dns_class.http_session, "post"
+        ) as mock_requests_post, mock.patch.object(
+            self.dns_class.http_session, "get"
+        ) as mock_requests_get, mock.patch.object(
+            self.dns_class.http_session, "delete"
+        ) as mock_requests_delete, mock.patch(
             "sewer.RackspaceDns.find_dns_zone_id"
         ) as mock_find_dns_zone_id, mock.patch(
             "sewer.RackspaceDns.poll_callback_url"
@@ -167,3 +223,486 @@ class TestRackspace(TestCase):
             }
             self.assertDictEqual(expected["headers"], mock_requests_delete.call_args[1]["headers"])
             self.assertEqual(expected["url"], mock_requests_delete.call_args[0][0])
+
+    def test_rackspace_is_called_by_async_create_dns_record(self):
+        with mock.patch("sewer.RackspaceDns.async_request") as mock_async_request, mock.patch(
+            "sewer.RackspaceDns.async_find_dns_zone_id"
+        ) as mock_find_dns_zone_id:
+            mock_find_dns_zone_id.return_value = "mock_zone_id"
+            mock_async_request.side_effect = [
+                test_utils.MockResponse(202, {"callbackUrl": "http://example.com/callbackUrl"}),
+                test_utils.MockResponse(200, {"status": "RUNNING"}),
+                test_utils.MockResponse(200, {"status": "COMPLETED"}),
+            ]
+            asyncio.run(
+                self.dns_class.async_create_dns_record(
+                    domain_name=self.domain_name, domain_dns_value=self.domain_dns_value
+                )
+            )
+            requests = [i[0][:2] for i in mock_async_request.call_args_list]
+            self.assertEqual(
+                requests,
+                [
+                    ("POST", "http://example.com/domains/mock_zone_id/records"),
+                    ("GET", "http://example.com/callbackUrl"),
+                    ("GET", "http://example.com/callbackUrl"),
+                ],
+            )
+            self.assertEqual(
+                mock_async_request.call_args_list[0][1]["json"]["records"][0]["data"],
+                self.domain_dns_value,
+            )
+
+    def test_async_poll_callback_url_raises_on_error(self):
+        with mock.patch("sewer.RackspaceDns.async_request") as mock_async_request:
+            mock_async_request.return_value = test_utils.MockResponse(200, {"status": "ERROR"})
+            with self.assertRaises(Exception):
+                asyncio.run(self.dns_class.async_poll_callback_url("http://example.com/callback"))
+
+    def test_records_of_a_zone_are_created_with_one_request(self):
+        with mock.patch.object(
+            self.dns_class.http_session, "post"
+        ) as mock_requests_post, mock.patch(
+            "sewer.RackspaceDns.find_dns_zone_id"
+        ) as mock_find_dns_zone_id, mock.patch(
+            "sewer.RackspaceDns.get_dns_zone_name"
+        ) as mock_get_dns_zone_name, mock.patch(
+            "sewer.RackspaceDns.poll_callback_urls"
+        ) as mock_poll_callback_urls:
+            mock_find_dns_zone_id.return_value = "mock_zone_id"
+            mock_get_dns_zone_name.return_value = "example.com"
+            mock_requests_content = {"callbackUrl": "http://example.com/callbackUrl"}
+            mock_requests_post.return_value = test_utils.MockResponse(202, mock_requests_content)
+
+            self.dns_class.create_dns_records(
+                [("example.com", "value-1"), ("*.example.com", "value-2"), ("a.example.com", "3")]
+            )
+            self.assertEqual(mock_requests_post.call_count, 1)
+            mock_poll_callback_urls.assert_called_once_with(["http://example.com/callbackUrl"])
+            records = mock_requests_post.call_args[1]["json"]["records"]
+            self.assertEqual(
+                [(i["name"], i["data"]) for i in records],
+                [
+                    ("_acme-challenge.example.com", "value-1"),
+                    ("_acme-challenge.example.com", "value-2"),
+                    ("_acme-challenge.a.example.com", "3"),
+                ],
+            )
+
+    def test_callback_urls_are_polled_together_with_backoff(self):
+        with mock.patch.object(self.dns_class.http_session, "get") as mock_requests_get:
+            statuses = {
+                "http://example.com/callback/1": ["RUNNING", "RUNNING", "COMPLETED"],
+                "http://example.com/callback/2": ["RUNNING", "COMPLETED"],
+            }
+            mock_requests_get.side_effect = lambda url, **kwargs: test_utils.MockResponse(
+                200, {"status": statuses[url].pop(0)}
+            )
+            self.dns_class.poll_callback_urls(list(statuses))
+
+            requested_urls = [i[0][0] for i in mock_requests_get.call_args_list]
+            self.assertEqual(
+                requested_urls,
+                [
+                    "http://example.com/callback/1",
+                    "http://example.com/callback/2",
+                    "http://example.com/callback/1",
+                    "http://example.com/callback/2",
+                    "http://example.com/callback/1",
+                ],
+            )
+            for i in mock_requests_get.call_args_list:
+                self.assertEqual(i[1]["timeout"], self.dns_class.HTTP_TIMEOUT)
+            self.assertEqual(self.sleeps, [1, 2])
+
+    def test_poll_callback_urls_times_out(self):
+        self.dns_class.poller = polling.Poller(timeout=10, max_polls=3, sleep=self.sleeps.append)
+        with mock.patch.object(self.dns_class.http_session, "get") as mock_requests_get:
+            mock_requests_get.return_value = test_utils.MockResponse(200, {"status": "RUNNING"})
+            with self.assertRaises(TimeoutError):
+                self.dns_class.poll_callback_url("http://example.com/callback")
+            self.assertEqual(mock_requests_get.call_count, 3)
+
+    def test_async_create_dns_records_waits_on_all_zones_together(self):
+        with mock.patch("sewer.RackspaceDns.async_request") as mock_async_request, mock.patch(
+            "sewer.RackspaceDns.async_find_dns_zone_id"
+        ) as mock_find_dns_zone_id, mock.patch(
+            "sewer.RackspaceDns.get_dns_zone_name"
+        ) as mock_get_dns_zone_name:
+            mock_find_dns_zone_id.return_value = "mock_zone_id"
+            mock_get_dns_zone_name.side_effect = lambda domain_name: domain_name
+            mock_async_request.side_effect = [
+                test_utils.MockResponse(202, {"callbackUrl": "http://example.com/callback/1"}),
+                test_utils.MockResponse(202, {"callbackUrl": "http://example.com/callback/2"}),
+                test_utils.MockResponse(200, {"status": "COMPLETED"}),
+                test_utils.MockResponse(200, {"status": "RUNNING"}),
+                test_utils.MockResponse(200, {"status": "COMPLETED"}),
+            ]
+            asyncio.run(
+                self.dns_class.async_create_dns_records(
+                    [("example.com", "value-1"), ("example.org", "value-2")]
+                )
+            )
+            requests = [i[0][:2] for i in mock_async_request.call_args_list]
+            self.assertEqual(
+                requests,
+                [
+                    ("POST", "http://example.com/domains/mock_zone_id/records"),
+                    ("POST", "http://example.com/domains/mock_zone_id/records"),
+                    ("GET", "http://example.com/callback/1"),
+                    ("GET", "http://example.com/callback/2"),
+                    ("GET", "http://example.com/callback/2"),
+                ],
+            )
+            for i in mock_async_request.call_args_list[2:]:
+                self.assertEqual(i[1]["timeout"], self.dns_class.HTTP_TIMEOUT)
+            self.assertEqual(self.sleeps, [1])
+
+    def test_zone_index_is_paginated_and_cached(self):
+        self.dns_class.PAGE_SIZE = 2
+        domains = [{"name": "example-{0}.com".format(i), "id": i} for i in range(3)]
+        with mock.patch.object(self.dns_class.http_session, "get") as mock_requests_get, mock.patch(
+            "sewer.RackspaceDns.get_dns_zone_name"
+        ) as mock_get_dns_zone_name:
+            mock_get_dns_zone_name.side_effect = lambda domain_name: domain_name
+            mock_requests_get.side_effect = [
+                test_utils.MockResponse(200, {"domains": domains[:2], "totalEntries": 3}),
+                test_utils.MockResponse(200, {"domains": domains[2:], "totalEntries": 3}),
+            ]
+            self.assertEqual(self.dns_class.find_dns_zone_id("example-2.com"), 2)
+            self.assertEqual(self.dns_class.find_dns_zone_id("example-0.com"), 0)
+            self.assertEqual(
+                [i[0][0] for i in mock_requests_get.call_args_list],
+                [
+                    "http://example.com/domains?limit=2&offset=0",
+                    "http://example.com/domains?limit=2&offset=2",
+                ],
+            )
+
+    def test_unknown_zone_is_fetched_again(self):
+        with mock.patch.object(self.dns_class.http_session, "get") as mock_requests_get, mock.patch(
+            "sewer.RackspaceDns.get_dns_zone_name"
+        ) as mock_get_dns_zone_name:
+            mock_get_dns_zone_name.side_effect = lambda domain_name: domain_name
+            mock_requests_get.side_effect = [
+                test_utils.MockResponse(200, {"domains": [{"name": "example.com", "id": 1}]}),
+                test_utils.MockResponse(200, {"domains": [{"name": "example.org", "id": 2}]}),
+                test_utils.MockResponse(200, {"domains": [{"name": "example.org", "id": 2}]}),
+            ]
+            self.assertEqual(self.dns_class.find_dns_zone_id("example.com"), 1)
+            self.assertEqual(self.dns_class.find_dns_zone_id("example.org"), 2)
+            with self.assertRaises(ValueError):
+                self.dns_class.find_dns_zone_id("example.net")
+            self.assertEqual(mock_requests_get.call_count, 3)
+
+    def test_records_of_a_zone_are_deleted_with_one_request(self):
+        records = [
+            {"name": "_acme-challenge.example.com", "id": "record-1", "data": "value-1"},
+            {"name": "_acme-challenge.example.com", "id": "record-2", "data": "value-2"},
+            {"name": "_acme-challenge.example.org", "id": "record-3", "data": "value-3"},
+        ]
+        with mock.patch.object(
+            self.dns_class.http_session, "get"
+        ) as mock_requests_get, mock.patch.object(
+            self.dns_class.http_session, "delete"
+        ) as mock_requests_delete, mock.patch(
+            "sewer.RackspaceDns.get_dns_zone_name"
+        ) as mock_get_dns_zone_name, mock.patch(
+            "sewer.RackspaceDns.poll_callback_urls"
+        ) as mock_poll_callback_urls:
+            mock_get_dns_zone_name.side_effect = lambda domain_name: domain_name.split(".", 1)[-1]
+            self.dns_class.set_zone_index(
+                [{"name": "example.com", "id": "zone-1"}, {"name": "example.org", "id": "zone-2"}]
+            )
+            mock_requests_get.side_effect = [
+                test_utils.MockResponse(200, {"records": records[:2], "totalEntries": 2}),
+                test_utils.MockResponse(200, {"records": records[2:], "totalEntries": 1}),
+            ]
+            mock_requests_delete.side_effect = [
+                test_utils.MockResponse(202, {"callbackUrl": "http://example.com/callback/1"}),
+                test_utils.MockResponse(202, {"callbackUrl": "http://example.com/callback/2"}),
+            ]
+
+            self.dns_class.delete_dns_records(
+                [
+                    ("a.example.com", "value-1"),
+                    ("*.a.example.com", "value-2"),
+                    ("a.example.org", "value-3"),
+                ]
+            )
+            self.assertEqual(
+                [i[0][0] for i in mock_requests_get.call_args_list],
+                [
+                    "http://example.com/domains/zone-1/records?type=TXT&limit=100&offset=0",
+                    "http://example.com/domains/zone-2/records?type=TXT&limit=100&offset=0",
+                ],
+            )
+            self.assertEqual(
+                [i[0][0] for i in mock_requests_delete.call_args_list],
+                [
+                    "http://example.com/domains/zone-1/records?id=record-1&id=record-2",
+                    "http://example.com/domains/zone-2/records?id=record-3",
+                ],
+            )
+            mock_poll_callback_urls.assert_called_once_with(
+                ["http://example.com/callback/1", "http://example.com/callback/2"]
+            )
+
+    def test_missing_records_are_skipped_and_the_others_deleted(self):
+        records = [{"name": "_acme-challenge.example.com", "id": "record-1", "data": "value-1"}]
+        with mock.patch.object(
+            self.dns_class.http_session, "get"
+        ) as mock_requests_get, mock.patch.object(
+            self.dns_class.http_session, "delete"
+        ) as mock_requests_delete, mock.patch(
+            "sewer.RackspaceDns.get_dns_zone_name"
+        ) as mock_get_dns_zone_name, mock.patch(
+            "sewer.RackspaceDns.poll_callback_urls"
+        ) as mock_poll_callback_urls:
+            mock_get_dns_zone_name.side_effect = lambda domain_name: domain_name.split(".", 1)[-1]
+            self.dns_class.set_zone_index(
+                [{"name": "example.com", "id": "zone-1"}, {"name": "example.org", "id": "zone-2"}]
+            )
+            mock_requests_get.side_effect = [
+                test_utils.MockResponse(200, {"records": records, "totalEntries": 1}),
+                test_utils.MockResponse(200, {"records": [], "totalEntries": 0}),
+            ]
+            mock_requests_delete.return_value = test_utils.MockResponse(
+                202, {"callbackUrl": "http://example.com/callback/1"}
+            )
+
+            with self.assertLogs(level="WARNING") as logs:
+                self.dns_class.delete_dns_records(
+                    [
+                        ("a.example.com", "value-1"),
+                        ("*.a.example.com", "value-2"),
+                        ("a.example.org", "value-3"),
+                    ]
+                )
+            self.assertEqual(len(logs.records), 2)
+            self.assertIn("_acme-challenge.a.example.com", logs.output[0])
+            # the zone without any of the records is not sent a delete at all.
+            mock_requests_delete.assert_called_once()
+            self.assertEqual(
+                mock_requests_delete.call_args[0][0],
+                "http://example.com/domains/zone-1/records?id=record-1",
+            )
+            mock_poll_callback_urls.assert_called_once_with(["http://example.com/callback/1"])
+
+    def test_async_delete_dns_records_deletes_the_other_zones_when_one_fails(self):
+        with mock.patch("sewer.RackspaceDns.async_request") as mock_async_request, mock.patch(
+            "sewer.RackspaceDns.get_dns_zone_name"
+        ) as mock_get_dns_zone_name:
+            mock_get_dns_zone_name.side_effect = lambda domain_name: domain_name
+            self.dns_class.set_zone_index([{"name": "example.org", "id": "zone-2"}])
+            mock_async_request.side_effect = [
+                # example.com is not a domain of the account.
+                test_utils.MockResponse(
+                    200, {"domains": [{"name": "example.org", "id": "zone-2"}]}
+                ),
+                test_utils.MockResponse(200, {"records": [{"id": "record-3", "data": "value-3"}]}),
+                test_utils.MockResponse(202, {"callbackUrl": "http://example.com/callback/2"}),
+                test_utils.MockResponse(200, {"status": "COMPLETED"}),
+            ]
+            with self.assertRaises(ValueError):
+                asyncio.run(
+                    self.dns_class.async_delete_dns_records(
+                        [("example.com", "value-1"), ("example.org", "value-3")]
+                    )
+                )
+            self.assertEqual(
+                [i[0][:2] for i in mock_async_request.call_args_list][1:],
+                [
+                    (
+                        "GET",
+                        "http://example.com/domains/zone-2/records?type=TXT&limit=100&offset=0",
+                    ),
+                    ("DELETE", "http://example.com/domains/zone-2/records?id=record-3"),
+                    ("GET", "http://example.com/callback/2"),
+                ],
+            )
+
+
+class TestRackspaceTokenCache(TestCase):
+    """
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "tokens.json")
+        self.http_session = transport.create_session()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    @staticmethod
+    def identity_response(token, expires):
+        # see: https://developer.rackspace.com/docs/cloud-identity/v2/api-reference/token-operations/
+        return test_utils.MockResponse(
+            200,
+            {
+                "access": {
+                    "token": {"id": token, "expires": expires},
+                    "serviceCatalog": [
+                        {"type": "rax:dns", "endpoints": [{"publicURL": "http://example.com"}]}
+                    ],
+                }
+            },
+        )
+
+    def create_dns_class(self, token_cache):
+        return sewer.RackspaceDns(
+            RACKSPACE_USERNAME="mock_username",
+            RACKSPACE_API_KEY="mock-api-key",
+            http_session=self.http_session,
+            token_cache=token_cache,
+        )
+
+    def test_parse_token_expires(self):
+        self.assertEqual(parse_token_expires("2014-11-24T22:05:39.115Z"), 1416866739)
+        self.assertEqual(parse_token_expires("2014-11-24T16:05:39.115-06:00"), 1416866739)
+        self.assertIsNone(parse_token_expires(None))
+        self.assertIsNone(parse_token_expires("tomorrow"))
+
+    def test_token_is_reused_by_providers(self):
+        token_cache = sewer.RackspaceTokenCache()
+        with mock.patch.object(self.http_session, "post") as mock_requests_post:
+            mock_requests_post.return_value = self.identity_response(
+                "token-1", "2099-01-01T00:00:00.000Z"
+            )
+            for _ in range(3):
+                dns_class = self.create_dns_class(token_cache)
+            self.assertEqual(mock_requests_post.call_count, 1)
+            self.assertEqual(mock_requests_post.call_args[1]["timeout"], dns_class.HTTP_TIMEOUT)
+            self.assertEqual(dns_class.RACKSPACE_API_TOKEN, "token-1")
+            self.assertEqual(dns_class.RACKSPACE_API_BASE_URL, "http://example.com/")
+            self.assertEqual(dns_class.RACKSPACE_HEADERS["X-Auth-Token"], "token-1")
+
+    def test_expiring_token_is_refreshed(self):
+        token_cache = sewer.RackspaceTokenCache(refresh_before=300)
+        expires = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + 200))
+        with mock.patch.object(self.http_session, "post") as mock_requests_post:
+            mock_requests_post.side_effect = [
+                self.identity_response("token-1", expires),
+                self.identity_response("token-2", "2099-01-01T00:00:00.000Z"),
+            ]
+            self.create_dns_class(token_cache)
+            dns_class = self.create_dns_class(token_cache)
+            self.assertEqual(dns_class.RACKSPACE_API_TOKEN, "token-2")
+            self.assertEqual(mock_requests_post.call_count, 2)
+
+    def test_token_without_expires_is_cached_for_default_lifetime(self):
+        token_cache = sewer.RackspaceTokenCache(default_lifetime=3600)
+        with mock.patch.object(self.http_session, "post") as mock_requests_post, mock.patch.object(
+            self.http_session, "get"
+        ) as mock_requests_get:
+            mock_requests_post.return_value = self.identity_response("token-1", "tomorrow")
+            mock_requests_get.return_value = test_utils.MockResponse(200, {"domains": []})
+            dns_class = self.create_dns_class(token_cache)
+            dns_class.list_all("domains", "domains", "error")
+            self.create_dns_class(token_cache)
+            self.assertEqual(mock_requests_post.call_count, 1)
+            self.assertEqual(mock_requests_get.call_args[1]["headers"]["X-Auth-Token"], "token-1")
+
+        expires = token_cache._entries["mock_username"]["expires"]
+        self.assertAlmostEqual(expires, time.time() + 3600, delta=60)
+
+    def test_cache_is_persisted(self):
+        token_cache = sewer.RackspaceTokenCache(path=self.path)
+        with mock.patch.object(self.http_session, "post") as mock_requests_post:
+            mock_requests_post.return_value = self.identity_response(
+                "token-1", "2099-01-01T00:00:00.000Z"
+            )
+            self.create_dns_class(token_cache)
+            dns_class = self.create_dns_class(sewer.RackspaceTokenCache(path=self.path))
+            self.assertEqual(mock_requests_post.call_count, 1)
+            self.assertEqual(dns_class.RACKSPACE_API_TOKEN, "token-1")
+        self.assertEqual(os.listdir(self.temp_dir.name), ["tokens.json"])
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o600)
+
+    def test_token_saved_by_another_process_is_used(self):
+        token_cache = sewer.RackspaceTokenCache(path=self.path)
+        sewer.RackspaceTokenCache(path=self.path).add(
+            "mock_username", "token-1", "http://example.com/", "2099-01-01T00:00:00.000Z"
+        )
+        with mock.patch.object(self.http_session, "post") as mock_requests_post:
+            dns_class = self.create_dns_class(token_cache)
+            self.assertFalse(mock_requests_post.called)
+            self.assertEqual(dns_class.RACKSPACE_API_TOKEN, "token-1")
+
+    def test_concurrent_providers_fetch_the_token_once(self):
+        token_cache = sewer.RackspaceTokenCache()
+        barrier = threading.Barrier(4)
+
+        def post(*args, **kwargs):
+            time.sleep(0.05)
+            return self.identity_response("token-1", "2099-01-01T00:00:00.000Z")
+
+        def create_dns_class():
+            barrier.wait()
+            return self.create_dns_class(token_cache).RACKSPACE_API_TOKEN
+
+        with mock.patch.object(self.http_session, "post") as mock_requests_post:
+            mock_requests_post.side_effect = post
+            threads = []
+            tokens = []
+            for _ in range(4):
+                thread = threading.Thread(target=lambda: tokens.append(create_dns_class()))
+                thread.start()
+                threads.append(thread)
+            for thread in threads:
+                thread.join()
+            self.assertEqual(tokens, ["token-1"] * 4)
+            self.assertEqual(mock_requests_post.call_count, 1)
+
+    def test_rejected_token_is_fetched_again_and_the_request_retried(self):
+        token_cache = sewer.RackspaceTokenCache()
+        token_cache.add(
+            "mock_username", "token-1", "http://example.com/", "2099-01-01T00:00:00.000Z"
+        )
+        dns_class = self.create_dns_class(token_cache)
+        with mock.patch.object(self.http_session, "post") as mock_requests_post, mock.patch.object(
+            self.http_session, "get"
+        ) as mock_requests_get:
+            mock_requests_post.return_value = self.identity_response(
+                "token-2", "2099-01-01T00:00:00.000Z"
+            )
+            mock_requests_get.side_effect = [
+                test_utils.MockResponse(401),
+                test_utils.MockResponse(200, {"records": [], "totalEntries": 0}),
+            ]
+            self.assertEqual(dns_class.list_dns_records("zone-1"), [])
+            self.assertEqual(
+                [i[1]["headers"]["X-Auth-Token"] for i in mock_requests_get.call_args_list],
+                ["token-1", "token-2"],
+            )
+            self.assertEqual(mock_requests_post.call_count, 1)
+            self.assertEqual(token_cache.get("mock_username")[0], "token-2")
+
+            # a rejection of the old token does not drop the new one.
+            token_cache.remove("mock_username", "token-1")
+            self.assertEqual(token_cache.get("mock_username")[0], "token-2")
+
+    def test_rejected_token_is_fetched_again_by_async_requests(self):
+        token_cache = sewer.RackspaceTokenCache()
+        token_cache.add(
+            "mock_username", "token-1", "http://example.com/", "2099-01-01T00:00:00.000Z"
+        )
+        dns_class = self.create_dns_class(token_cache)
+        with mock.patch.object(self.http_session, "post") as mock_requests_post, mock.patch(
+            "sewer.RackspaceDns.async_request"
+        ) as mock_async_request:
+            mock_requests_post.return_value = self.identity_response(
+                "token-2", "2099-01-01T00:00:00.000Z"
+            )
+            mock_async_request.side_effect = [
+                test_utils.MockResponse(401),
+                test_utils.MockResponse(401),
+            ]
+            response = asyncio.run(dns_class.async_api_request("GET", "http://example.com/"))
+            # the request is retried once; a token that is rejected again is an error of the caller.
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(
+                [i[1]["headers"]["X-Auth-Token"] for i in mock_async_request.call_args_list],
+                ["token-1", "token-2"],
+            )
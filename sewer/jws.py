@@ -0,0 +1,150 @@
+import json
+import base64
+import hashlib
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa, padding, utils
+
+
+def calculate_safe_base64(un_encoded_data):
+    """
+    takes in a string or bytes
+    returns a string
+    """
+    if isinstance(un_encoded_data, str):
+        un_encoded_data = un_encoded_data.encode("utf8")
+    r = base64.urlsafe_b64encode(un_encoded_data).rstrip(b"=")
+    return r.decode("utf8")
+
+
+def int_to_base64(number):
+    """
+    https://tools.ietf.org/html/rfc7518#section-2
+    Base64urlUInt: the base64url encoding of the unsigned big-endian representation of
+    an integer, using the minimum number of octets needed to represent it.
+    """
+    length = max(1, (number.bit_length() + 7) // 8)
+    return calculate_safe_base64(number.to_bytes(length, "big"))
+
+
+# https://tools.ietf.org/html/rfc7518#section-3.4
+# curve name -> (jwk "crv", jws "alg", hash algorithm, size of r and s in bytes)
+EC_ALGORITHMS = {
+    "secp256r1": ("P-256", "ES256", hashes.SHA256, 32),
+    "secp384r1": ("P-384", "ES384", hashes.SHA384, 48),
+    "secp521r1": ("P-521", "ES512", hashes.SHA512, 66),
+}
+
+
+def calculate_jwk_thumbprint(jwk):
+    """
+    https://tools.ietf.org/html/rfc7638#section-3
+    The thumbprint is the base64url encoded SHA-256 digest of the JSON object made of the
+    required members of the JWK, with lexicographically sorted keys and no whitespace.
+    """
+    jwk_json = json.dumps(jwk, sort_keys=True, separators=(",", ":"))
+    return calculate_safe_base64(hashlib.sha256(jwk_json.encode("utf8")).digest())
+
+
+class AccountSigner(object):
+    """
+    Signs acme requests with an account key.
+    RSA keys sign with RS256. EC keys sign with ES256, ES384 or ES512 depending on their curve.
+
+    The PEM account key is parsed exactly once. The jwk, its thumbprint and the parts of the
+    JWS protected header that do not change between requests are computed up front, so that
+    signing a request only costs the signature itself.
+
+    usage:
+        signer = AccountSigner(account_key)
+        protected = signer.protected_header(url, nonce=nonce, kid=kid)
+        body = signer.sign_request(protected, payload)
+    """
+
+    def __init__(self, account_key):
+        """
+        :param account_key: (required) [string]
+            the PEM encoded private key that identifies your account on the acme server.
+        """
+        self.account_key = account_key
+        self.private_key = serialization.load_pem_private_key(
+            account_key.encode(), password=None, backend=default_backend()
+        )
+        public_numbers = self.private_key.public_key().public_numbers()
+
+        if isinstance(self.private_key, rsa.RSAPrivateKey):
+            self.alg = "RS256"
+            self.hash_algorithm = hashes.SHA256()
+            self.jwk = {
+                "kty": "RSA",
+                "e": int_to_base64(public_numbers.e),
+                "n": int_to_base64(public_numbers.n),
+            }
+        elif isinstance(self.private_key, ec.EllipticCurvePrivateKey):
+            curve_name = self.private_key.curve.name
+            if curve_name not in EC_ALGORITHMS:
+                raise ValueError("Unsupported account key curve: {0}".format(curve_name))
+            crv, self.alg, hash_algorithm, self.ec_size = EC_ALGORITHMS[curve_name]
+            self.hash_algorithm = hash_algorithm()
+            # https://tools.ietf.org/html/rfc7518#section-6.2.1
+            # x and y MUST be the full size of a coordinate for the curve
+            self.jwk = {
+                "kty": "EC",
+                "crv": crv,
+                "x": calculate_safe_base64(public_numbers.x.to_bytes(self.ec_size, "big")),
+                "y": calculate_safe_base64(public_numbers.y.to_bytes(self.ec_size, "big")),
+            }
+        else:
+            raise ValueError(
+                "Unsupported account key type: {0}".format(self.private_key.__class__.__name__)
+            )
+        self.thumbprint = calculate_jwk_thumbprint(self.jwk)
+        self._jwk_header_template = {"alg": self.alg, "jwk": self.jwk}
+        self._kid_header_template = {"alg": self.alg}
+
+    def protected_header(self, url, nonce, kid=None):
+        """
+        https://tools.ietf.org/html/draft-ietf-acme-acme#section-6.2
+        requests carry either the "jwk"(when there is no kid yet, eg for newAccount) or the "kid".
+        """
+        if kid is None:
+            header = dict(self._jwk_header_template)
+        else:
+            header = dict(self._kid_header_template)
+            header["kid"] = kid
+        header["nonce"] = nonce
+        header["url"] = url
+        return header
+
+    def sign(self, message):
+        """
+        takes in a string or bytes
+        returns the signature as bytes
+        """
+        if isinstance(message, str):
+            message = message.encode("utf8")
+        if self.jwk["kty"] == "RSA":
+            return self.private_key.sign(message, padding.PKCS1v15(), self.hash_algorithm)
+
+        # https://tools.ietf.org/html/rfc7518#section-3.4
+        # ECDSA signatures are R and S concatenated, not the DER encoding that cryptography returns
+        der_signature = self.private_key.sign(message, ec.ECDSA(self.hash_algorithm))
+        r, s = utils.decode_dss_signature(der_signature)
+        return r.to_bytes(self.ec_size, "big") + s.to_bytes(self.ec_size, "big")
+
+    def sign_request(self, protected, payload):
+        """
+        https://tools.ietf.org/html/rfc7515#section-7.2.2
+        returns the flattened JWS JSON serialization of payload, as a string.
+        """
+        payload64 = calculate_safe_base64(json.dumps(payload))
+        protected64 = calculate_safe_base64(json.dumps(protected))
+        signature = self.sign("{0}.{1}".format(protected64, payload64))
+        return json.dumps(
+            {
+                "protected": protected64,
+                "payload": payload64,
+                "signature": calculate_safe_base64(signature),
+            }
+        )
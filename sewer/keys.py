@@ -0,0 +1,152 @@
+import threading
+import collections
+import multiprocessing
+import concurrent.futures
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+
+# the key types that sewer can create, for both account keys and certificate keys.
+# rsa keys use the `bits` that they are created with, ec keys have a fixed size.
+KEY_TYPE_RSA = "rsa"
+KEY_TYPE_EC256 = "ec256"
+KEY_TYPE_EC384 = "ec384"
+KEY_TYPES = [KEY_TYPE_RSA, KEY_TYPE_EC256, KEY_TYPE_EC384]
+
+EC_CURVES = {KEY_TYPE_EC256: ec.SECP256R1, KEY_TYPE_EC384: ec.SECP384R1}
+
+
+def create_key(key_type=KEY_TYPE_RSA, bits=2048):
+    """
+    creates a new private key.
+
+    :param key_type: (optional) [string]
+        one of sewer.keys.KEY_TYPES. ec256 and ec384 are ECDSA keys on the P-256 and P-384 curves.
+    :param bits:     (optional) [integer]
+        the size of rsa keys. ignored for ec keys.
+
+    returns the key PEM encoded(PKCS#8) as bytes.
+    """
+    if key_type == KEY_TYPE_RSA:
+        private_key = rsa.generate_private_key(
+            public_exponent=65537, key_size=bits, backend=default_backend()
+        )
+    elif key_type in EC_CURVES:
+        private_key = ec.generate_private_key(EC_CURVES[key_type](), backend=default_backend())
+    else:
+        raise ValueError(
+            "key_type should be one of; {0}. not {1}".format(", ".join(KEY_TYPES), key_type)
+        )
+    return private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+
+
+class KeyPool(object):
+    """
+    Creates private keys on a pool of processes and keeps a bounded stock of ready keys per
+    (key_type, bits), so that callers take a key that is already there instead of creating it.
+    rsa keys take hundreds of milliseconds of CPU each, more with bits=4096, and a process pool
+    creates them in parallel without holding the GIL of the calling process.
+
+    Every key is handed out exactly once. Keys only live in memory; they are never written to disk
+    or logged. close() discards the keys in stock.
+
+    The processes are spawned rather than forked, since a KeyPool is used from threads(eg by
+    issue_many) and forking a process that has threads can deadlock the child. Like any spawned
+    process pool, it should be created under an `if __name__ == "__main__":` guard in scripts.
+
+    usage:
+        with sewer.KeyPool(stock=8) as key_pool:
+            results = sewer.issue_many(specs, dns_class=dns_class, key_pool=key_pool)
+    """
+
+    def __init__(self, max_workers=None, stock=4, executor=None):
+        """
+        :param max_workers: (optional) [integer]
+            the number of processes that create keys. None means one per CPU.
+        :param stock:       (optional) [integer]
+            the max number of ready(or in progress) keys kept per (key_type, bits).
+            0 means that keys are only created when they are asked for.
+        :param executor:    (optional) [concurrent.futures.Executor]
+            the executor that creates the keys. if you do not provide one, a
+            concurrent.futures.ProcessPoolExecutor with max_workers spawned processes is used.
+        """
+        if stock < 0:
+            raise ValueError("stock should be at least 0. not {0}".format(stock))
+        self.stock = stock
+        self._own_executor = executor is None
+        self.executor = executor or concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        self._stock = collections.defaultdict(collections.deque)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @staticmethod
+    def stock_key(key_type, bits):
+        if key_type not in KEY_TYPES:
+            raise ValueError(
+                "key_type should be one of; {0}. not {1}".format(", ".join(KEY_TYPES), key_type)
+            )
+        if key_type != KEY_TYPE_RSA:
+            # ec keys have a fixed size; they all share one stock.
+            return (key_type, None)
+        return (key_type, bits)
+
+    def _top_up(self, key_type, bits, ready):
+        """
+        should be called with self._lock held.
+        """
+        while len(ready) < self.stock:
+            ready.append(self.executor.submit(create_key, key_type, bits))
+
+    def fill(self, key_type=KEY_TYPE_RSA, bits=2048):
+        """
+        starts creating keys of key_type until `stock` of them are ready or in progress,
+        eg before issuing many certificates.
+        """
+        stock_key = self.stock_key(key_type, bits)
+        with self._lock:
+            if self._closed:
+                raise ValueError("KeyPool is closed")
+            self._top_up(key_type, bits, self._stock[stock_key])
+
+    def get(self, key_type=KEY_TYPE_RSA, bits=2048):
+        """
+        returns a new PEM encoded private key(bytes), like create_key. The oldest key in stock is
+        taken, and the stock is topped up in the background.
+        """
+        stock_key = self.stock_key(key_type, bits)
+        with self._lock:
+            if self._closed:
+                raise ValueError("KeyPool is closed")
+            ready = self._stock[stock_key]
+            if ready:
+                future = ready.popleft()
+            else:
+                future = self.executor.submit(create_key, key_type, bits)
+            self._top_up(key_type, bits, ready)
+        return future.result()
+
+    def close(self):
+        """
+        discards the keys in stock and, if the pool created its executor, shuts it down.
+        """
+        with self._lock:
+            self._closed = True
+            for ready in self._stock.values():
+                for future in ready:
+                    future.cancel()
+                ready.clear()
+        if self._own_executor:
+            self.executor.shutdown(wait=True)
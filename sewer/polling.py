@@ -0,0 +1,174 @@
+import time
+import random
+import asyncio
+import logging
+import datetime
+import email.utils
+
+
+def parse_retry_after(response, now=None):
+    """
+    https://tools.ietf.org/html/rfc7231#section-7.1.3
+    The Retry-After header is either a number of seconds or an HTTP-date.
+    returns the number of seconds(float, at least 0) that response asks us to wait, or None.
+    anything that is not an http response(has no headers) never asks us to wait.
+    """
+    retry_after = getattr(response, "headers", {}).get("Retry-After")
+    if retry_after is None:
+        return None
+    retry_after = str(retry_after).strip()
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if retry_at is None:
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=datetime.timezone.utc)
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    return max(0.0, (retry_at - now).total_seconds())
+
+
+def no_sleep(seconds):
+    """
+    a Poller sleep that does not wait, for when polls should not be spaced out.
+    """
+
+
+async def async_no_sleep(seconds):
+    """
+    a Poller async_sleep that does not wait, but still lets other tasks run.
+    """
+    await asyncio.sleep(0)
+
+
+class Poller(object):
+    """
+    Polls an acme resource until it reaches a final state.
+
+    https://tools.ietf.org/html/draft-ietf-acme-acme#section-7.5.1
+    The server MAY include a Retry-After header field in its responses to polls; when it does,
+    the poller waits for that long. Otherwise it waits with exponential backoff, plus jitter so that
+    many clients do not poll in lockstep. It never waits less than initial_interval between two
+    polls. It gives up with a TimeoutError once timeout seconds have passed or once max_polls
+    polls have been made, whichever happens first.
+
+    usage:
+        poller = Poller(initial_interval=1, max_interval=8, timeout=120)
+        response = poller.poll(
+            lambda: requests.get(authorization_url),
+            is_done=lambda response: response.json()["status"] == "valid",
+        )
+    """
+
+    def __init__(
+        self,
+        initial_interval=1,
+        max_interval=8,
+        multiplier=2,
+        jitter=0.5,
+        timeout=120,
+        max_polls=None,
+        sleep=time.sleep,
+        clock=time.monotonic,
+        async_sleep=asyncio.sleep,
+    ):
+        """
+        :param initial_interval: (optional) [number]
+            seconds to wait after the first poll, and the least that is ever waited between two polls.
+            should be greater than 0.
+        :param max_interval:     (optional) [number]
+            the max seconds to wait between two polls, unless the server asks for more with Retry-After.
+        :param multiplier:       (optional) [number]
+            the factor by which the wait grows after every poll.
+        :param jitter:           (optional) [number]
+            the fraction(0 to 1) of each wait that is randomized.
+        :param timeout:          (optional) [number]
+            the max seconds that polling can take, in total.
+        :param max_polls:        (optional) [integer]
+            the max number of polls. None means no limit other than timeout.
+        """
+        if initial_interval <= 0:
+            raise ValueError(
+                "initial_interval should be greater than 0. not {0}".format(initial_interval)
+            )
+        elif max_interval < initial_interval:
+            raise ValueError(
+                "max_interval should be at least initial_interval. not {0}".format(max_interval)
+            )
+        elif not 0 <= jitter <= 1:
+            raise ValueError("jitter should be between 0 and 1. not {0}".format(jitter))
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.timeout = timeout
+        self.max_polls = max_polls
+        self.sleep = sleep
+        self.clock = clock
+        self.async_sleep = async_sleep
+        self.logger = logging.getLogger()
+
+    def interval(self, number_of_polls):
+        """
+        returns the seconds to wait after poll number `number_of_polls`(counting from 1)
+        when the server did not send Retry-After.
+        """
+        interval = min(
+            self.max_interval, self.initial_interval * self.multiplier ** (number_of_polls - 1)
+        )
+        return max(self.initial_interval, interval * (1 - self.jitter * random.random()))
+
+    def next_wait(self, response, number_of_polls, deadline, description="poll"):
+        """
+        returns the seconds to wait before the next poll, given the last response.
+        raises TimeoutError when the timeout or max_polls is reached.
+        """
+        remaining = deadline - self.clock()
+        if remaining <= 0 or (self.max_polls is not None and number_of_polls >= self.max_polls):
+            raise TimeoutError(
+                "{0} did not finish. Polls done={1}. Max polls allowed={2}. Timeout={3}seconds.".format(
+                    description, number_of_polls, self.max_polls, self.timeout
+                )
+            )
+
+        retry_after = parse_retry_after(response)
+        if retry_after is None:
+            wait = self.interval(number_of_polls)
+        else:
+            wait = max(self.initial_interval, retry_after)
+        wait = min(wait, remaining)
+        self.logger.debug("{0}_wait. seconds={1:.2f}".format(description, wait))
+        return wait
+
+    def poll(self, request, is_done, description="poll"):
+        """
+        calls request() until is_done(response) is True and returns that response.
+        is_done can raise to stop polling, eg when the resource has become invalid.
+        raises TimeoutError when the timeout or max_polls is reached.
+        """
+        deadline = self.clock() + self.timeout
+        number_of_polls = 0
+        while True:
+            response = request()
+            number_of_polls = number_of_polls + 1
+            if is_done(response):
+                return response
+            self.sleep(self.next_wait(response, number_of_polls, deadline, description))
+
+    async def poll_async(self, request, is_done, description="poll"):
+        """
+        like poll, but request is a coroutine function and the waits do not block the event loop.
+        """
+        deadline = self.clock() + self.timeout
+        number_of_polls = 0
+        while True:
+            response = await request()
+            number_of_polls = number_of_polls + 1
+            if is_done(response):
+                return response
+            await self.async_sleep(self.next_wait(response, number_of_polls, deadline, description))
@@ -0,0 +1,228 @@
+import logging
+import concurrent.futures
+
+try:
+    propagation_dependencies = True
+    import dns.resolver
+    import dns.exception
+
+    # the errors of a dns query that may not happen again, eg a nameserver that is unreachable
+    # for a moment; the query is repeated on the next check.
+    TRANSIENT_DNS_ERRORS = (dns.resolver.NoNameservers, dns.exception.Timeout)
+except ImportError:
+    propagation_dependencies = False
+
+from . import polling
+
+
+def challenge_name(domain_name):
+    """
+    returns the name of the TXT record that holds the dns-01 challenge for domain_name.
+    *.example.com and example.com are both validated at _acme-challenge.example.com.
+    """
+    if domain_name.startswith("*."):
+        domain_name = domain_name[2:]
+    return "_acme-challenge.{0}.".format(domain_name.rstrip("."))
+
+
+def _resolve(resolver, name, rdtype):
+    # dnspython >= 2.0 renamed Resolver.query to Resolver.resolve
+    resolve = getattr(resolver, "resolve", None) or resolver.query
+    return resolve(name, rdtype)
+
+
+class PropagationChecker(object):
+    """
+    Checks that the TXT records created for the dns-01 challenges are visible on every
+    authoritative nameserver of their zone, so that the acme server does not see a stale answer.
+
+    A failed validation counts against the acme server's rate limits, and a fixed sleep is
+    either too short for slow dns providers or wasted time for fast ones.
+
+    usage:
+        checker = sewer.PropagationChecker(timeout=300)
+        client = sewer.Client(domain_name='example.com',
+                              dns_class=dns_class,
+                              propagation_checker=checker)
+    """
+
+    def __init__(
+        self,
+        nameservers=None,
+        timeout=120,
+        initial_interval=1,
+        max_interval=8,
+        DNS_QUERY_TIMEOUT=5,
+        max_workers=10,
+        poller=None,
+    ):
+        """
+        :param nameservers:       (optional) [list]
+            the ip addresses of the recursive resolvers used to find the authoritative nameservers.
+            if you do not provide them, the system's resolvers(/etc/resolv.conf) are used.
+        :param timeout:           (optional) [number]
+            the max seconds to wait for the records to propagate.
+        :param initial_interval:  (optional) [number]
+            the seconds to wait after the first check.
+        :param max_interval:      (optional) [number]
+            the max seconds to wait between two checks.
+        :param DNS_QUERY_TIMEOUT: (optional) [number]
+            the max time that a single dns query can take.
+        :param max_workers:       (optional) [integer]
+            the max number of nameservers queried at the same time.
+        :param poller:            (optional) [sewer.polling.Poller]
+            the poller used to repeat the checks. overrides timeout, initial_interval and max_interval.
+        """
+        if not propagation_dependencies:
+            raise ImportError(
+                """You need to install PropagationChecker dependencies. run; pip3 install sewer[propagation]"""
+            )
+        elif not isinstance(max_workers, int) or max_workers < 1:
+            raise ValueError(
+                """max_workers should be an integer of at least 1. You entered {0}""".format(
+                    max_workers
+                )
+            )
+
+        self.nameservers = nameservers
+        self.DNS_QUERY_TIMEOUT = DNS_QUERY_TIMEOUT
+        self.max_workers = max_workers
+        self.poller = poller or polling.Poller(
+            initial_interval=initial_interval, max_interval=max_interval, timeout=timeout
+        )
+        self.logger = logging.getLogger()
+
+    def create_resolver(self, nameservers=None):
+        """
+        returns a dns.resolver.Resolver that queries nameservers, or the recursive resolvers
+        when nameservers is None.
+        """
+        nameservers = nameservers or self.nameservers
+        resolver = dns.resolver.Resolver(configure=nameservers is None)
+        if nameservers is not None:
+            resolver.nameservers = list(nameservers)
+        resolver.timeout = self.DNS_QUERY_TIMEOUT
+        resolver.lifetime = self.DNS_QUERY_TIMEOUT
+        return resolver
+
+    def canonical_name(self, name):
+        """
+        returns the name that the TXT record of name is really stored at.
+        eg acme-dns delegates _acme-challenge.example.com with a CNAME to a name in its own zone.
+        """
+        try:
+            answer = _resolve(self.create_resolver(), name, "CNAME")
+        except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN):
+            return name
+        return str(answer[0].target)
+
+    def find_authoritative_nameservers(self, name):
+        """
+        returns the ip addresses of the authoritative nameservers of the zone that contains name.
+        walks up from name until a zone with NS records is found.
+        """
+        resolver = self.create_resolver()
+        labels = name.rstrip(".").split(".")
+        for i in range(len(labels)):
+            zone = ".".join(labels[i:]) + "."
+            try:
+                answer = _resolve(resolver, zone, "NS")
+            except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN):
+                continue
+
+            addresses = []
+            for rdata in answer:
+                for rdtype in ["A", "AAAA"]:
+                    try:
+                        addresses.extend(
+                            str(i) for i in _resolve(resolver, str(rdata.target), rdtype)
+                        )
+                    except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN):
+                        pass
+            if addresses:
+                self.logger.debug(
+                    "find_authoritative_nameservers. name={0}. zone={1}. nameservers={2}".format(
+                        name, zone, addresses
+                    )
+                )
+                return sorted(set(addresses))
+        raise ValueError("Unable to find the authoritative nameservers of {0}".format(name))
+
+    def resolve_nameservers(self, name):
+        """
+        returns the canonical name of name and the authoritative nameservers of its zone.
+        returns None if a query failed with one of TRANSIENT_DNS_ERRORS; the records are not
+        propagated yet as far as the check is concerned, and the lookup is repeated on the next check.
+        """
+        try:
+            canonical_name = self.canonical_name(name)
+            return canonical_name, self.find_authoritative_nameservers(canonical_name)
+        except TRANSIENT_DNS_ERRORS as e:
+            self.logger.info(
+                "resolve_nameservers_failed. name={0}. error={1}. retrying".format(name, str(e))
+            )
+            return None
+
+    def get_txt_values(self, name, nameserver):
+        """
+        returns the TXT values of name, as answered by nameserver.
+        a missing record or an unreachable nameserver count as no values, so that the check is repeated.
+        """
+        resolver = self.create_resolver(nameservers=[nameserver])
+        try:
+            answer = _resolve(resolver, name, "TXT")
+        except (
+            dns.resolver.NoAnswer,
+            dns.resolver.NXDOMAIN,
+            dns.resolver.NoNameservers,
+            dns.exception.Timeout,
+        ):
+            return set()
+        values = set()
+        for rdata in answer:
+            values.add(b"".join(rdata.strings).decode())
+        return values
+
+    def wait(self, dns_names):
+        """
+        blocks until every record in dns_names is visible on all the authoritative nameservers
+        of its zone. raises TimeoutError if that does not happen within the timeout.
+
+        :param dns_names: (required) [list]
+            dicts with dns_name(the domain name the challenge is for) and domain_dns_value.
+        """
+        expected = {}
+        for i in dns_names:
+            expected.setdefault(challenge_name(i["dns_name"]), set()).add(i["domain_dns_value"])
+        if not expected:
+            return
+        self.logger.info("wait_for_dns_propagation. names={0}".format(sorted(expected)))
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # the names whose nameservers are not known yet.
+            unresolved = list(expected)
+            # (name, canonical name, nameserver) on which some expected value was not yet seen.
+            pending = []
+
+            def check():
+                resolved = list(executor.map(self.resolve_nameservers, unresolved))
+                for name, found in list(zip(unresolved, resolved)):
+                    if found is not None:
+                        unresolved.remove(name)
+                        canonical_name, nameservers = found
+                        pending.extend((name, canonical_name, ns) for ns in nameservers)
+                results = list(executor.map(lambda i: self.get_txt_values(*i[1:]), pending))
+                pending[:] = [
+                    i for i, values in zip(pending, results) if not expected[i[0]] <= values
+                ]
+                self.logger.debug(
+                    "dns_propagation_pending. pending={0}. unresolved={1}".format(
+                        pending, unresolved
+                    )
+                )
+                return pending + unresolved
+
+            self.poller.poll(
+                check, lambda pending: not pending, description="wait_for_dns_propagation"
+            )
+        self.logger.info("wait_for_dns_propagation_success")
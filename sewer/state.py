@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+
+
+def get_account_key_fingerprint(account_key):
+    """
+    returns the sha256 hex digest of the PEM encoded account key.
+    unlike the JWK thumbprint, it is computed without parsing the key.
+    """
+    return hashlib.sha256(account_key.strip().encode("utf8")).hexdigest()
+
+
+def load_json_file(path, description, object_pairs_hook=None):
+    """
+    returns the json object(a dict) in the file at path, eg a cache or a snapshot.
+    returns an empty one if path is None, or the file does not exist, can not be read or does not
+    hold a json object; losing a cache only costs a few extra requests, so it never fails the issuance.
+    """
+    empty = (object_pairs_hook or dict)([])
+    if path is None or not os.path.exists(path):
+        return empty
+    try:
+        with open(path, "r") as json_file:
+            data = json.load(json_file, object_pairs_hook=object_pairs_hook)
+    except (OSError, ValueError) as e:
+        logging.getLogger().warning(
+            "Unable to load {0}. path={1}. error={2}".format(description, path, str(e))
+        )
+        return empty
+    if not isinstance(data, dict):
+        return empty
+    return data
+
+
+def save_json_file(path, data, prefix=".sewer-", sort_keys=True):
+    """
+    writes data as json to the file at path. the file is replaced atomically, so that a crash never
+    leaves half a file. the temporary file, and so the new file, is only readable by its owner.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=prefix)
+    try:
+        with os.fdopen(fd, "w") as json_file:
+            json.dump(data, json_file, sort_keys=sort_keys)
+        os.replace(temp_path, path)
+    except Exception:
+        os.unlink(temp_path)
+        raise
+
+
+class StateSnapshot(object):
+    """
+    A json file that remembers what a client learns about the acme server and the account,
+    so that the next run can skip the requests that would learn it again:
+
+    - the directory document of each acme server, keyed by the directory url.
+    - the account url(kid), the JWK and its thumbprint, keyed by the directory url and the
+      fingerprint of the account key.
+
+    With a warm snapshot a renewal neither fetches the directory nor registers the account; its
+    first request is newOrder. Entries older than ttl seconds are ignored, so that they are
+    revalidated against the acme server from time to time. It is safe to use from multiple threads.
+
+    usage:
+        state = sewer.StateSnapshot(path='/var/lib/sewer/state.json')
+        client = sewer.Client(domain_name='example.com',
+                              dns_class=dns_class,
+                              account_key=account_key,
+                              state=state)
+    """
+
+    def __init__(self, path, ttl=86400):
+        """
+        :param path: (required) [string]
+            the json file that the snapshot is loaded from and saved to.
+        :param ttl:  (optional) [integer]
+            the number of seconds that an entry is used for before it is fetched again.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.logger = logging.getLogger()
+        self._lock = threading.Lock()
+        self._state = self.load()
+
+    def load(self):
+        return load_json_file(self.path, "state snapshot")
+
+    def save(self):
+        """
+        writes the snapshot to path. should be called with self._lock held.
+        """
+        save_json_file(self.path, self._state, prefix=".sewer-state-")
+
+    def get(self, section, key):
+        """
+        returns the entry saved under key in section, or None if there is none or it is older than ttl.
+        """
+        with self._lock:
+            entry = self._state.get(section, {}).get(key)
+        if not isinstance(entry, dict) or time.time() - entry.get("saved_at", 0) > self.ttl:
+            return None
+        return entry
+
+    def set(self, section, key, entry):
+        entry = dict(entry, saved_at=time.time())
+        with self._lock:
+            self._state.setdefault(section, {})[key] = entry
+            self.save()
+
+    def delete(self, section, key):
+        with self._lock:
+            if self._state.get(section, {}).pop(key, None) is not None:
+                self.save()
+
+    @staticmethod
+    def account_entry_key(directory_url, account_key):
+        return "{0} {1}".format(directory_url, get_account_key_fingerprint(account_key))
+
+    def get_directory(self, directory_url):
+        """
+        returns the saved directory document of the acme server at directory_url, or None.
+        """
+        entry = self.get("directories", directory_url)
+        if entry is None:
+            return None
+        return entry["directory"]
+
+    def set_directory(self, directory_url, directory):
+        self.set("directories", directory_url, {"directory": directory})
+
+    def get_account(self, directory_url, account_key):
+        """
+        returns a dict with the kid, jwk and thumbprint of account_key on the acme server at
+        directory_url, or None.
+        """
+        return self.get("accounts", self.account_entry_key(directory_url, account_key))
+
+    def set_account(self, directory_url, account_key, kid, jwk, thumbprint):
+        self.set(
+            "accounts",
+            self.account_entry_key(directory_url, account_key),
+            {"kid": kid, "jwk": jwk, "thumbprint": thumbprint},
+        )
+
+    def delete_account(self, directory_url, account_key):
+        self.delete("accounts", self.account_entry_key(directory_url, account_key))
@@ -2,7 +2,12 @@
 # not to pollute the global namespace.
 # see: https://python-packaging.readthedocs.io/en/latest/testing.html
 
+import json
+import base64
+
 import mock
+import OpenSSL
+import threading
 import cryptography
 from unittest import TestCase
 
@@ -26,11 +31,12 @@ class TestClient(TestCase):
 
     def setUp(self):
         self.domain_name = "example.com"
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
-            "requests.get"
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
         ) as mock_requests_get:
-            mock_requests_post.return_value = test_utils.MockResponse()
-            mock_requests_get.return_value = test_utils.MockResponse()
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
 
             self.dns_class = test_utils.ExmpleDnsProvider()
             self.client = sewer.Client(
@@ -40,45 +46,75 @@ class TestClient(TestCase):
                 ACME_AUTH_STATUS_WAIT_PERIOD=0,
                 ACME_DIRECTORY_URL=ACME_DIRECTORY_URL_STAGING,
             )
+            self.client.prepare()
 
     def tearDown(self):
         pass
 
     def test_get_get_acme_endpoints_failure_results_in_exception(self):
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
-            "requests.get"
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
         ) as mock_requests_get:
             mock_requests_post.return_value = test_utils.MockResponse(status_code=409)
             mock_requests_get.return_value = test_utils.MockResponse(status_code=409)
 
             def mock_create_acme_client():
+                # the directory is only fetched when it is first used.
                 sewer.Client(
                     domain_name="example.com",
                     dns_class=test_utils.ExmpleDnsProvider(),
                     ACME_DIRECTORY_URL=ACME_DIRECTORY_URL_STAGING,
-                )
+                ).prepare()
 
             self.assertRaises(ValueError, mock_create_acme_client)
             with self.assertRaises(ValueError) as raised_exception:
                 mock_create_acme_client()
             self.assertIn("Error while getting Acme endpoints", str(raised_exception.exception))
 
+    def test_client_is_created_lazily(self):
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
+        ) as mock_requests_get, mock.patch("sewer.Client.create_csr") as mock_create_csr:
+            mock_create_csr.return_value = b"csr"
+            client = sewer.Client(
+                domain_name="example.com",
+                dns_class=test_utils.ExmpleDnsProvider(),
+                certificate_key_type="ec256",
+                account_key_type="ec256",
+                ACME_DIRECTORY_URL=ACME_DIRECTORY_URL_STAGING,
+            )
+            self.assertFalse(mock_requests_get.called)
+            self.assertFalse(mock_requests_post.called)
+            self.assertIsNone(client._certificate_key)
+            self.assertIsNone(client.account._account_key)
+            self.assertFalse(mock_create_csr.called)
+
+            self.assertEqual(client.csr, b"csr")
+            self.assertIn("PRIVATE KEY", client.certificate_key)
+            self.assertEqual(mock_create_csr.call_count, 1)
+            # a new certificate key needs a new csr.
+            client.certificate_key = self.client.certificate_key
+            self.assertEqual(client.csr, b"csr")
+            self.assertEqual(mock_create_csr.call_count, 2)
+
     def test_user_agent_is_generated(self):
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
-            "requests.get"
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
         ) as mock_requests_get:
-            mock_requests_post.return_value = test_utils.MockResponse()
-            mock_requests_get.return_value = test_utils.MockResponse()
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
 
             for i in ["python-requests", "sewer", "https://github.com/komuw/sewer"]:
                 self.assertIn(i, self.client.User_Agent)
 
     def test_certificate_key_is_generated(self):
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
-            "requests.get"
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
         ) as mock_requests_get:
-            mock_requests_post.return_value = test_utils.MockResponse()
-            mock_requests_get.return_value = test_utils.MockResponse()
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
             certificate_key = self.client.certificate_key
 
             certificate_key_private_key = cryptography.hazmat.primitives.serialization.load_pem_private_key(
@@ -91,11 +127,12 @@ class TestClient(TestCase):
             )
 
     def test_account_key_is_generated(self):
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
-            "requests.get"
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
         ) as mock_requests_get:
-            mock_requests_post.return_value = test_utils.MockResponse()
-            mock_requests_get.return_value = test_utils.MockResponse()
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
             account_key = self.client.account_key
 
             account_key_private_key = cryptography.hazmat.primitives.serialization.load_pem_private_key(
@@ -108,17 +145,18 @@ class TestClient(TestCase):
             )
 
     def test_acme_registration_is_done(self):
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
-            "requests.get"
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
         ) as mock_requests_get, mock.patch("sewer.Client.acme_register") as mock_acme_registration:
-            mock_requests_post.return_value = test_utils.MockResponse()
-            mock_requests_get.return_value = test_utils.MockResponse()
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
             self.client.cert()
             self.assertTrue(mock_acme_registration.called)
 
     def test_acme_registration_failure_doesnt_result_in_certificate(self):
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
-            "requests.get"
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
         ) as mock_requests_get:
             mock_requests_post.return_value = test_utils.MockResponse(status_code=400)
             mock_requests_get.return_value = test_utils.MockResponse(status_code=400)
@@ -132,16 +170,17 @@ class TestClient(TestCase):
             self.assertIn("Error while registering", str(raised_exception.exception))
 
     def test_get_identifier_authorization_is_called(self):
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
-            "requests.get"
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
         ) as mock_requests_get, mock.patch(
             "sewer.Client.get_identifier_authorization"
         ) as mock_get_identifier_authorization:
-            mock_requests_post.return_value = test_utils.MockResponse()
-            mock_requests_get.return_value = test_utils.MockResponse()
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
             mock_get_identifier_authorization.return_value = {
                 "domain": "example.com",
-                "url": "http://localhost",
+                "url": "http://localhost/authorization-url",
                 "wildcard": None,
                 "dns_token": "dns_token",
                 "dns_challenge_url": "dns_challenge_url",
@@ -150,8 +189,8 @@ class TestClient(TestCase):
             self.assertTrue(mock_get_identifier_authorization.called)
 
     def test_get_identifier_authorization_is_not_called(self):
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
-            "requests.get"
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
         ) as mock_requests_get, mock.patch("sewer.Client.acme_register") as mock_acme_register:
             mock_requests_post.return_value = test_utils.MockResponse(status_code=400)
             mock_requests_get.return_value = test_utils.MockResponse(status_code=400)
@@ -168,70 +207,80 @@ class TestClient(TestCase):
             )
 
     def test_create_dns_record_is_called(self):
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
-            "requests.get"
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
         ) as mock_requests_get, mock.patch(
             "sewer.tests.test_utils.ExmpleDnsProvider.create_dns_record"
         ) as mock_create_dns_record:
-            mock_requests_post.return_value = test_utils.MockResponse()
-            mock_requests_get.return_value = test_utils.MockResponse()
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
             self.client.cert()
             self.assertTrue(mock_create_dns_record.called)
 
     def test_respond_to_challenge_called(self):
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
-            "requests.get"
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
         ) as mock_requests_get, mock.patch(
             "sewer.Client.respond_to_challenge"
         ) as mock_respond_to_challenge:
-            mock_requests_post.return_value = test_utils.MockResponse()
-            mock_requests_get.return_value = test_utils.MockResponse()
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
+            # the authorization only becomes valid once its challenge has been responded to.
+            mock_respond_to_challenge.side_effect = lambda *args: acme_server.post(
+                "http://localhost/challenge-url"
+            )
             self.client.cert()
             self.assertTrue(mock_respond_to_challenge.called)
 
     def test_check_authorization_status_is_called(self):
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
-            "requests.get"
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
         ) as mock_requests_get, mock.patch(
             "sewer.Client.check_authorization_status"
         ) as mock_check_authorization_status:
-            mock_requests_post.return_value = test_utils.MockResponse()
-            mock_requests_get.return_value = test_utils.MockResponse()
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
             self.client.cert()
             self.assertTrue(mock_check_authorization_status.called)
 
     def test_delete_dns_record_is_called(self):
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
-            "requests.get"
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
         ) as mock_requests_get, mock.patch(
             "sewer.tests.test_utils.ExmpleDnsProvider.delete_dns_record"
         ) as mock_delete_dns_record:
-            mock_requests_post.return_value = test_utils.MockResponse()
-            mock_requests_get.return_value = test_utils.MockResponse()
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
             self.client.cert()
             self.assertTrue(mock_delete_dns_record.called)
 
     def test_get_certificate_is_called(self):
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
-            "requests.get"
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
         ) as mock_requests_get, mock.patch("sewer.Client.get_certificate") as mock_get_certificate:
-            mock_requests_post.return_value = test_utils.MockResponse()
-            mock_requests_get.return_value = test_utils.MockResponse()
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
             self.client.cert()
             self.assertTrue(mock_get_certificate.called)
 
     def test_certificate_is_issued(self):
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
-            "requests.get"
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
         ) as mock_requests_get:
-            mock_requests_post.return_value = test_utils.MockResponse()
-            mock_requests_get.return_value = test_utils.MockResponse()
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
             for i in ["-----BEGIN CERTIFICATE-----", "-----END CERTIFICATE-----"]:
                 self.assertIn(i, self.client.cert())
 
     def test_certificate_is_not_issued(self):
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
-            "requests.get"
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
         ) as mock_requests_get, mock.patch(
             "sewer.Client.get_identifier_authorization"
         ) as mock_get_identifier_authorization, mock.patch(
@@ -258,11 +307,12 @@ class TestClient(TestCase):
             self.assertIn("Error applying for certificate", str(raised_exception.exception))
 
     def test_certificate_is_issued_for_renewal(self):
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
-            "requests.get"
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
         ) as mock_requests_get:
-            mock_requests_post.return_value = test_utils.MockResponse()
-            mock_requests_get.return_value = test_utils.MockResponse()
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
             for i in ["-----BEGIN CERTIFICATE-----", "-----END CERTIFICATE-----"]:
                 self.assertIn(i, self.client.renew())
 
@@ -283,6 +333,346 @@ class TestClient(TestCase):
             "domain_alt_names should be of type:: None or list", str(raised_exception.exception)
         )
 
+    def test_nonce_pool_falls_back_to_new_nonce_endpoint(self):
+        new_nonce = mock.Mock(return_value="fresh-nonce")
+        pool = sewer.client.NoncePool(new_nonce=new_nonce, low_water_mark=0)
+        self.assertEqual(pool.get(), "fresh-nonce")
+        self.assertEqual(new_nonce.call_count, 1)
+
+    def test_nonce_pool_uses_harvested_nonce(self):
+        new_nonce = mock.Mock(return_value="fresh-nonce")
+        pool = sewer.client.NoncePool(new_nonce=new_nonce, low_water_mark=0)
+        pool.harvest(test_utils.MockResponse())
+        self.assertEqual(pool.get(), "example-replay-Nonce")
+        self.assertFalse(new_nonce.called)
+
+    def test_signed_request_harvests_replay_nonce(self):
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
+        ) as mock_requests_get:
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
+            self.client.nonce_pool.clear()
+            self.client.nonce_pool.low_water_mark = 0
+
+            self.client.make_signed_acme_request("http://localhost/newOrder", {"a": "b"})
+            self.client.make_signed_acme_request("http://localhost/newOrder", {"a": "b"})
+            self.assertEqual(mock_requests_get.call_count, 1)
+            self.assertEqual(mock_requests_post.call_count, 2)
+
+    def test_bad_nonce_is_retried_once(self):
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
+        ) as mock_requests_get:
+            mock_requests_post.return_value = test_utils.MockResponse(
+                status_code=400, content={"type": "urn:ietf:params:acme:error:badNonce"}
+            )
+            mock_requests_get.return_value = test_utils.MockResponse()
+
+            response = self.client.make_signed_acme_request("http://localhost/newOrder", {})
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(mock_requests_post.call_count, 2)
+
+    def test_bad_nonce_is_retried_with_the_nonce_of_the_error_response(self):
+        with mock.patch("requests.Session.post") as mock_requests_post:
+            bad_nonce = test_utils.MockResponse(
+                status_code=400, content={"type": "urn:ietf:params:acme:error:badNonce"}
+            )
+            bad_nonce.headers["Replay-Nonce"] = "nonce-of-the-error"
+            mock_requests_post.side_effect = [bad_nonce, test_utils.MockResponse()]
+            self.client.nonce_pool.clear()
+            self.client.nonce_pool.low_water_mark = 0
+            self.client.nonce_pool.add("old-nonce")
+            self.client.nonce_pool.add("newer-nonce")
+
+            self.client.make_signed_acme_request("http://localhost/newOrder", {})
+            nonces = [
+                json.loads(
+                    base64.urlsafe_b64decode(json.loads(i[1]["data"])["protected"] + "==").decode()
+                )["nonce"]
+                for i in mock_requests_post.call_args_list
+            ]
+            self.assertEqual(nonces, ["newer-nonce", "nonce-of-the-error"])
+            # the nonce of the error response was used up; it is not left in the pool.
+            pool = self.client.nonce_pool
+            self.assertEqual(
+                [pool.take(), pool.take(), pool.take()], ["example-replay-Nonce", "old-nonce", None]
+            )
+
+    def test_jwk_thumbprint_is_calculated_per_rfc7638(self):
+        # https://tools.ietf.org/html/rfc7638#section-3.1
+        jwk = {
+            "kty": "RSA",
+            "n": "0vx7agoebGcQSuuPiLJXZptN9nndrQmbXEps2aiAFbWhM78LhWx4cbbfAAtVT86zwu1RK7aPFFxuhDR1L6tSoc_BJECPebWKRXjBZCiFV4n3oknjhMstn64tZ_2W-5JsGY4Hc5n9yBXArwl93lqt7_RN5w6Cf0h4QyQ5v-65YGjQR0_FDW2QvzqY368QQMicAtaSqzs8KJZgnYb9c7d0zgdAZHzu6qMQvRL5hajrn1n91CbOpbISD08qNLyrdkt-bFTWhAI4vMQFh6WeZu0fM4lFd2NcRwr3XPksINHaQ-G_xBniIqbw0Ls1jF44-csFCur-kEgU8awapJzKnqDKgw",
+            "e": "AQAB",
+            "alg": "RS256",
+            "kid": "2011-04-29",
+        }
+        required_members = {i: jwk[i] for i in ["e", "kty", "n"]}
+        self.assertEqual(
+            sewer.Client.calculate_jwk_thumbprint(required_members),
+            "NzbLsXh8uDCcd-6MNwXF4W_7noWXFZAfHkxZsRGC9Xs",
+        )
+
+    def test_get_keyauthorization_makes_no_network_calls(self):
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
+        ) as mock_requests_get, mock.patch(
+            "cryptography.hazmat.primitives.serialization.load_pem_private_key",
+            wraps=cryptography.hazmat.primitives.serialization.load_pem_private_key,
+        ) as mock_load_pem_private_key:
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
+
+            first = self.client.get_keyauthorization("dns_token")
+            second = self.client.get_keyauthorization("dns_token")
+            self.assertEqual(first, second)
+            self.assertTrue(first[0].startswith("dns_token."))
+            self.assertFalse(mock_requests_get.called)
+            self.assertFalse(mock_requests_post.called)
+            self.assertEqual(mock_load_pem_private_key.call_count, 1)
+
+    def test_ec_keys_are_generated(self):
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
+        ) as mock_requests_get:
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
+            client = sewer.Client(
+                domain_name=self.domain_name,
+                dns_class=self.dns_class,
+                account_key_type="ec256",
+                certificate_key_type="ec384",
+                ACME_DIRECTORY_URL=ACME_DIRECTORY_URL_STAGING,
+            )
+            account_key = cryptography.hazmat.primitives.serialization.load_pem_private_key(
+                client.account_key.encode(),
+                password=None,
+                backend=cryptography.hazmat.backends.default_backend(),
+            )
+            certificate_key = cryptography.hazmat.primitives.serialization.load_pem_private_key(
+                client.certificate_key.encode(),
+                password=None,
+                backend=cryptography.hazmat.backends.default_backend(),
+            )
+            self.assertEqual(account_key.curve.name, "secp256r1")
+            self.assertEqual(certificate_key.curve.name, "secp384r1")
+
+            csr = OpenSSL.crypto.load_certificate_request(OpenSSL.crypto.FILETYPE_ASN1, client.csr)
+            self.assertEqual(csr.get_pubkey().to_cryptography_key().curve.name, "secp384r1")
+
+            header = client.get_acme_header(client.ACME_NEW_ACCOUNT_URL)
+            self.assertEqual(header["alg"], "ES256")
+            self.assertEqual(header["jwk"]["kty"], "EC")
+            self.assertEqual(header["jwk"]["crv"], "P-256")
+
+    def test_wrong_key_type_to_client(self):
+        with self.assertRaises(ValueError) as raised_exception:
+            sewer.Client(
+                domain_name=self.domain_name,
+                dns_class=self.dns_class,
+                certificate_key_type="dsa",
+                ACME_DIRECTORY_URL=ACME_DIRECTORY_URL_STAGING,
+            )
+        self.assertIn("certificate_key_type should be one of", str(raised_exception.exception))
+
+    def mock_authorizations(self, number_of_authorizations):
+        authorizations = [
+            "http://localhost/authorization-url/{0}".format(i)
+            for i in range(number_of_authorizations)
+        ]
+
+        def get_identifier_authorization(url):
+            return {
+                "domain": "{0}.example.com".format(url.split("/")[-1]),
+                "url": url,
+                "wildcard": None,
+                "dns_token": "dns_token",
+                "dns_challenge_url": "dns_challenge_url",
+            }
+
+        return authorizations, get_identifier_authorization
+
+    def test_dns_records_are_created_concurrently(self):
+        authorizations, get_identifier_authorization = self.mock_authorizations(3)
+        # every call waits for the other two; this only passes if they run at the same time.
+        barrier = threading.Barrier(3, timeout=5)
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
+        ) as mock_requests_get, mock.patch(
+            "sewer.Client.apply_for_cert_issuance"
+        ) as mock_apply_for_cert_issuance, mock.patch(
+            "sewer.Client.get_identifier_authorization"
+        ) as mock_get_identifier_authorization, mock.patch.object(
+            self.dns_class, "create_dns_record"
+        ) as mock_create_dns_record, mock.patch.object(
+            self.dns_class, "delete_dns_record"
+        ) as mock_delete_dns_record:
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
+            mock_apply_for_cert_issuance.return_value = (
+                authorizations,
+                "http://localhost/finalize-url",
+            )
+            mock_get_identifier_authorization.side_effect = get_identifier_authorization
+            mock_create_dns_record.side_effect = lambda *args: barrier.wait()
+            mock_delete_dns_record.side_effect = lambda *args: barrier.wait()
+
+            self.client.max_workers = 3
+            self.client.order_url = acme_server.order_url
+            self.client.cert()
+            created = sorted(i[0][0] for i in mock_create_dns_record.call_args_list)
+            deleted = sorted(i[0][0] for i in mock_delete_dns_record.call_args_list)
+            self.assertEqual(created, ["0.example.com", "1.example.com", "2.example.com"])
+            self.assertEqual(deleted, created)
+
+    def test_only_created_dns_records_are_deleted(self):
+        authorizations, get_identifier_authorization = self.mock_authorizations(3)
+
+        def create_dns_record(domain_name, domain_dns_value):
+            if domain_name == "1.example.com":
+                raise ValueError("Error creating dns record")
+
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
+        ) as mock_requests_get, mock.patch(
+            "sewer.Client.apply_for_cert_issuance"
+        ) as mock_apply_for_cert_issuance, mock.patch(
+            "sewer.Client.get_identifier_authorization"
+        ) as mock_get_identifier_authorization, mock.patch.object(
+            self.dns_class, "create_dns_record"
+        ) as mock_create_dns_record, mock.patch.object(
+            self.dns_class, "delete_dns_record"
+        ) as mock_delete_dns_record:
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
+            mock_apply_for_cert_issuance.return_value = (
+                authorizations,
+                "http://localhost/finalize-url",
+            )
+            mock_get_identifier_authorization.side_effect = get_identifier_authorization
+            mock_create_dns_record.side_effect = create_dns_record
+
+            with self.assertRaises(ValueError):
+                self.client.cert()
+            self.assertEqual(mock_create_dns_record.call_count, 3)
+            deleted = sorted(i[0][0] for i in mock_delete_dns_record.call_args_list)
+            self.assertEqual(deleted, ["0.example.com", "2.example.com"])
+
+    def test_dns_records_of_an_order_are_created_with_one_call(self):
+        authorizations, get_identifier_authorization = self.mock_authorizations(3)
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
+        ) as mock_requests_get, mock.patch(
+            "sewer.Client.apply_for_cert_issuance"
+        ) as mock_apply_for_cert_issuance, mock.patch(
+            "sewer.Client.get_identifier_authorization"
+        ) as mock_get_identifier_authorization, mock.patch.object(
+            self.dns_class, "create_dns_records"
+        ) as mock_create_dns_records, mock.patch.object(
+            self.dns_class, "delete_dns_records"
+        ) as mock_delete_dns_records:
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
+            mock_apply_for_cert_issuance.return_value = (
+                authorizations,
+                "http://localhost/finalize-url",
+            )
+            mock_get_identifier_authorization.side_effect = get_identifier_authorization
+
+            # dns_class is called from one thread at a time unless the caller asks for more.
+            self.assertEqual(self.client.max_workers, 1)
+            self.client.max_workers = 3
+            self.client.order_url = acme_server.order_url
+            self.client.cert()
+            mock_create_dns_records.assert_called_once()
+            dns_names = mock_create_dns_records.call_args[0][0]
+            self.assertEqual(
+                [i[0] for i in dns_names], ["0.example.com", "1.example.com", "2.example.com"]
+            )
+            self.assertEqual(mock_create_dns_records.call_args[1], {"max_workers": 3})
+            mock_delete_dns_records.assert_called_once_with(dns_names, max_workers=3)
+
+    def test_wrong_max_workers_to_client(self):
+        with self.assertRaises(ValueError) as raised_exception:
+            sewer.Client(
+                domain_name=self.domain_name,
+                dns_class=self.dns_class,
+                max_workers=0,
+                ACME_DIRECTORY_URL=ACME_DIRECTORY_URL_STAGING,
+            )
+        self.assertIn("max_workers should be", str(raised_exception.exception))
+
+
+class TestClientPolling(TestCase):
+    """
+    Test that the client polls authorizations and orders until they are valid.
+    """
+
+    def setUp(self):
+        self.acme_server = test_utils.MockAcmeServer()
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
+        ) as mock_requests_get:
+            mock_requests_post.side_effect = self.acme_server.post
+            mock_requests_get.side_effect = self.acme_server.get
+            self.client = sewer.Client(
+                domain_name="example.com",
+                dns_class=test_utils.ExmpleDnsProvider(),
+                certificate_key_type="ec256",
+                account_key_type="ec256",
+                ACME_AUTH_STATUS_WAIT_PERIOD=0,
+                ACME_DIRECTORY_URL=ACME_DIRECTORY_URL_STAGING,
+            )
+
+    def test_order_is_polled_until_valid(self):
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
+        ) as mock_requests_get:
+            mock_requests_post.side_effect = self.acme_server.post
+            mock_requests_get.side_effect = self.acme_server.get
+            self.assertIn("-----BEGIN CERTIFICATE-----", self.client.cert())
+
+            requested_urls = [i[0][0] for i in mock_requests_get.call_args_list]
+            self.assertIn(self.acme_server.order_url, requested_urls)
+            self.assertEqual(self.client.order_url, self.acme_server.order_url)
+
+    def test_invalid_authorization_results_in_exception(self):
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
+        ) as mock_requests_get:
+            mock_requests_post.side_effect = self.acme_server.post
+            mock_requests_get.return_value = self.acme_server.response("invalid")
+
+            with self.assertRaises(ValueError) as raised_exception:
+                self.client.check_authorization_status("http://localhost/authorization-url")
+            self.assertIn("status=invalid", str(raised_exception.exception))
+
+    def test_authorization_polling_times_out(self):
+        with mock.patch("requests.Session.get") as mock_requests_get, mock.patch(
+            "time.sleep"
+        ) as mock_sleep:
+            mock_requests_get.return_value = self.acme_server.response("pending")
+            self.client.ACME_AUTH_STATUS_MAX_CHECKS = 3
+
+            with self.assertRaises(TimeoutError):
+                self.client.check_authorization_status("http://localhost/authorization-url")
+            self.assertEqual(mock_requests_get.call_count, 3)
+            # ACME_AUTH_STATUS_WAIT_PERIOD=0 means that polls are not waited on
+            self.assertEqual(mock_sleep.call_count, 0)
+
+    def test_authorization_polls_wait_up_to_wait_period(self):
+        self.client.ACME_AUTH_STATUS_WAIT_PERIOD = 4
+        poller = self.client.create_poller()
+        self.assertEqual(poller.initial_interval, 1)
+        self.assertEqual(poller.max_interval, 4)
+
 
 class TestClientForSAN(TestClient):
     """
@@ -296,11 +686,12 @@ class TestClientForSAN(TestClient):
             "staging.exampleSAN.com",
             "www.exampleSAN.com",
         ]
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
-            "requests.get"
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
         ) as mock_requests_get:
-            mock_requests_post.return_value = test_utils.MockResponse()
-            mock_requests_get.return_value = test_utils.MockResponse()
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
 
             self.dns_class = test_utils.ExmpleDnsProvider()
             self.client = sewer.Client(
@@ -311,6 +702,7 @@ class TestClientForSAN(TestClient):
                 ACME_AUTH_STATUS_WAIT_PERIOD=0,
                 ACME_DIRECTORY_URL=ACME_DIRECTORY_URL_STAGING,
             )
+            self.client.prepare()
         super(TestClientForSAN, self).setUp()
 
 
@@ -326,11 +718,12 @@ class TestClientForWildcard(TestClient):
             "staging.exampleSAN.com",
             "www.exampleSAN.com",
         ]
-        with mock.patch("requests.post") as mock_requests_post, mock.patch(
-            "requests.get"
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
         ) as mock_requests_get:
-            mock_requests_post.return_value = test_utils.MockResponse()
-            mock_requests_get.return_value = test_utils.MockResponse()
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
 
             self.dns_class = test_utils.ExmpleDnsProvider()
             self.client = sewer.Client(
@@ -342,6 +735,7 @@ class TestClientForWildcard(TestClient):
                 ACME_AUTH_STATUS_MAX_CHECKS=1,
                 ACME_DIRECTORY_URL=ACME_DIRECTORY_URL_STAGING,
             )
+            self.client.prepare()
         super(TestClientForWildcard, self).setUp()
 
 
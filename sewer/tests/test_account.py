@@ -0,0 +1,123 @@
+import mock
+from unittest import TestCase
+
+import sewer
+from sewer.config import ACME_DIRECTORY_URL_STAGING
+
+from . import test_utils
+
+
+class TestAcmeAccount(TestCase):
+    """
+    """
+
+    def setUp(self):
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
+        ) as mock_requests_get:
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
+            self.account = sewer.AcmeAccount(
+                account_key_type="ec256", ACME_DIRECTORY_URL=ACME_DIRECTORY_URL_STAGING
+            )
+            self.account.load_directory()
+
+    def create_client(self, domain_name):
+        return sewer.Client(
+            domain_name=domain_name,
+            dns_class=test_utils.ExmpleDnsProvider(),
+            certificate_key_type="ec256",
+            ACME_AUTH_STATUS_WAIT_PERIOD=0,
+            account=self.account,
+        )
+
+    def test_account_is_created(self):
+        self.assertIn("PRIVATE KEY", self.account.account_key)
+        self.assertFalse(self.account.PRIOR_REGISTERED)
+        self.assertEqual(self.account.ACME_NEW_ACCOUNT_URL, "http://localhost/newAccount")
+        self.assertIsNone(self.account.kid)
+
+    def test_register_is_done_once(self):
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
+        ) as mock_requests_get:
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
+
+            first = self.account.register()
+            second = self.account.register()
+            self.assertIs(first, second)
+            self.assertEqual(self.account.kid, "https://localhost/acme/acct/1")
+            self.assertEqual(mock_requests_post.call_count, 1)
+
+    def test_register_failure_results_in_exception(self):
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
+        ) as mock_requests_get:
+            mock_requests_post.return_value = test_utils.MockResponse(status_code=400)
+            mock_requests_get.return_value = test_utils.MockResponse()
+
+            self.assertRaises(ValueError, self.account.register)
+            self.assertIsNone(self.account.kid)
+
+    def test_clients_share_one_directory_fetch_and_registration(self):
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
+        ) as mock_requests_get:
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
+
+            for domain_name in ["example.com", "example.org", "example.net"]:
+                client = self.create_client(domain_name)
+                self.assertIs(client.account, self.account)
+                self.assertEqual(client.account_key, self.account.account_key)
+                self.assertIn("-----BEGIN CERTIFICATE-----", client.cert())
+
+            requested_urls = [i[0][0] for i in mock_requests_get.call_args_list]
+            self.assertNotIn(ACME_DIRECTORY_URL_STAGING, requested_urls)
+            posted_urls = [i[0][0] for i in mock_requests_post.call_args_list]
+            self.assertEqual(posted_urls.count("http://localhost/newAccount"), 1)
+            self.assertEqual(posted_urls.count("http://localhost/newOrder"), 3)
+
+    def test_account_is_created_lazily(self):
+        with mock.patch("requests.Session.get") as mock_requests_get, mock.patch(
+            "sewer.keys.create_key", wraps=sewer.keys.create_key
+        ) as mock_create_key:
+            mock_requests_get.side_effect = test_utils.MockAcmeServer().get
+            account = sewer.AcmeAccount(
+                account_key_type="ec256", ACME_DIRECTORY_URL=ACME_DIRECTORY_URL_STAGING
+            )
+            self.assertFalse(mock_requests_get.called)
+            self.assertFalse(mock_create_key.called)
+
+            self.assertEqual(account.ACME_NEW_ORDER_URL, "http://localhost/newOrder")
+            self.assertEqual(account.ACME_NEW_ACCOUNT_URL, "http://localhost/newAccount")
+            self.assertEqual(mock_requests_get.call_count, 1)
+            self.assertIs(account.account_key, account.account_key)
+            self.assertEqual(mock_create_key.call_count, 1)
+
+    def test_account_key_and_account_are_exclusive(self):
+        with self.assertRaises(ValueError):
+            sewer.Client(
+                domain_name="example.com",
+                dns_class=test_utils.ExmpleDnsProvider(),
+                account_key=self.account.account_key,
+                account=self.account,
+            )
+
+    def test_account_kwargs_and_account_are_exclusive(self):
+        for kwargs in [
+            {"authorization_cache": sewer.AuthorizationCache()},
+            {"state": mock.Mock()},
+            {"contact_email": "example@example.com"},
+        ]:
+            with self.assertRaises(ValueError):
+                sewer.Client(
+                    domain_name="example.com",
+                    dns_class=test_utils.ExmpleDnsProvider(),
+                    account=self.account,
+                    **kwargs
+                )
@@ -0,0 +1,207 @@
+import os
+import asyncio
+import tempfile
+import threading
+from unittest import TestCase
+
+import mock
+
+import sewer
+from sewer.config import ACME_DIRECTORY_URL_STAGING
+
+from . import test_utils
+
+
+class AsyncDnsProvider(test_utils.ExmpleDnsProvider):
+    def __init__(self):
+        super(AsyncDnsProvider, self).__init__()
+        self.created = []
+        self.deleted = []
+
+    async def async_create_dns_record(self, domain_name, domain_dns_value):
+        self.created.append(domain_name)
+
+    async def async_delete_dns_record(self, domain_name, domain_dns_value):
+        self.deleted.append(domain_name)
+
+
+class TestAsyncClient(TestCase):
+    """
+    """
+
+    def setUp(self):
+        self.acme_server = test_utils.MockAcmeServer()
+        self.requests = []
+        self.patcher = mock.patch("sewer.AsyncClient.request", autospec=True)
+        mock_request = self.patcher.start()
+        mock_request.side_effect = self.request
+        # the account is registered on the executor, with the sync http_session of the account.
+        self.post_patcher = mock.patch("requests.Session.post", side_effect=self.sync_post)
+        self.post_patcher.start()
+        self.get_patcher = mock.patch("requests.Session.get", side_effect=self.sync_get)
+        self.get_patcher.start()
+        self.sleeps = []
+        self.sleep_patcher = mock.patch("asyncio.sleep", side_effect=self.sleep)
+        self.sleep_patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.post_patcher.stop()
+        self.get_patcher.stop()
+        self.sleep_patcher.stop()
+
+    def sync_post(self, url, **kwargs):
+        self.requests.append(("POST", url))
+        return self.acme_server.post(url, **kwargs)
+
+    def sync_get(self, url, **kwargs):
+        self.requests.append(("GET", url))
+        return self.acme_server.get(url, **kwargs)
+
+    async def request(self, client, method, url, data=None, headers=None):
+        self.requests.append((method, url))
+        if method == "POST":
+            response = self.acme_server.post(url, data=data, headers=headers)
+        else:
+            response = self.acme_server.get(url, headers=headers)
+        client.nonce_pool.harvest(response)
+        return response
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+
+    def create_client(self, **kwargs):
+        kwargs.setdefault("dns_class", AsyncDnsProvider())
+        return sewer.AsyncClient(
+            domain_name="example.com",
+            domain_alt_names=["www.example.com"],
+            certificate_key_type="ec256",
+            account_key_type="ec256",
+            ACME_DIRECTORY_URL=ACME_DIRECTORY_URL_STAGING,
+            **kwargs
+        )
+
+    def test_certificate_is_issued(self):
+        client = self.create_client()
+        certificate = asyncio.run(client.cert())
+        self.assertIn("-----BEGIN CERTIFICATE-----", certificate)
+        self.assertEqual(len(client.dns_class.created), 2)
+        self.assertEqual(client.dns_class.deleted, client.dns_class.created)
+        posted = [url for method, url in self.requests if method == "POST"]
+        self.assertEqual(posted[:2], ["http://localhost/newAccount", "http://localhost/newOrder"])
+        self.assertIn("http://localhost/finalize-url", posted)
+        # the order was processing after finalize and was polled.
+        self.assertIn(("GET", self.acme_server.order_url), self.requests)
+        # the wait for the dns records to propagate did not block the event loop.
+        self.assertEqual(self.sleeps, [client.ACME_AUTH_STATUS_WAIT_PERIOD])
+
+    def test_sync_dns_provider_runs_on_executor(self):
+        dns_class = test_utils.ExmpleDnsProvider()
+        with mock.patch.object(dns_class, "create_dns_record") as mock_create_dns_record:
+            client = self.create_client(dns_class=dns_class)
+            asyncio.run(client.cert())
+            self.assertEqual(mock_create_dns_record.call_count, 2)
+
+    def test_clients_of_an_account_register_once(self):
+        account = sewer.AcmeAccount(
+            account_key_type="ec256", ACME_DIRECTORY_URL=ACME_DIRECTORY_URL_STAGING
+        )
+
+        async def issue():
+            clients = [
+                sewer.AsyncClient(
+                    domain_name=domain_name,
+                    dns_class=AsyncDnsProvider(),
+                    certificate_key_type="ec256",
+                    account=account,
+                )
+                for domain_name in ["example.com", "example.org", "example.net"]
+            ]
+            return await asyncio.gather(*[i.cert() for i in clients])
+
+        certificates = asyncio.run(issue())
+        self.assertEqual(len(certificates), 3)
+        self.assertEqual(self.requests.count(("GET", ACME_DIRECTORY_URL_STAGING)), 1)
+        self.assertEqual(self.requests.count(("POST", "http://localhost/newAccount")), 1)
+
+    def test_account_is_used_by_one_event_loop_after_another(self):
+        client = self.create_client()
+
+        async def contend():
+            lock = client.get_account_lock()
+
+            async def hold():
+                async with lock:
+                    await asyncio.get_running_loop().run_in_executor(None, lambda: None)
+
+            await asyncio.gather(hold(), hold())
+            return lock
+
+        first_lock = asyncio.run(contend())
+        second_lock = asyncio.run(contend())
+        self.assertIsNot(first_lock, second_lock)
+
+    def test_account_registered_by_a_sync_client_meanwhile_is_not_registered_again(self):
+        account = sewer.AcmeAccount(
+            account_key_type="ec256", ACME_DIRECTORY_URL=ACME_DIRECTORY_URL_STAGING
+        )
+        client = sewer.AsyncClient(
+            domain_name="example.com", dns_class=AsyncDnsProvider(), account=account
+        )
+
+        async def register():
+            await client.load_directory()
+            # a sync client is registering the account.
+            account._register_lock.acquire()
+            task = asyncio.ensure_future(client.acme_register())
+            await asyncio.get_running_loop().run_in_executor(None, lambda: None)
+            account.kid = "http://localhost/account"
+            account.registration_response = "sync-registration"
+            account._register_lock.release()
+            return await task
+
+        self.assertEqual(asyncio.run(register()), "sync-registration")
+        self.assertNotIn(("POST", "http://localhost/newAccount"), self.requests)
+
+    def test_state_and_authorization_cache_are_saved_off_the_event_loop(self):
+        saved_on = []
+        save_json_file = sewer.state.save_json_file
+
+        def save(path, *args, **kwargs):
+            saved_on.append((os.path.basename(path), threading.current_thread()))
+            return save_json_file(path, *args, **kwargs)
+
+        with tempfile.TemporaryDirectory() as temp_dir, mock.patch(
+            "sewer.state.save_json_file", side_effect=save
+        ):
+            client = self.create_client(
+                state=sewer.StateSnapshot(path=os.path.join(temp_dir, "state.json")),
+                authorization_cache=sewer.AuthorizationCache(
+                    path=os.path.join(temp_dir, "authorizations.json")
+                ),
+            )
+            asyncio.run(client.cert())
+        self.assertEqual({path for path, _ in saved_on}, {"state.json", "authorizations.json"})
+        for _, thread in saved_on:
+            self.assertIsNot(thread, threading.main_thread())
+
+    def test_dns_records_are_deleted_when_issuance_fails(self):
+        client = self.create_client()
+        with mock.patch("sewer.AsyncClient.send_csr", side_effect=ValueError("orderNotReady")):
+            with self.assertRaises(ValueError):
+                asyncio.run(client.cert())
+        self.assertEqual(len(client.dns_class.deleted), 2)
+
+
+class TestAsyncResponse(TestCase):
+    """
+    """
+
+    def test_json(self):
+        response = sewer.async_client.AsyncResponse(
+            200, {"Replay-Nonce": "n"}, b'{"status": "valid"}'
+        )
+        self.assertEqual(response.json(), {"status": "valid"})
+        self.assertEqual(sewer.AcmeAccount.log_response(response), {"status": "valid"})
+        with self.assertRaises(ValueError):
+            sewer.async_client.AsyncResponse(200, {}, b"<html>").json()
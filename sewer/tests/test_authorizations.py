@@ -0,0 +1,162 @@
+import os
+import json
+import datetime
+import tempfile
+from unittest import TestCase
+
+import mock
+
+import sewer
+from sewer.authorizations import AuthorizationCache, parse_expires
+from sewer.config import ACME_DIRECTORY_URL_STAGING
+
+from . import test_utils
+
+
+class TestAuthorizationCache(TestCase):
+    """
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "authorizations.json")
+        self.now = datetime.datetime(2020, 1, 1)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_parse_expires(self):
+        self.assertEqual(
+            parse_expires("2020-01-08T13:35:07.123456789Z"),
+            datetime.datetime(2020, 1, 8, 13, 35, 7),
+        )
+        self.assertIsNone(parse_expires(None))
+        self.assertIsNone(parse_expires("next week"))
+
+    def test_valid_authorization_is_returned(self):
+        cache = AuthorizationCache()
+        cache.add("account", "example.com", "http://localhost/authz/1", "2099-01-01T00:00:00Z")
+        self.assertEqual(
+            cache.get("account", "http://localhost/authz/1", now=self.now), "example.com"
+        )
+        self.assertIsNone(cache.get("account", "http://localhost/authz/2", now=self.now))
+        self.assertIsNone(cache.get("other-account", "http://localhost/authz/1", now=self.now))
+
+    def test_expiring_authorization_is_not_returned(self):
+        cache = AuthorizationCache(min_validity=3600)
+        cache.add("account", "example.com", "http://localhost/authz/1", "2099-01-01T00:30:00Z")
+        self.assertIsNone(
+            cache.get("account", "http://localhost/authz/1", now=datetime.datetime(2099, 1, 1))
+        )
+
+    def test_newer_authorization_replaces_older_one(self):
+        cache = AuthorizationCache()
+        cache.add("account", "example.com", "http://localhost/authz/1", "2099-01-01T00:00:00Z")
+        cache.add("account", "example.com", "http://localhost/authz/2", "2099-01-02T00:00:00Z")
+        self.assertIsNone(cache.get("account", "http://localhost/authz/1", now=self.now))
+        self.assertEqual(
+            cache.get("account", "http://localhost/authz/2", now=self.now), "example.com"
+        )
+
+    def test_remove(self):
+        cache = AuthorizationCache()
+        cache.add("account", "example.com", "http://localhost/authz/1", "2099-01-01T00:00:00Z")
+        cache.remove("account", "http://localhost/authz/1")
+        self.assertIsNone(cache.get("account", "http://localhost/authz/1", now=self.now))
+
+    def test_cache_is_persisted(self):
+        cache = AuthorizationCache(path=self.path)
+        cache.add("account", "*.example.com", "http://localhost/authz/1", "2099-01-01T00:00:00Z")
+
+        cache = AuthorizationCache(path=self.path)
+        self.assertEqual(
+            cache.get("account", "http://localhost/authz/1", now=self.now), "*.example.com"
+        )
+        self.assertEqual(os.listdir(self.temp_dir.name), ["authorizations.json"])
+
+    def test_corrupt_cache_is_ignored(self):
+        with open(self.path, "w") as cache_file:
+            cache_file.write("{not json")
+        cache = AuthorizationCache(path=self.path)
+        self.assertIsNone(cache.get("account", "http://localhost/authz/1", now=self.now))
+        cache.add("account", "example.com", "http://localhost/authz/1", "2099-01-01T00:00:00Z")
+        with open(self.path, "r") as cache_file:
+            self.assertIn("account", json.load(cache_file))
+
+
+class TestClientAuthorizationCache(TestCase):
+    """
+    Test that the client does not validate authorizations that are already valid.
+    """
+
+    def setUp(self):
+        self.acme_server = test_utils.MockAcmeServer()
+        self.dns_class = test_utils.ExmpleDnsProvider()
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
+        ) as mock_requests_get:
+            mock_requests_post.side_effect = self.acme_server.post
+            mock_requests_get.side_effect = self.acme_server.get
+            self.client = sewer.Client(
+                domain_name="example.com",
+                dns_class=self.dns_class,
+                certificate_key_type="ec256",
+                account_key_type="ec256",
+                ACME_AUTH_STATUS_WAIT_PERIOD=0,
+                ACME_DIRECTORY_URL=ACME_DIRECTORY_URL_STAGING,
+            )
+
+    def cert(self):
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
+        ) as mock_requests_get, mock.patch.object(
+            self.dns_class, "create_dns_record"
+        ) as mock_create_dns_record, mock.patch(
+            "sewer.Client.respond_to_challenge"
+        ) as mock_respond_to_challenge:
+            mock_requests_post.side_effect = self.acme_server.post
+            mock_requests_get.side_effect = self.acme_server.get
+            mock_respond_to_challenge.side_effect = lambda *args: self.acme_server.post(
+                "http://localhost/challenge-url"
+            )
+            self.assertIn("-----BEGIN CERTIFICATE-----", self.client.cert())
+            requested_urls = [i[0][0] for i in mock_requests_get.call_args_list]
+            return (
+                requested_urls.count(self.acme_server.authorization_url("example.com")),
+                mock_create_dns_record.call_count,
+                mock_respond_to_challenge.call_count,
+            )
+
+    def test_valid_authorization_is_not_validated_again(self):
+        # eg the account validated example.com with another client, in another order.
+        self.acme_server.challenge_responded = True
+        fetched, created, responded = self.cert()
+        self.assertEqual(fetched, 1)
+        self.assertEqual(created, 0)
+        self.assertEqual(responded, 0)
+
+    def test_cached_authorization_is_not_fetched_again(self):
+        fetched, created, responded = self.cert()
+        self.assertEqual(created, 1)
+        self.assertEqual(responded, 1)
+        self.assertEqual(
+            self.client.authorization_cache.get(
+                self.client.get_account_id(), self.acme_server.authorization_url("example.com")
+            ),
+            "example.com",
+        )
+
+        fetched, created, responded = self.cert()
+        self.assertEqual((fetched, created, responded), (0, 0, 0))
+
+    def test_cache_is_cleared_when_issuance_fails(self):
+        self.cert()
+        with mock.patch("sewer.Client.send_csr") as mock_send_csr:
+            mock_send_csr.side_effect = ValueError("orderNotReady")
+            with self.assertRaises(ValueError):
+                self.cert()
+        self.assertIsNone(
+            self.client.authorization_cache.get(
+                self.client.get_account_id(), self.acme_server.authorization_url("example.com")
+            )
+        )
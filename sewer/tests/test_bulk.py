@@ -0,0 +1,143 @@
+import mock
+from concurrent import futures
+from unittest import TestCase
+
+import sewer
+from sewer.config import ACME_DIRECTORY_URL_STAGING
+
+from . import test_utils
+
+
+class FailingDnsProvider(test_utils.ExmpleDnsProvider):
+    def create_dns_record(self, domain_name, domain_dns_value):
+        raise ValueError("Error creating dns record")
+
+
+class TestIssueMany(TestCase):
+    """
+    """
+
+    def test_certificates_are_issued(self):
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
+        ) as mock_requests_get:
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
+
+            specs = [
+                {"domain_name": "example.com"},
+                {"domain_name": "example.org", "domain_alt_names": ["www.example.org"]},
+                {"domain_name": "example.net", "certificate_key_type": "ec256"},
+            ]
+            results = sewer.issue_many(
+                specs,
+                dns_class=test_utils.ExmpleDnsProvider(),
+                account_key_type="ec256",
+                max_workers=2,
+                ACME_AUTH_STATUS_WAIT_PERIOD=0,
+                ACME_DIRECTORY_URL=ACME_DIRECTORY_URL_STAGING,
+            )
+
+            self.assertEqual([i.spec for i in results], specs)
+            self.assertEqual(len(set(i.account_key for i in results)), 1)
+            for result in results:
+                self.assertIsNone(result.error)
+                self.assertIn("-----BEGIN CERTIFICATE-----", result.certificate)
+                self.assertIn("PRIVATE KEY", result.certificate_key)
+
+    def test_one_failure_does_not_abort_the_rest(self):
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
+        ) as mock_requests_get:
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
+
+            results = sewer.issue_many(
+                [
+                    {"domain_name": "example.com", "certificate_key_type": "ec256"},
+                    {
+                        "domain_name": "example.org",
+                        "certificate_key_type": "ec256",
+                        "dns_class": FailingDnsProvider(),
+                    },
+                ],
+                dns_class=test_utils.ExmpleDnsProvider(),
+                account_key_type="ec256",
+                ACME_AUTH_STATUS_WAIT_PERIOD=0,
+                ACME_DIRECTORY_URL=ACME_DIRECTORY_URL_STAGING,
+            )
+
+            self.assertIsNone(results[0].error)
+            self.assertIsNotNone(results[0].certificate)
+            self.assertIsInstance(results[1].error, ValueError)
+            self.assertIsNone(results[1].certificate)
+
+    def test_keys_are_taken_from_key_pool(self):
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
+        ) as mock_requests_get:
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
+
+            key_pool = mock.Mock(wraps=sewer.KeyPool(executor=futures.ThreadPoolExecutor()))
+            specs = [
+                {"domain_name": "example.com"},
+                {"domain_name": "example.org", "certificate_key_type": "ec384"},
+            ]
+            results = sewer.issue_many(
+                specs,
+                dns_class=test_utils.ExmpleDnsProvider(),
+                account_key_type="ec256",
+                certificate_key_type="ec256",
+                key_pool=key_pool,
+                ACME_AUTH_STATUS_WAIT_PERIOD=0,
+                ACME_DIRECTORY_URL=ACME_DIRECTORY_URL_STAGING,
+            )
+            key_pool.close()
+
+            for result in results:
+                self.assertIsNone(result.error)
+            self.assertEqual(
+                sorted(i[1]["key_type"] for i in key_pool.fill.call_args_list), ["ec256", "ec384"]
+            )
+            self.assertEqual(
+                sorted(i[1]["key_type"] for i in key_pool.get.call_args_list),
+                ["ec256", "ec256", "ec384"],
+            )
+
+    def test_authorization_cache_is_used_by_the_account(self):
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
+        ) as mock_requests_get, mock.patch.object(
+            test_utils.ExmpleDnsProvider, "create_dns_record"
+        ) as mock_create_dns_record:
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
+
+            account_key = sewer.keys.create_key(sewer.keys.KEY_TYPE_EC256).decode()
+            authorization_cache = mock.Mock(wraps=sewer.AuthorizationCache())
+            dns_class = test_utils.ExmpleDnsProvider()
+            for _ in range(2):
+                results = sewer.issue_many(
+                    [{"domain_name": "example.com"}],
+                    dns_class=dns_class,
+                    account_key=account_key,
+                    certificate_key_type="ec256",
+                    authorization_cache=authorization_cache,
+                    ACME_AUTH_STATUS_WAIT_PERIOD=0,
+                    ACME_DIRECTORY_URL=ACME_DIRECTORY_URL_STAGING,
+                )
+                self.assertIsNone(results[0].error)
+
+            self.assertTrue(authorization_cache.get.called)
+            self.assertEqual(authorization_cache.add.call_count, 1)
+            # the second issuance found the authorization in the cache.
+            self.assertEqual(mock_create_dns_record.call_count, 1)
+
+    def test_max_workers_is_validated(self):
+        with self.assertRaises(ValueError):
+            sewer.issue_many([], max_workers=0)
@@ -0,0 +1,124 @@
+import os
+import tempfile
+from unittest import TestCase
+
+import mock
+from cryptography import x509
+from cryptography.x509.oid import NameOID
+from cryptography.hazmat.backends import default_backend
+
+import sewer
+from sewer import csr as csrs
+from sewer import keys
+
+from . import test_utils
+
+
+class TestCreateCsr(TestCase):
+    """ """
+
+    def setUp(self):
+        self.certificate_key = keys.create_key(keys.KEY_TYPE_EC256).decode()
+
+    def load(self, der):
+        return x509.load_der_x509_csr(der, default_backend())
+
+    def test_csr_has_all_names(self):
+        csr = self.load(
+            csrs.create_csr(
+                self.certificate_key,
+                ["example.com", "*.example.com", "example.com", "a.example.com"],
+            )
+        )
+        self.assertTrue(csr.is_signature_valid)
+        self.assertEqual(
+            csr.subject.get_attributes_for_oid(NameOID.COMMON_NAME)[0].value, "example.com"
+        )
+        san = csr.extensions.get_extension_for_class(x509.SubjectAlternativeName)
+        self.assertEqual(
+            san.value.get_values_for_type(x509.DNSName),
+            ["example.com", "*.example.com", "a.example.com"],
+        )
+
+    def test_many_names(self):
+        names = ["{0}.example.com".format(i) for i in range(100)]
+        csr = self.load(csrs.create_csr(self.certificate_key, names, digest="sha384"))
+        san = csr.extensions.get_extension_for_class(x509.SubjectAlternativeName)
+        self.assertEqual(san.value.get_values_for_type(x509.DNSName), names)
+        self.assertEqual(csr.signature_hash_algorithm.name, "sha384")
+
+    def test_wrong_digest(self):
+        with self.assertRaises(ValueError):
+            csrs.create_csr(self.certificate_key, ["example.com"], digest="nope")
+
+
+class TestCsrCache(TestCase):
+    """ """
+
+    def setUp(self):
+        self.certificate_key = keys.create_key(keys.KEY_TYPE_EC256).decode()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "csrs.json")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_csr_is_signed_once(self):
+        cache = sewer.CsrCache()
+        with mock.patch("sewer.csr.create_csr", wraps=csrs.create_csr) as mock_create_csr:
+            csr = cache.get_or_create(self.certificate_key, ["example.com", "a.example.com"])
+            self.assertEqual(
+                cache.get_or_create(self.certificate_key, ["example.com", "a.example.com"]), csr
+            )
+            # duplicate names make the same csr; a different common name does not.
+            self.assertEqual(
+                cache.get_or_create(
+                    self.certificate_key, ["example.com", "a.example.com", "example.com"]
+                ),
+                csr,
+            )
+            self.assertEqual(mock_create_csr.call_count, 1)
+
+            cache.get_or_create(self.certificate_key, ["a.example.com", "example.com"])
+            cache.get_or_create(self.certificate_key, ["example.com", "a.example.com"], "sha384")
+            cache.get_or_create(keys.create_key(keys.KEY_TYPE_EC256).decode(), ["example.com"])
+            self.assertEqual(mock_create_csr.call_count, 4)
+
+    def test_least_recently_used_csr_is_dropped(self):
+        cache = sewer.CsrCache(max_entries=2)
+        cache.get_or_create(self.certificate_key, ["a.example.com"])
+        cache.get_or_create(self.certificate_key, ["b.example.com"])
+        cache.get_or_create(self.certificate_key, ["a.example.com"])
+        cache.get_or_create(self.certificate_key, ["c.example.com"])
+        self.assertIsNotNone(cache.get(self.certificate_key, ["a.example.com"]))
+        self.assertIsNone(cache.get(self.certificate_key, ["b.example.com"]))
+
+    def test_cache_is_persisted(self):
+        csr = sewer.CsrCache(path=self.path).get_or_create(self.certificate_key, ["example.com"])
+        self.assertEqual(
+            sewer.CsrCache(path=self.path).get(self.certificate_key, ["example.com"]), csr
+        )
+        self.assertEqual(os.listdir(self.temp_dir.name), ["csrs.json"])
+
+    def test_corrupt_cache_is_ignored(self):
+        with open(self.path, "w") as cache_file:
+            cache_file.write("{not json")
+        cache = sewer.CsrCache(path=self.path)
+        self.assertIsNone(cache.get(self.certificate_key, ["example.com"]))
+
+    def test_client_uses_csr_cache(self):
+        cache = sewer.CsrCache()
+        with mock.patch("sewer.csr.create_csr", wraps=csrs.create_csr) as mock_create_csr:
+            for _ in range(2):
+                client = sewer.Client(
+                    domain_name="example.com",
+                    domain_alt_names=["www.example.com"],
+                    dns_class=test_utils.ExmpleDnsProvider(),
+                    certificate_key=self.certificate_key,
+                    csr_cache=cache,
+                )
+                self.assertEqual(self.load(client.csr).subject.rfc4514_string(), "CN=example.com")
+            self.assertEqual(mock_create_csr.call_count, 1)
+
+    def load(self, der):
+        return x509.load_der_x509_csr(der, default_backend())
@@ -0,0 +1,116 @@
+import json
+import base64
+from unittest import TestCase
+
+import mock
+import OpenSSL
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec, padding, utils
+
+from sewer import jws, keys
+
+
+def base64_decode(data):
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class TestAccountSigner(TestCase):
+    """
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        key = OpenSSL.crypto.PKey()
+        key.generate_key(OpenSSL.crypto.TYPE_RSA, 2048)
+        cls.account_key = OpenSSL.crypto.dump_privatekey(OpenSSL.crypto.FILETYPE_PEM, key).decode()
+
+    def setUp(self):
+        self.signer = jws.AccountSigner(self.account_key)
+
+    def test_int_to_base64(self):
+        self.assertEqual(jws.int_to_base64(65537), "AQAB")
+        self.assertEqual(jws.int_to_base64(0), "AA")
+
+    def test_jwk_is_rsa_public_key(self):
+        public_numbers = self.signer.private_key.public_key().public_numbers()
+        self.assertEqual(self.signer.jwk["kty"], "RSA")
+        self.assertEqual(self.signer.jwk["e"], "AQAB")
+        self.assertEqual(
+            int.from_bytes(base64_decode(self.signer.jwk["n"]), "big"), public_numbers.n
+        )
+        self.assertEqual(self.signer.thumbprint, jws.calculate_jwk_thumbprint(self.signer.jwk))
+
+    def test_protected_header_uses_jwk_or_kid(self):
+        header = self.signer.protected_header("http://localhost/newAccount", nonce="n1")
+        self.assertEqual(
+            header,
+            {
+                "alg": "RS256",
+                "jwk": self.signer.jwk,
+                "nonce": "n1",
+                "url": "http://localhost/newAccount",
+            },
+        )
+        header = self.signer.protected_header("http://localhost/newOrder", nonce="n2", kid="kid")
+        self.assertEqual(
+            header,
+            {"alg": "RS256", "kid": "kid", "nonce": "n2", "url": "http://localhost/newOrder"},
+        )
+        # the template must not leak state between requests
+        self.assertNotIn("kid", self.signer.protected_header("url", nonce="n3"))
+
+    def test_signed_request_verifies(self):
+        protected = self.signer.protected_header("http://localhost/newOrder", nonce="n", kid="kid")
+        body = json.loads(self.signer.sign_request(protected, {"identifiers": []}))
+
+        self.assertEqual(json.loads(base64_decode(body["protected"])), protected)
+        self.assertEqual(json.loads(base64_decode(body["payload"])), {"identifiers": []})
+        self.signer.private_key.public_key().verify(
+            base64_decode(body["signature"]),
+            "{0}.{1}".format(body["protected"], body["payload"]).encode("utf8"),
+            padding.PKCS1v15(),
+            hashes.SHA256(),
+        )
+
+    def test_account_key_is_parsed_once(self):
+        with mock.patch("cryptography.hazmat.primitives.serialization.load_pem_private_key") as m:
+            for _ in range(3):
+                self.signer.sign("message")
+            self.assertFalse(m.called)
+
+
+class TestEcAccountSigner(TestCase):
+    """
+    """
+
+    def test_ec256_signer(self):
+        signer = jws.AccountSigner(keys.create_key(keys.KEY_TYPE_EC256).decode())
+        self.assertEqual(signer.alg, "ES256")
+        self.assertEqual(sorted(signer.jwk.keys()), ["crv", "kty", "x", "y"])
+        self.assertEqual(signer.jwk["crv"], "P-256")
+        self.assertEqual(len(base64_decode(signer.jwk["x"])), 32)
+        self.assertEqual(len(base64_decode(signer.jwk["y"])), 32)
+        self.assertEqual(signer.protected_header("url", nonce="n")["alg"], "ES256")
+
+        signature = signer.sign("message")
+        self.assertEqual(len(signature), 64)
+        r, s = int.from_bytes(signature[:32], "big"), int.from_bytes(signature[32:], "big")
+        signer.private_key.public_key().verify(
+            utils.encode_dss_signature(r, s), b"message", ec.ECDSA(hashes.SHA256())
+        )
+
+    def test_ec384_signer(self):
+        signer = jws.AccountSigner(keys.create_key(keys.KEY_TYPE_EC384).decode())
+        self.assertEqual(signer.alg, "ES384")
+        self.assertEqual(signer.jwk["crv"], "P-384")
+
+        signature = signer.sign("message")
+        self.assertEqual(len(signature), 96)
+        r, s = int.from_bytes(signature[:48], "big"), int.from_bytes(signature[48:], "big")
+        signer.private_key.public_key().verify(
+            utils.encode_dss_signature(r, s), b"message", ec.ECDSA(hashes.SHA384())
+        )
+
+    def test_unknown_key_type(self):
+        with self.assertRaises(ValueError):
+            keys.create_key("dsa")
@@ -0,0 +1,63 @@
+import concurrent.futures
+from unittest import TestCase
+
+import mock
+
+from sewer import keys
+
+
+class TestKeyPool(TestCase):
+    """
+    """
+
+    def setUp(self):
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        self.key_pool = keys.KeyPool(stock=2, executor=self.executor)
+
+    def tearDown(self):
+        self.key_pool.close()
+        self.executor.shutdown()
+
+    def test_keys_are_created_on_a_process_pool(self):
+        with keys.KeyPool(max_workers=1, stock=1) as key_pool:
+            self.assertIsInstance(key_pool.executor, concurrent.futures.ProcessPoolExecutor)
+            self.assertEqual(key_pool.executor._mp_context.get_start_method(), "spawn")
+            self.assertIn(b"PRIVATE KEY", key_pool.get(keys.KEY_TYPE_EC256))
+
+    def test_stock_is_kept_full(self):
+        with mock.patch.object(self.executor, "submit", wraps=self.executor.submit) as submit:
+            self.key_pool.fill(keys.KEY_TYPE_EC256)
+            self.key_pool.fill(keys.KEY_TYPE_EC256)
+            self.assertEqual(submit.call_count, 2)
+
+            key = self.key_pool.get(keys.KEY_TYPE_EC256)
+            self.assertIn(b"PRIVATE KEY", key)
+            # the key came from the stock; one more is created to replace it.
+            self.assertEqual(submit.call_count, 3)
+            self.assertEqual(len(self.key_pool._stock[(keys.KEY_TYPE_EC256, None)]), 2)
+
+    def test_keys_are_handed_out_once(self):
+        self.key_pool.fill(keys.KEY_TYPE_EC256)
+        created = [self.key_pool.get(keys.KEY_TYPE_EC256) for _ in range(5)]
+        self.assertEqual(len(set(created)), 5)
+
+    def test_stock_is_per_key_type_and_bits(self):
+        with mock.patch("sewer.keys.create_key") as mock_create_key:
+            mock_create_key.side_effect = lambda key_type, bits: "{0}-{1}".format(key_type, bits)
+            self.key_pool.fill(keys.KEY_TYPE_RSA, bits=4096)
+            self.assertEqual(self.key_pool.get(keys.KEY_TYPE_EC384, bits=4096), "ec384-4096")
+            self.assertEqual(self.key_pool.get(keys.KEY_TYPE_RSA, bits=4096), "rsa-4096")
+            self.assertEqual(self.key_pool.get(keys.KEY_TYPE_RSA, bits=2048), "rsa-2048")
+
+    def test_close_discards_stock(self):
+        self.key_pool.fill(keys.KEY_TYPE_EC256)
+        self.key_pool.close()
+        self.assertEqual(len(self.key_pool._stock[(keys.KEY_TYPE_EC256, None)]), 0)
+        with self.assertRaises(ValueError):
+            self.key_pool.get(keys.KEY_TYPE_EC256)
+
+    def test_unknown_key_type(self):
+        with self.assertRaises(ValueError):
+            self.key_pool.get("dsa")
+        with self.assertRaises(ValueError):
+            keys.KeyPool(stock=-1, executor=self.executor)
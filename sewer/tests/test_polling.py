@@ -0,0 +1,143 @@
+import asyncio
+import datetime
+from unittest import TestCase
+
+from sewer import polling
+
+
+class MockPollResponse(object):
+    def __init__(self, status="pending", retry_after=None):
+        self.status = status
+        self.headers = {}
+        if retry_after is not None:
+            self.headers["Retry-After"] = retry_after
+
+
+class MockClock(object):
+    """
+    a clock that only moves when the poller sleeps.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now = self.now + seconds
+
+
+class TestParseRetryAfter(TestCase):
+    """ """
+
+    def test_no_retry_after(self):
+        self.assertIsNone(polling.parse_retry_after(MockPollResponse()))
+
+    def test_retry_after_seconds(self):
+        self.assertEqual(polling.parse_retry_after(MockPollResponse(retry_after="3")), 3.0)
+        self.assertEqual(polling.parse_retry_after(MockPollResponse(retry_after="-3")), 0.0)
+
+    def test_retry_after_http_date(self):
+        now = datetime.datetime(2020, 1, 1, 0, 0, 0, tzinfo=datetime.timezone.utc)
+        response = MockPollResponse(retry_after="Wed, 01 Jan 2020 00:00:10 GMT")
+        self.assertEqual(polling.parse_retry_after(response, now=now), 10.0)
+        response = MockPollResponse(retry_after="Tue, 31 Dec 2019 23:59:50 GMT")
+        self.assertEqual(polling.parse_retry_after(response, now=now), 0.0)
+
+    def test_invalid_retry_after(self):
+        self.assertIsNone(polling.parse_retry_after(MockPollResponse(retry_after="soon")))
+
+
+class TestPoller(TestCase):
+    """ """
+
+    def setUp(self):
+        self.clock = MockClock()
+
+    def create_poller(self, **kwargs):
+        return polling.Poller(sleep=self.clock.sleep, clock=self.clock, **kwargs)
+
+    def poll(self, poller, responses):
+        responses = iter(responses)
+        return poller.poll(lambda: next(responses), lambda response: response.status == "valid")
+
+    def test_first_poll_does_not_wait(self):
+        response = self.poll(self.create_poller(), [MockPollResponse("valid")])
+        self.assertEqual(response.status, "valid")
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_backoff_grows_up_to_max_interval(self):
+        poller = self.create_poller(initial_interval=1, max_interval=8, jitter=0)
+        responses = [MockPollResponse() for _ in range(6)] + [MockPollResponse("valid")]
+        self.poll(poller, responses)
+        self.assertEqual(self.clock.sleeps, [1, 2, 4, 8, 8, 8])
+
+    def test_jitter_stays_within_bounds(self):
+        poller = self.create_poller(initial_interval=1, max_interval=8, jitter=0.5)
+        for number_of_polls, interval in [(1, 1), (2, 2), (3, 4), (4, 8), (10, 8)]:
+            for _ in range(50):
+                wait = poller.interval(number_of_polls)
+                self.assertLessEqual(wait, interval)
+                self.assertGreaterEqual(wait, max(1, interval * 0.5))
+
+    def test_retry_after_is_honored(self):
+        poller = self.create_poller(initial_interval=1, max_interval=8, jitter=0)
+        self.poll(
+            poller,
+            [
+                MockPollResponse(retry_after="5"),
+                MockPollResponse(retry_after="0"),
+                MockPollResponse("valid"),
+            ],
+        )
+        # a Retry-After of 0 is raised to initial_interval; there is no busy loop.
+        self.assertEqual(self.clock.sleeps, [5, 1])
+
+    def test_deadline_raises_timeout(self):
+        poller = self.create_poller(initial_interval=1, max_interval=8, jitter=0, timeout=10)
+        with self.assertRaises(TimeoutError):
+            self.poll(poller, [MockPollResponse() for _ in range(100)])
+        # the last wait is cut short so that polling stops at the deadline.
+        self.assertEqual(self.clock.sleeps, [1, 2, 4, 3])
+        self.assertEqual(self.clock.now, 10)
+
+    def test_max_polls_raises_timeout(self):
+        poller = self.create_poller(jitter=0, max_polls=3)
+        with self.assertRaises(TimeoutError):
+            self.poll(poller, [MockPollResponse() for _ in range(100)])
+        self.assertEqual(len(self.clock.sleeps), 2)
+
+    def test_is_done_can_stop_polling(self):
+        def is_done(response):
+            if response.status == "invalid":
+                raise ValueError("invalid")
+            return response.status == "valid"
+
+        responses = iter([MockPollResponse(), MockPollResponse("invalid")])
+        with self.assertRaises(ValueError):
+            self.create_poller(jitter=0).poll(lambda: next(responses), is_done)
+
+    def test_poll_async(self):
+        async def sleep(seconds):
+            self.clock.sleep(seconds)
+
+        responses = iter(
+            [MockPollResponse(retry_after="3"), MockPollResponse(), MockPollResponse("valid")]
+        )
+
+        async def request():
+            return next(responses)
+
+        poller = self.create_poller(jitter=0, async_sleep=sleep)
+        response = asyncio.run(
+            poller.poll_async(request, lambda response: response.status == "valid")
+        )
+        self.assertEqual(response.status, "valid")
+        self.assertEqual(self.clock.sleeps, [3, 2])
+
+    def test_zero_interval_is_rejected(self):
+        with self.assertRaises(ValueError):
+            polling.Poller(initial_interval=0, max_interval=0)
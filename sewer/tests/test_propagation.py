@@ -0,0 +1,161 @@
+from unittest import TestCase
+
+import mock
+import dns.resolver
+import dns.exception
+
+import sewer
+from sewer import polling
+from sewer import propagation
+from sewer.config import ACME_DIRECTORY_URL_STAGING
+
+from . import test_utils
+
+
+class MockRdata(object):
+    def __init__(self, value):
+        self.value = value
+        self.target = value
+        self.strings = [value.encode()]
+
+    def __str__(self):
+        return self.value
+
+
+class MockDns(object):
+    """
+    a fake dns. example.com is served by two authoritative nameservers, each with its own TXT records.
+    """
+
+    def __init__(self):
+        self.ns = {"example.com.": ["ns1.example.net.", "ns2.example.net."]}
+        self.a = {"ns1.example.net.": ["10.0.0.1"], "ns2.example.net.": ["10.0.0.2"]}
+        self.cname = {}
+        self.txt = {"10.0.0.1": {}, "10.0.0.2": {}}
+
+    def resolve(self, resolver, name, rdtype):
+        if rdtype == "TXT":
+            values = self.txt[resolver.nameservers[0]].get(name)
+        elif rdtype == "NS":
+            values = self.ns.get(name)
+        elif rdtype == "A":
+            values = self.a.get(name)
+        elif rdtype == "CNAME":
+            values = self.cname.get(name)
+        else:
+            values = None
+        if not values:
+            raise dns.resolver.NoAnswer()
+        return [MockRdata(i) for i in values]
+
+
+class TestPropagationChecker(TestCase):
+    """
+    """
+
+    def setUp(self):
+        self.dns = MockDns()
+        self.sleeps = []
+        self.checker = propagation.PropagationChecker(
+            poller=polling.Poller(jitter=0, timeout=10, sleep=self.sleeps.append)
+        )
+        self.patcher = mock.patch.object(
+            dns.resolver.Resolver, "resolve", autospec=True, side_effect=self.dns.resolve
+        )
+        self.mock_resolve = self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_challenge_name(self):
+        self.assertEqual(propagation.challenge_name("example.com"), "_acme-challenge.example.com.")
+        self.assertEqual(
+            propagation.challenge_name("*.example.com"), "_acme-challenge.example.com."
+        )
+
+    def test_find_authoritative_nameservers(self):
+        self.assertEqual(
+            self.checker.find_authoritative_nameservers("_acme-challenge.example.com."),
+            ["10.0.0.1", "10.0.0.2"],
+        )
+
+    def test_wait_returns_once_visible_on_all_nameservers(self):
+        name = "_acme-challenge.example.com."
+        self.dns.txt["10.0.0.1"][name] = ["abc", "def"]
+        self.dns.txt["10.0.0.2"][name] = ["abc"]
+
+        def sleep(seconds):
+            self.sleeps.append(seconds)
+            self.dns.txt["10.0.0.2"][name] = ["abc", "def"]
+
+        self.checker.poller.sleep = sleep
+        # a wildcard and its base domain share one TXT name and need both values.
+        self.checker.wait(
+            [
+                {"dns_name": "example.com", "domain_dns_value": "abc"},
+                {"dns_name": "*.example.com", "domain_dns_value": "def"},
+            ]
+        )
+        self.assertEqual(self.sleeps, [1])
+
+    def test_wait_times_out(self):
+        self.dns.txt["10.0.0.1"]["_acme-challenge.example.com."] = ["abc"]
+        with self.assertRaises(TimeoutError):
+            with mock.patch.object(self.checker.poller, "clock", side_effect=[0, 0, 11]):
+                self.checker.wait([{"dns_name": "example.com", "domain_dns_value": "abc"}])
+
+    def test_cname_is_followed(self):
+        self.dns.cname["_acme-challenge.example.com."] = ["abc123.auth.example.com."]
+        self.dns.txt["10.0.0.1"]["abc123.auth.example.com."] = ["abc"]
+        self.dns.txt["10.0.0.2"]["abc123.auth.example.com."] = ["abc"]
+        self.checker.wait([{"dns_name": "example.com", "domain_dns_value": "abc"}])
+        self.assertEqual(self.sleeps, [])
+
+    def test_failed_nameserver_lookups_are_retried(self):
+        name = "_acme-challenge.example.com."
+        self.dns.txt["10.0.0.1"][name] = ["abc"]
+        self.dns.txt["10.0.0.2"][name] = ["abc"]
+        resolve = self.dns.resolve
+        errors = {
+            "CNAME": [dns.exception.Timeout()],
+            "NS": [dns.resolver.NoNameservers()],
+        }
+
+        def fail_once(resolver, name, rdtype):
+            if errors.get(rdtype):
+                raise errors[rdtype].pop(0)
+            return resolve(resolver, name, rdtype)
+
+        self.mock_resolve.side_effect = fail_once
+        self.checker.wait([{"dns_name": "example.com", "domain_dns_value": "abc"}])
+        self.assertEqual(self.sleeps, [1, 2])
+
+    def test_failing_nameserver_lookups_time_out(self):
+        def fail(resolver, name, rdtype):
+            raise dns.resolver.NoNameservers()
+
+        self.mock_resolve.side_effect = fail
+        with self.assertRaises(TimeoutError):
+            with mock.patch.object(self.checker.poller, "clock", side_effect=[0, 0, 11]):
+                self.checker.wait([{"dns_name": "example.com", "domain_dns_value": "abc"}])
+
+    def test_client_waits_on_propagation_checker(self):
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
+        ) as mock_requests_get, mock.patch("time.sleep") as mock_sleep:
+            acme_server = test_utils.MockAcmeServer()
+            mock_requests_post.side_effect = acme_server.post
+            mock_requests_get.side_effect = acme_server.get
+            checker = mock.Mock()
+            client = sewer.Client(
+                domain_name="example.com",
+                dns_class=test_utils.ExmpleDnsProvider(),
+                certificate_key_type="ec256",
+                account_key_type="ec256",
+                ACME_DIRECTORY_URL=ACME_DIRECTORY_URL_STAGING,
+                propagation_checker=checker,
+            )
+            dns_names = [{"dns_name": "example.com", "domain_dns_value": "abc"}]
+            client.wait_for_dns_propagation(dns_names)
+            checker.wait.assert_called_once_with(dns_names)
+            self.assertFalse(mock_sleep.called)
@@ -0,0 +1,142 @@
+import os
+import json
+import tempfile
+import collections
+from unittest import TestCase
+
+import mock
+
+import sewer
+from sewer.config import ACME_DIRECTORY_URL_STAGING
+
+from . import test_utils
+
+
+class TestStateSnapshot(TestCase):
+    """
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "state.json")
+        self.account_key = sewer.keys.create_key(key_type="ec256").decode()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def create_account(self, state):
+        self.acme_server = test_utils.MockAcmeServer()
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
+        ) as mock_requests_get:
+            mock_requests_post.side_effect = self.acme_server.post
+            mock_requests_get.side_effect = self.acme_server.get
+            account = sewer.AcmeAccount(
+                account_key=self.account_key,
+                ACME_DIRECTORY_URL=ACME_DIRECTORY_URL_STAGING,
+                state=state,
+            )
+            account.register()
+            return account, mock_requests_get, mock_requests_post
+
+    def test_snapshot_is_persisted(self):
+        state = sewer.StateSnapshot(path=self.path)
+        state.set_directory(ACME_DIRECTORY_URL_STAGING, {"newOrder": "http://localhost/newOrder"})
+        state.set_account(ACME_DIRECTORY_URL_STAGING, self.account_key, "kid", {"kty": "EC"}, "tp")
+
+        state = sewer.StateSnapshot(path=self.path)
+        self.assertEqual(
+            state.get_directory(ACME_DIRECTORY_URL_STAGING),
+            {"newOrder": "http://localhost/newOrder"},
+        )
+        self.assertEqual(
+            state.get_account(ACME_DIRECTORY_URL_STAGING, self.account_key)["kid"], "kid"
+        )
+        self.assertIsNone(state.get_account(ACME_DIRECTORY_URL_STAGING, "another-account-key"))
+        self.assertEqual(os.listdir(self.temp_dir.name), ["state.json"])
+
+    def test_old_entries_are_ignored(self):
+        state = sewer.StateSnapshot(path=self.path, ttl=60)
+        with mock.patch("time.time") as mock_time:
+            mock_time.return_value = 1000
+            state.set_directory(ACME_DIRECTORY_URL_STAGING, {})
+            mock_time.return_value = 1059
+            self.assertEqual(state.get_directory(ACME_DIRECTORY_URL_STAGING), {})
+            mock_time.return_value = 1061
+            self.assertIsNone(state.get_directory(ACME_DIRECTORY_URL_STAGING))
+
+    def test_corrupt_snapshot_is_ignored(self):
+        with open(self.path, "w") as state_file:
+            state_file.write("{not json")
+        state = sewer.StateSnapshot(path=self.path)
+        self.assertIsNone(state.get_directory(ACME_DIRECTORY_URL_STAGING))
+
+    def test_json_file_keeps_its_order_and_is_only_readable_by_its_owner(self):
+        sewer.state.save_json_file(self.path, {"b": 1, "a": 2}, sort_keys=False)
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o600)
+        data = sewer.state.load_json_file(
+            self.path, "json file", object_pairs_hook=collections.OrderedDict
+        )
+        self.assertEqual(list(data), ["b", "a"])
+
+        with open(self.path, "w") as json_file:
+            json.dump(["not", "a", "dict"], json_file)
+        self.assertEqual(sewer.state.load_json_file(self.path, "json file"), {})
+        self.assertEqual(sewer.state.load_json_file(None, "json file"), {})
+
+    def test_warm_start_skips_directory_and_registration(self):
+        cold_account, _, _ = self.create_account(sewer.StateSnapshot(path=self.path))
+        with open(self.path, "r") as state_file:
+            self.assertIn("accounts", json.load(state_file))
+
+        account, mock_requests_get, mock_requests_post = self.create_account(
+            sewer.StateSnapshot(path=self.path)
+        )
+        self.assertFalse(mock_requests_get.called)
+        self.assertFalse(mock_requests_post.called)
+        self.assertEqual(account.kid, cold_account.kid)
+        self.assertEqual(account.ACME_NEW_ORDER_URL, cold_account.ACME_NEW_ORDER_URL)
+        self.assertEqual(account.get_jwk_thumbprint(), cold_account.get_jwk_thumbprint())
+        self.assertEqual(account.get_jwk(), cold_account.get_jwk())
+
+    def test_stale_kid_is_registered_again(self):
+        state = sewer.StateSnapshot(path=self.path)
+        state.set_account(
+            ACME_DIRECTORY_URL_STAGING, self.account_key, "https://localhost/acme/acct/0", {}, ""
+        )
+        account, _, _ = self.create_account(state)
+        self.assertEqual(account.kid, "https://localhost/acme/acct/0")
+
+        unknown_account = test_utils.MockResponse(
+            status_code=400, content={"type": "urn:ietf:params:acme:error:accountDoesNotExist"}
+        )
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
+        ) as mock_requests_get:
+            responses = iter([unknown_account])
+            mock_requests_post.side_effect = lambda url, **kwargs: next(
+                responses, None
+            ) or self.acme_server.post(url, **kwargs)
+            mock_requests_get.side_effect = self.acme_server.get
+            client = sewer.Client(
+                domain_name="example.com",
+                dns_class=test_utils.ExmpleDnsProvider(),
+                certificate_key_type="ec256",
+                account=account,
+            )
+            client.apply_for_cert_issuance()
+
+            requested_urls = [i[0][0] for i in mock_requests_post.call_args_list]
+            self.assertEqual(
+                requested_urls,
+                [
+                    "http://localhost/newOrder",
+                    "http://localhost/newAccount",
+                    "http://localhost/newOrder",
+                ],
+            )
+        self.assertEqual(account.kid, "https://localhost/acme/acct/1")
+        self.assertEqual(
+            state.get_account(ACME_DIRECTORY_URL_STAGING, self.account_key)["kid"],
+            "https://localhost/acme/acct/1",
+        )
@@ -0,0 +1,53 @@
+import mock
+from unittest import TestCase
+
+import sewer
+from sewer import transport
+from sewer.config import ACME_DIRECTORY_URL_STAGING
+
+from . import test_utils
+
+
+class TestTransport(TestCase):
+    """
+    """
+
+    def test_session_retries_throttled_and_failed_requests(self):
+        session = transport.create_session(pool_maxsize=25, max_retries=4)
+        adapter = session.get_adapter("https://acme-v02.api.letsencrypt.org/directory")
+        retry = adapter.max_retries
+
+        self.assertEqual(adapter._pool_maxsize, 25)
+        self.assertEqual(retry.total, 4)
+        self.assertTrue(retry.respect_retry_after_header)
+        for status_code in [429, 500, 502, 503, 504]:
+            self.assertIn(status_code, retry.status_forcelist)
+
+    def test_session_does_not_retry_posts(self):
+        retry = transport.create_session().get_adapter("https://example.com").max_retries
+        self.assertTrue(retry.is_retry("GET", 503))
+        self.assertFalse(retry.is_retry("POST", 503))
+
+    def test_client_uses_given_session(self):
+        http_session = transport.create_session()
+        with mock.patch("requests.Session.post") as mock_requests_post, mock.patch(
+            "requests.Session.get"
+        ) as mock_requests_get:
+            mock_requests_post.return_value = test_utils.MockResponse()
+            mock_requests_get.return_value = test_utils.MockResponse()
+            client = sewer.Client(
+                domain_name="example.com",
+                dns_class=test_utils.ExmpleDnsProvider(),
+                ACME_DIRECTORY_URL=ACME_DIRECTORY_URL_STAGING,
+                http_session=http_session,
+            )
+            self.assertIs(client.http_session, http_session)
+
+    def test_dns_provider_uses_given_session(self):
+        http_session = transport.create_session()
+        dns_class = sewer.CloudFlareDns(
+            CLOUDFLARE_EMAIL="mock-email@example.com",
+            CLOUDFLARE_API_KEY="mock-api-key",
+            http_session=http_session,
+        )
+        self.assertIs(dns_class.http_session, http_session)
@@ -1,4 +1,5 @@
 import json
+import base64
 
 import sewer
 
@@ -58,3 +59,82 @@ class MockResponse(object):
     def json(self):
         json_d = json.loads(self.content_to_use_in_json_method.decode())
         return json_d
+
+
+class MockAcmeServer(object):
+    """
+    a stateful mock of an acme server, for use as the side_effect of
+    mock.patch("requests.Session.get") and mock.patch("requests.Session.post").
+
+    Every identifier of an order has its own authorization and challenge urls, eg
+    http://localhost/authorization-url/example.com and http://localhost/challenge-url/example.com
+    Authorizations are `pending` until their challenge has been responded to, then `valid`.
+    Setting challenge_responded makes all the authorizations `valid`.
+    An order is `processing` until it has been finalized, then `valid`.
+    """
+
+    order_url = "http://localhost/order-url"
+
+    def __init__(self):
+        self.challenge_responded = False
+        # the identifiers whose challenge has been responded to
+        self.responded = set()
+        self.finalized = False
+        self.authorization_expires = "2099-01-01T00:00:00Z"
+
+    @staticmethod
+    def authorization_url(identifier):
+        return "http://localhost/authorization-url/{0}".format(identifier)
+
+    @staticmethod
+    def challenge_url(identifier):
+        return "http://localhost/challenge-url/{0}".format(identifier)
+
+    @staticmethod
+    def signed_payload(data):
+        payload64 = json.loads(data.decode())["payload"]
+        return json.loads(base64.urlsafe_b64decode(payload64 + "=" * (-len(payload64) % 4)))
+
+    def response(self, status, headers=None, content=None):
+        response = MockResponse()
+        content = dict(response.json(), **(content or {}))
+        content["status"] = status
+        content["expires"] = self.authorization_expires
+        response.content = json.dumps(content).encode()
+        response.content_to_use_in_json_method = response.content
+        response.headers.update(headers or {})
+        return response
+
+    def get(self, url, **kwargs):
+        if url.startswith(self.authorization_url("")):
+            identifier = url[len(self.authorization_url("")) :]
+            challenges = [
+                {"type": "dns-01", "token": "example-token", "url": self.challenge_url(identifier)}
+            ]
+            valid = self.challenge_responded or identifier in self.responded
+            return self.response(
+                "valid" if valid else "pending", content={"challenges": challenges}
+            )
+        if "authorization-url" in url:
+            return self.response("valid" if self.challenge_responded else "pending")
+        if url == self.order_url:
+            return self.response("valid" if self.finalized else "processing")
+        return MockResponse()
+
+    def post(self, url, **kwargs):
+        if url == "http://localhost/newOrder":
+            identifiers = self.signed_payload(kwargs["data"]).get("identifiers", [])
+            authorizations = [self.authorization_url(i["value"]) for i in identifiers]
+            return self.response(
+                "pending",
+                headers={"Location": self.order_url},
+                content={"authorizations": authorizations},
+            )
+        if url == "http://localhost/finalize-url":
+            self.finalized = True
+            return self.response("processing", headers={"Location": self.order_url})
+        if url.startswith(self.challenge_url("")):
+            self.responded.add(url[len(self.challenge_url("")) :])
+        elif url != "http://localhost/newAccount":
+            self.challenge_responded = True
+        return MockResponse()
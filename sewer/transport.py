@@ -0,0 +1,132 @@
+import json
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    async_dependencies = True
+    import aiohttp
+except ImportError:
+    async_dependencies = False
+
+# https://tools.ietf.org/html/rfc7231#section-4.2.2
+# signed acme requests are POSTs whose nonce is single use, so only idempotent methods are
+# retried by default. A POST that fails with a 5xx has to be re-signed by the caller.
+IDEMPOTENT_METHODS = ("HEAD", "GET", "PUT", "DELETE", "OPTIONS", "TRACE")
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+def create_retry(
+    max_retries=3,
+    backoff_factor=0.5,
+    status_forcelist=RETRY_STATUS_CODES,
+    allowed_methods=IDEMPOTENT_METHODS,
+):
+    """
+    builds a urllib3 Retry policy that backs off exponentially on connection errors and on
+    the given status codes, and honors the Retry-After header sent with 429 and 503 responses.
+    """
+    kwargs = {
+        "total": max_retries,
+        "backoff_factor": backoff_factor,
+        "status_forcelist": status_forcelist,
+        "respect_retry_after_header": True,
+        # hand the last response back to the caller so that it can report the error itself.
+        "raise_on_status": False,
+    }
+    try:
+        return Retry(allowed_methods=frozenset(allowed_methods), **kwargs)
+    except TypeError:
+        # urllib3 < 1.26
+        return Retry(method_whitelist=frozenset(allowed_methods), **kwargs)
+
+
+def create_session(
+    pool_connections=10,
+    pool_maxsize=10,
+    max_retries=3,
+    backoff_factor=0.5,
+    status_forcelist=RETRY_STATUS_CODES,
+    allowed_methods=IDEMPOTENT_METHODS,
+):
+    """
+    returns a requests.Session that keeps connections alive and retries failed requests.
+
+    One session should be shared by all the calls that a Client or a dns provider makes so
+    that the TCP and TLS handshakes are paid once per host instead of once per request.
+
+    :param pool_connections: (optional) [integer]
+        the number of per-host connection pools to cache.
+    :param pool_maxsize:     (optional) [integer]
+        the max number of connections kept alive per host. should be at least the number of
+        threads that use the session concurrently.
+    :param max_retries:      (optional) [integer]
+        the max number of retries for a single request. 0 disables retries.
+    :param backoff_factor:   (optional) [float]
+        retries sleep for backoff_factor * (2 ** (retry number - 1)) seconds, unless the
+        server sent a Retry-After header.
+    :param status_forcelist: (optional) [tuple]
+        the http status codes that are retried.
+    :param allowed_methods:  (optional) [tuple]
+        the http methods that are retried.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=create_retry(
+            max_retries=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=status_forcelist,
+            allowed_methods=allowed_methods,
+        ),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class AsyncResponse(object):
+    """
+    the parts of an http response that sewer reads, with the same attributes as a python-requests Response.
+    the body is read when the response is received, so that the connection can be reused right away.
+    """
+
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode("utf8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content.decode("utf8"))
+
+
+def create_async_session():
+    """
+    returns an aiohttp.ClientSession, the asyncio counterpart of create_session.
+    It has to be created, used and closed on one event loop.
+    """
+    if not async_dependencies:
+        raise ImportError("""You need to install aiohttp. run; pip3 install sewer[async]""")
+    return aiohttp.ClientSession()
+
+
+async def async_request(session, method, url, timeout=None, **kwargs):
+    """
+    makes an http request with the aiohttp.ClientSession session and returns an AsyncResponse.
+
+    :param timeout: (optional) [number]
+        the max time that the request can take, in total.
+    :param kwargs:  (optional)
+        passed on to session.request; eg headers, params, data and json.
+    """
+    if timeout is not None:
+        kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout)
+    async with session.request(method, url, **kwargs) as response:
+        content = await response.read()
+        return AsyncResponse(response.status, response.headers, content)